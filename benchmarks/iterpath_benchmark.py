@@ -0,0 +1,106 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+"""
+Compares the traversal in `stixmarker.api.utils` with the previous one, which
+called ``list.index`` for every list element and sorted every dictionary.
+
+Usage:
+    python benchmarks/iterpath_benchmark.py [list length ...]
+
+"""
+
+import sys
+import timeit
+
+import six
+
+from stixmarker.api import utils
+
+
+def legacy_iterpath(obj, path=None):
+    if path is None:
+        path = []
+
+    for varname, varobj in iter(sorted(six.iteritems(obj))):
+        path.append(varname)
+        yield (path, varobj)
+
+        if isinstance(varobj, dict):
+
+            for item in legacy_iterpath(varobj, path):
+                yield item
+
+        elif isinstance(varobj, list):
+
+            for item in varobj:
+                index = "[{0}]".format(varobj.index(item))
+                path.append(index)
+
+                yield (path, item)
+
+                if isinstance(item, dict):
+                    for descendant in legacy_iterpath(item, path):
+                        yield descendant
+
+                path.pop()
+
+        path.pop()
+
+
+def build_observation(length):
+    objects = [
+        {
+            "type": "file-object",
+            "file_name": "file-{0}.exe".format(i),
+            "hashes": {"md5": "{0:032x}".format(i)},
+        }
+        for i in range(length)
+    ]
+
+    return {
+        "type": "observation",
+        "id": "observation--b67d30ff-02ac-498a-92f9-32f845f448cf",
+        "cybox": {"objects": objects},
+        "labels": ["label-{0}".format(i) for i in range(length)],
+    }
+
+
+def legacy_walk(obj):
+    for items, value in legacy_iterpath(obj):
+        ".".join(items)
+
+
+def iterpath_walk(obj):
+    for items, value in utils.iterpath(obj):
+        ".".join(items)
+
+
+def iterselectors_walk(obj):
+    for selector, value in utils.iterselectors(obj):
+        pass
+
+
+def best_of(func, obj, repeat=3):
+    return min(timeit.repeat(lambda: func(obj), number=1, repeat=repeat))
+
+
+def main():
+    lengths = [int(x) for x in sys.argv[1:]] or [1000, 10000, 20000]
+
+    print("{0:>8} {1:>12} {2:>12} {3:>14} {4:>9}".format(
+        "length", "legacy (s)", "iterpath (s)", "iterselectors", "speedup"))
+
+    for length in lengths:
+        obj = build_observation(length)
+
+        legacy = best_of(legacy_walk, obj, repeat=1)
+        current = best_of(iterpath_walk, obj)
+        selectors = best_of(iterselectors_walk, obj)
+
+        print("{0:>8} {1:>12.4f} {2:>12.4f} {3:>14.4f} {4:>8.1f}x".format(
+            length, legacy, current, selectors, legacy / selectors))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+"""
+Times every public marking operation on synthetic TLOs and reports ops/sec
+and peak memory allocated per call.
+
+Usage:
+    python benchmarks/marking_benchmark.py [--depth N] [--list-length N]
+        [--markings N] [--selectors N] [--json results.json]
+        [--compare baseline.json]
+
+Results saved with ``--json`` can be passed to ``--compare`` on a later run
+to report the change of every operation between versions.
+
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+
+from stixmarker import api
+from stixmarker.api import utils
+
+from tlo_generator import generate_tlo
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+timer = getattr(time, "perf_counter", time.time)
+
+NEW_MARKING = "marking-definition--ffffffffffffffffffffffffffffffff"
+
+
+def build_cases(tlo, valid, options):
+    """Return (name, function, mutates) tuples. Functions take the TLO."""
+    marked = tlo["granular_markings"][0]
+    selector = marked["selectors"][0]
+    ref = marked["marking_ref"]
+    many = valid[:options.query_selectors]
+    deepest = max(valid, key=lambda s: s.count("."))
+    value = utils.SelectorIndex(tlo).table[deepest]
+
+    return [
+        ("api.get_markings", lambda o: api.get_markings(o, many), False),
+        ("api.get_markings inherited", lambda o: api.get_markings(o, many, inherited=True), False),
+        ("api.get_markings descendants", lambda o: api.get_markings(o, many, descendants=True), False),
+        ("api.is_marked", lambda o: api.is_marked(o, many), False),
+        ("api.is_marked inherited", lambda o: api.is_marked(o, selector, ref, inherited=True), False),
+        ("api.add_markings", lambda o: api.add_markings(o, many, NEW_MARKING), True),
+        ("api.remove_markings", lambda o: api.remove_markings(o, selector, ref), True),
+        ("api.set_markings", lambda o: api.set_markings(o, many, NEW_MARKING), True),
+        ("api.clear_markings", lambda o: api.clear_markings(o, selector), True),
+        ("api.add_markings object", lambda o: api.add_markings(o, None, NEW_MARKING), True),
+        ("utils.iterpath", lambda o: sum(1 for _ in utils.iterpath(o)), False),
+        ("utils.get_selector", lambda o: utils.get_selector(o, value), False),
+    ]
+
+
+def measure(function, tlo, mutates, repeat):
+    """Return (ops/sec, peak bytes allocated by one call)."""
+    elapsed = 0.0
+
+    for _ in range(repeat):
+        target = copy.deepcopy(tlo) if mutates else tlo
+        start = timer()
+        function(target)
+        elapsed += timer() - start
+
+    peak = None
+
+    if tracemalloc is not None:
+        target = copy.deepcopy(tlo) if mutates else tlo
+        tracemalloc.start()
+        function(target)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return repeat / elapsed if elapsed else float("inf"), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--breadth", type=int, default=6)
+    parser.add_argument("--list-length", type=int, default=10)
+    parser.add_argument("--markings", type=int, default=50)
+    parser.add_argument("--selectors", type=int, default=10,
+                        help="selectors marked by each marking definition")
+    parser.add_argument("--query-selectors", type=int, default=20,
+                        help="selectors passed to each query")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="save the results to this file")
+    parser.add_argument("--compare", help="results of a previous run")
+    options = parser.parse_args()
+
+    tlo, valid = generate_tlo(options.depth, options.breadth,
+                              options.list_length, options.markings,
+                              options.selectors, seed=options.seed)
+
+    baseline = {}
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print("TLO: {0} nodes, {1} granular markings, {2} selectors per marking".format(
+        len(valid), options.markings, options.selectors))
+    print("{0:<32} {1:>12} {2:>12} {3:>10}".format("operation", "ops/sec", "peak KB", "change"))
+
+    results = {}
+
+    for name, function, mutates in build_cases(tlo, valid, options):
+        rate, peak = measure(function, tlo, mutates, options.repeat)
+        results[name] = {"ops_per_sec": rate, "peak_bytes": peak}
+
+        change = ""
+        if name in baseline:
+            change = "{0:+.1f}%".format((rate / baseline[name]["ops_per_sec"] - 1) * 100)
+
+        print("{0:<32} {1:>12.1f} {2:>12} {3:>10}".format(
+            name, rate, "-" if peak is None else "{0:.1f}".format(peak / 1024.0), change))
+
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump({"parameters": vars(options), "python": sys.version,
+                       "results": results}, f, indent=4, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
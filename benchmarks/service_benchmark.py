@@ -0,0 +1,126 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+"""
+Load-tests the marking service and reports p50/p99 latency and requests per
+second.
+
+Usage:
+    python benchmarks/service_benchmark.py [--host H] [--port N | --unix PATH]
+        [--operation is_marked] [--connections N] [--requests N]
+        [--depth N] [--markings N] [--jobs N]
+
+Without ``--port`` or ``--unix`` a service is started in this process on a
+free port, with ``--jobs`` worker processes.
+
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from stixmarker import service
+from stixmarker.api import bulk
+
+from tlo_generator import generate_tlo
+
+
+def build_body(operation, tlo, selectors, rng):
+    selector = rng.choice(selectors)
+    marking = tlo["granular_markings"][0]["marking_ref"]
+
+    if operation in ("get_markings", "is_marked"):
+        return {"object": tlo, "selectors": selector, "inherited": True}
+    elif operation == "clear_markings":
+        return {"object": tlo, "selectors": selector}
+
+    return {"object": tlo, "selectors": selector, "marking": marking}
+
+
+async def worker(connect, operation, tlo, selectors, count, seed, latencies):
+    rng = random.Random(seed)
+    client = await connect()
+    errors = 0
+
+    try:
+        for _ in range(count):
+            body = build_body(operation, tlo, selectors, rng)
+            start = time.perf_counter()
+            status, _ = await client.call(operation, **body)
+            latencies.append(time.perf_counter() - start)
+
+            if status != 200:
+                errors += 1
+    finally:
+        await client.close()
+
+    return errors
+
+
+async def run(options):
+    tlo, selectors = generate_tlo(depth=options.depth, breadth=options.breadth,
+                                  list_length=options.list_length,
+                                  markings=options.markings, seed=options.seed)
+    local = None
+
+    if options.port is None and options.unix is None:
+        local = service.MarkingService(jobs=options.jobs)
+        await local.start(options.host, 0)
+        host, port = local.address
+    else:
+        host, port = options.host, options.port
+
+    def connect():
+        return service.Client.connect(host, port, options.unix)
+
+    latencies = []
+    start = time.perf_counter()
+
+    try:
+        errors = await asyncio.gather(*[
+            worker(connect, options.operation, tlo, selectors, options.requests,
+                   options.seed + position, latencies)
+            for position in range(options.connections)
+        ])
+    finally:
+        elapsed = time.perf_counter() - start
+
+        if local is not None:
+            await local.close()
+
+    latencies.sort()
+    print("{0}: {1} requests over {2} connections, {3} errors".format(
+        options.operation, len(latencies), options.connections, sum(errors)))
+    print("throughput: {0:.1f} req/s  latency: p50 {1:.3f}ms  p99 {2:.3f}ms"
+          "  max {3:.3f}ms".format(
+              len(latencies) / elapsed,
+              bulk.percentile(latencies, 0.50) * 1000,
+              bulk.percentile(latencies, 0.99) * 1000,
+              latencies[-1] * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--unix", metavar="PATH")
+    parser.add_argument("--operation", default="is_marked",
+                        choices=service.OPERATIONS)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200,
+                        help="requests sent by each connection")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="workers of the in-process service")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--breadth", type=int, default=4)
+    parser.add_argument("--list-length", type=int, default=3)
+    parser.add_argument("--markings", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args()
+
+    asyncio.run(run(options))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import random
+
+from stixmarker.api import utils
+
+
+def _build_value(rng, depth, breadth, list_length):
+    if depth <= 0:
+        return "value-{0}".format(rng.randint(0, 10 ** 6))
+
+    properties = {}
+
+    for i in range(breadth):
+        name = "property_{0}".format(i)
+        kind = i % 3
+
+        if kind == 0:
+            properties[name] = "text-{0}".format(rng.randint(0, 10 ** 6))
+        elif kind == 1:
+            properties[name] = _build_value(rng, depth - 1, breadth, list_length)
+        else:
+            properties[name] = [
+                _build_value(rng, depth - 1, breadth, list_length)
+                for _ in range(list_length)
+            ]
+
+    return properties
+
+
+def generate_tlo(depth=3, breadth=4, list_length=10, markings=20,
+                 selectors=5, object_markings=2, seed=0):
+    """
+    Build a synthetic TLO with granular and object level markings.
+
+    Args:
+        depth: Nesting depth of dictionaries below the TLO.
+        breadth: Number of properties of every dictionary.
+        list_length: Length of every list property.
+        markings: Number of marking definitions applied as granular markings.
+        selectors: Number of selectors marked by each marking definition.
+        object_markings: Number of object level markings.
+        seed: Seed of the random generator, the same seed gives the same TLO.
+
+    Returns:
+        tuple: The TLO and the list of every valid selector on it.
+
+    """
+    rng = random.Random(seed)
+
+    tlo = _build_value(rng, depth, breadth, list_length)
+    tlo.update({
+        "type": "observation",
+        "id": "observation--{0:032x}".format(rng.getrandbits(128)),
+        "description": "Synthetic observation",
+    })
+
+    valid = [selector for selector, value in utils.iterselectors(tlo) if value]
+
+    tlo["granular_markings"] = [
+        {
+            "selectors": sorted(rng.sample(valid, min(selectors, len(valid)))),
+            "marking_ref": "marking-definition--{0:032x}".format(i),
+        }
+        for i in range(markings)
+    ]
+
+    if object_markings:
+        tlo["object_marking_refs"] = [
+            "marking-definition--{0:032x}".format(markings + i)
+            for i in range(object_markings)
+        ]
+
+    return tlo, valid
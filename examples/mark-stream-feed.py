@@ -0,0 +1,25 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import sys
+
+from stixmarker import stream
+
+
+def main():
+    file = open("multiple-tlo.json")
+
+    operations = [
+        ("add", "created", "marking-definition--089a6ecb-cc15-43cc-9494-767639779123"),
+        ("add", None, "marking-definition--84bc682f-62d3-4657-803e-665d3e2909d4"),
+    ]
+
+    # TLOs are read, marked and written one at a time.
+    stats = stream.mark_stream(file, sys.stdout, operations,
+                               output_format="ndjson")
+
+    print(stats)
+
+
+if __name__ == '__main__':
+    main()
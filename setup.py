@@ -1,11 +1,22 @@
 #!/usr/bin/env python
 
+import sys
+
 from setuptools import setup, find_packages
 
 install_requires = [
     'six==1.10.0',
+    'futures; python_version < "3"',
+]
+
+console_scripts = [
+    "stixmarker = stixmarker.cli:main",
 ]
 
+if sys.version_info >= (3, 7):
+    # The marking service is built on asyncio.
+    console_scripts.append("stixmarker-service = stixmarker.service:main")
+
 setup(
     name="stixmarker",
     version="0.1.0",
@@ -13,6 +24,12 @@ setup(
     url="http://github.com/oasis-open/cti-marking-prototype",
     packages=find_packages(),
     install_requires=install_requires,
+    extras_require={
+        "numpy": ["numpy"],
+    },
+    entry_points={
+        "console_scripts": console_scripts,
+    },
     classifiers=[
         "Programming Language :: Python",
         "Development Status :: 2 - Pre-Alpha",
@@ -3,11 +3,18 @@
 
 
 from stixmarker.api import utils
+from stixmarker.api import events
 from stixmarker.api import granular_markings
 from stixmarker.api import object_markings
+from stixmarker.api.batch import MarkingBatch, apply_operations
+from stixmarker.api.marking_index import MarkingIndex
+from stixmarker.api.parsing import Selector, parse_selector
+from stixmarker.api.redaction import redact
+from stixmarker.api.registry import MarkingRegistry
 
 
-def get_markings(obj, selectors, inherited=False, descendants=False):
+def get_markings(obj, selectors, inherited=False, descendants=False,
+                 index=None):
     """
     Get all markings associated to the field(s).
 
@@ -19,6 +26,9 @@ def get_markings(obj, selectors, inherited=False, descendants=False):
             inherited relative to the field(s).
         descendants: If True, include granular markings applied to any children
             relative to the field(s).
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls. Its trie is built once, each later lookup walks the depth
+            of its selectors.
 
     Returns:
         list: Marking IDs that matched the selectors expression.
@@ -35,7 +45,8 @@ def get_markings(obj, selectors, inherited=False, descendants=False):
         obj,
         selectors,
         inherited,
-        descendants)
+        descendants,
+        index)
 
     if inherited:
         results.extend(object_markings.get_markings(obj))
@@ -43,7 +54,7 @@ def get_markings(obj, selectors, inherited=False, descendants=False):
     return list(set(results))
 
 
-def set_markings(obj, selectors, marking):
+def set_markings(obj, selectors, marking, index=None):
     """
     Removes all markings associated with selectors and appends a new granular
     marking. Refer to `clear_markings` and `add_markings` for details.
@@ -54,6 +65,9 @@ def set_markings(obj, selectors, marking):
             which the field(s) appear(s).
         marking: identifier or list of marking identifiers that apply to the
             field(s) selected by `selectors`.
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls. Granular marking edits made through the same index cost
+            only the pairs they change.
 
     Note:
         If ``selectors`` is None, operations will be performed on object level
@@ -63,10 +77,12 @@ def set_markings(obj, selectors, marking):
     if selectors is None:
         object_markings.set_markings(obj, marking)
     else:
-        granular_markings.set_markings(obj, selectors, marking)
+        granular_markings.set_markings(obj, selectors, marking, index)
 
+    events.notify(obj)
 
-def remove_markings(obj, selectors, marking):
+
+def remove_markings(obj, selectors, marking, index=None):
     """
     Removes granular_marking from the granular_markings collection.
 
@@ -76,6 +92,9 @@ def remove_markings(obj, selectors, marking):
             which the field(s) appear(s).
         marking: identifier or list of marking identifiers that apply to the
             field(s) selected by `selectors`.
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls. Granular marking edits made through the same index cost
+            only the pairs they change.
 
     Raises:
         AssertionError: If `selectors` or `marking` fail data validation. Also
@@ -89,10 +108,12 @@ def remove_markings(obj, selectors, marking):
     if selectors is None:
         object_markings.remove_markings(obj, marking)
     else:
-        granular_markings.remove_markings(obj, selectors, marking)
+        granular_markings.remove_markings(obj, selectors, marking, index)
+
+    events.notify(obj)
 
 
-def add_markings(obj, selectors, marking):
+def add_markings(obj, selectors, marking, index=None):
     """
     Appends a granular_marking to the granular_markings collection.
 
@@ -102,6 +123,9 @@ def add_markings(obj, selectors, marking):
             which the field(s) appear(s).
         marking: identifier or list of marking identifiers that apply to the
             field(s) selected by `selectors`.
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls. Granular marking edits made through the same index cost
+            only the pairs they change.
 
     Raises:
         AssertionError: If `selectors` or `marking` fail data validation.
@@ -114,10 +138,12 @@ def add_markings(obj, selectors, marking):
     if selectors is None:
         object_markings.add_markings(obj, marking)
     else:
-        granular_markings.add_markings(obj, selectors, marking)
+        granular_markings.add_markings(obj, selectors, marking, index)
+
+    events.notify(obj)
 
 
-def clear_markings(obj, selectors):
+def clear_markings(obj, selectors, index=None):
     """
     Removes all granular_marking associated with the selectors.
 
@@ -125,6 +151,9 @@ def clear_markings(obj, selectors):
         obj: A TLO object.
         selectors: string or list of selectors strings relative to the TLO in
             which the field(s) appear(s).
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls. Granular marking edits made through the same index cost
+            only the pairs they change.
 
     Note:
         If ``selectors`` is None, operations will be performed on object level
@@ -134,10 +163,13 @@ def clear_markings(obj, selectors):
     if selectors is None:
         object_markings.clear_markings(obj)
     else:
-        granular_markings.clear_markings(obj, selectors)
+        granular_markings.clear_markings(obj, selectors, index)
 
+    events.notify(obj)
 
-def is_marked(obj, selectors, marking=None, inherited=False, descendants=False):
+
+def is_marked(obj, selectors, marking=None, inherited=False, descendants=False,
+              index=None):
     """
     Checks if field(s) is marked by any marking or by specific marking(s).
 
@@ -151,6 +183,8 @@ def is_marked(obj, selectors, marking=None, inherited=False, descendants=False):
             inherited to determine if the field(s) is/are marked.
         descendants: If True, include granular markings applied to any children
             of the given selector to determine if the field(s) is/are marked.
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls, see `get_markings`.
 
     Returns:
         bool: True if ``selectors`` is found on internal TLO collection.
@@ -167,15 +201,22 @@ def is_marked(obj, selectors, marking=None, inherited=False, descendants=False):
     if selectors is None:
         return object_markings.is_marked(obj, marking)
 
+    if index is None and inherited and len(utils.fix_selectors(selectors)) >= \
+            granular_markings.TRIE_MIN_SELECTORS:
+        # The lookups below share one trie instead of building one each.
+        index = utils.SelectorIndex(obj)
+
     result = granular_markings.is_marked(
         obj,
         selectors,
         marking,
         inherited,
-        descendants)
+        descendants,
+        index)
 
     if inherited:
-        granular_marks = granular_markings.get_markings(obj, selectors)
+        granular_marks = granular_markings.get_markings(obj, selectors,
+                                                        index=index)
         object_marks = object_markings.get_markings(obj)
 
         if granular_marks:
@@ -184,7 +225,8 @@ def is_marked(obj, selectors, marking=None, inherited=False, descendants=False):
                 selectors,
                 granular_marks,
                 inherited,
-                descendants)
+                descendants,
+                index)
 
         result = result or object_markings.is_marked(obj, object_marks)
 
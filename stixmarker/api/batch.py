@@ -0,0 +1,191 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import six
+
+from stixmarker.api import events
+from stixmarker.api import object_markings
+from stixmarker.api import utils
+
+
+def _as_list(data):
+    if isinstance(data, (six.text_type, six.binary_type)):
+        return [data]
+
+    return list(data or [])
+
+
+class MarkingBatch(object):
+    """
+    Applies many marking operations to one TLO and writes the result once.
+
+    Selectors are resolved directly into the TLO, which is not modified until
+    `commit`, so validation never walks the whole object. Granular markings
+    are held in a `utils.GranularMarkings` for the whole batch, so each
+    operation costs the number of pairs it touches, and are compressed back
+    into ``granular_markings`` only on `commit`. Each operation has the same
+    semantics and raises the same errors as its counterpart in
+    `stixmarker.api`.
+
+    Args:
+        obj: A TLO object.
+
+    Example:
+        >>> with MarkingBatch(tlo) as batch:
+        >>>     batch.add_markings("description", "marking-definition--1")
+        >>>     batch.clear_markings("title")
+        >>>     batch.add_markings(None, "marking-definition--2")
+
+    Note:
+        ``obj`` is left untouched until `commit`. Leaving the ``with`` block
+        with an exception discards every operation of the batch. Selectors
+        are validated against the TLO as it was when the batch started.
+
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+        self._markings = utils.GranularMarkings(obj.get("granular_markings"))
+        self._object_level = {}
+        self._granular_dirty = False
+        self._object_dirty = False
+
+        if "object_marking_refs" in obj:
+            self._object_level["object_marking_refs"] = \
+                list(object_markings.get_markings(obj))
+
+    def add_markings(self, selectors, marking):
+        """See `stixmarker.api.add_markings`."""
+        if selectors is None:
+            object_markings.add_markings(self._object_level, marking)
+            self._object_dirty = True
+            return
+
+        selectors = utils.fix_selectors(selectors)
+        utils.validate(self.obj, selectors, marking)
+
+        self._markings.add(selectors, _as_list(marking))
+        self._granular_dirty = True
+
+    def remove_markings(self, selectors, marking):
+        """See `stixmarker.api.remove_markings`."""
+        if selectors is None:
+            object_markings.remove_markings(self._object_level, marking)
+            self._object_dirty = True
+            return
+
+        selectors = utils.fix_selectors(selectors)
+        utils.validate(self.obj, selectors, marking)
+
+        if not self._markings:
+            return
+
+        if not self._markings.remove(selectors, _as_list(marking)):
+            raise AssertionError("Unable to remove Granular Marking(s) from"
+                                 " internal collection. Marking(s) not found...")
+
+        self._granular_dirty = True
+
+    def clear_markings(self, selectors):
+        """See `stixmarker.api.clear_markings`."""
+        if selectors is None:
+            object_markings.clear_markings(self._object_level)
+            self._object_dirty = True
+            return
+
+        selectors = utils.fix_selectors(selectors)
+        utils.validate(self.obj, selectors)
+
+        if not self._markings:
+            return
+
+        if not self._markings.clear(selectors):
+            raise AssertionError("Unable to clear Granular Marking(s) from"
+                                 " internal collection. Selector(s) not found...")
+
+        self._granular_dirty = True
+
+    def set_markings(self, selectors, marking):
+        """See `stixmarker.api.set_markings`."""
+        if selectors is None:
+            object_markings.set_markings(self._object_level, marking)
+            self._object_dirty = True
+            return
+
+        self.clear_markings(selectors)
+        self.add_markings(selectors, marking)
+
+    def commit(self):
+        """Write the markings of the batch back into the TLO."""
+        changed = self._granular_dirty or self._object_dirty
+
+        if self._granular_dirty:
+            granular_markings = self._markings.to_list()
+
+            if granular_markings:
+                self.obj["granular_markings"] = granular_markings
+            else:
+                self.obj.pop("granular_markings", None)
+
+        if self._object_dirty:
+            if self._object_level.get("object_marking_refs"):
+                self.obj["object_marking_refs"] = \
+                    self._object_level["object_marking_refs"]
+            else:
+                self.obj.pop("object_marking_refs", None)
+
+        self._granular_dirty = False
+        self._object_dirty = False
+
+        if changed:
+            events.notify(self.obj)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+
+
+_OPERATIONS = {
+    "add": MarkingBatch.add_markings,
+    "remove": MarkingBatch.remove_markings,
+    "set": MarkingBatch.set_markings,
+    "clear": MarkingBatch.clear_markings,
+}
+
+
+def apply_operations(obj, operations):
+    """
+    Applies a sequence of marking operations to a TLO in a single batch.
+
+    Args:
+        obj: A TLO object.
+        operations: iterable of tuples ``(operation, selectors, marking)``
+            where operation is one of "add", "remove", "set" or "clear".
+            ``marking`` is omitted for "clear". ``selectors`` may be None to
+            operate on object level markings.
+
+    Raises:
+        AssertionError: If an operation is unknown or fails data validation.
+            No change is written to ``obj`` in that case.
+
+    Example:
+        >>> apply_operations(tlo, [
+        >>>     ("add", ["description"], "marking-definition--1"),
+        >>>     ("clear", "title"),
+        >>>     ("set", None, "marking-definition--2"),
+        >>> ])
+
+    """
+    with MarkingBatch(obj) as batch:
+        for operation in operations:
+            name, args = operation[0], operation[1:]
+
+            if name not in _OPERATIONS:
+                raise AssertionError("Unknown marking operation"
+                                     " '{0}'...".format(name))
+
+            _OPERATIONS[name](batch, *args)
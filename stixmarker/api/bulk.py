@@ -0,0 +1,260 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import collections
+import itertools
+
+from stixmarker import api
+from stixmarker.api import events
+
+
+READ_OPERATIONS = ("get_markings", "is_marked")
+WRITE_OPERATIONS = ("add_markings", "remove_markings", "set_markings",
+                    "clear_markings")
+
+
+def get_objects(objects):
+    """
+    Return the list of TLOs held by ``objects``.
+
+    Args:
+        objects: A list of TLOs, an iterable of TLOs or a STIX bundle.
+
+    """
+    if isinstance(objects, dict):
+        assert objects.get("type") == "bundle", \
+            "Expected a STIX bundle or a list of TLOs..."
+
+        return objects.get("objects", [])
+
+    return list(objects)
+
+
+def _run(operation, obj, args, kwargs, raise_errors):
+    try:
+        return getattr(api, operation)(obj, *args, **kwargs)
+    except AssertionError as e:
+        if raise_errors:
+            raise
+        return e
+
+
+def _run_chunk(chunk, operation, args, kwargs, raise_errors):
+    """Worker entry point. Mutated TLOs are sent back to the parent."""
+    results = [_run(operation, obj, args, kwargs, raise_errors)
+               for obj in chunk]
+
+    if operation in WRITE_OPERATIONS:
+        return results, chunk
+
+    return results, None
+
+
+def _get_executor(executor, jobs):
+    try:
+        from concurrent import futures
+    except ImportError:
+        raise ImportError("Parallel execution requires the 'futures'"
+                          " package on Python 2...")
+
+    if executor == "process":
+        return futures.ProcessPoolExecutor(max_workers=jobs)
+    elif executor == "thread":
+        return futures.ThreadPoolExecutor(max_workers=jobs)
+
+    raise AssertionError("Unknown executor '{0}'...".format(executor))
+
+
+def iter_chunks(objects, size):
+    """
+    Split ``objects`` into lists of ``size`` items, the last one possibly
+    shorter. ``objects`` can be any iterable, it is read as chunks are
+    consumed.
+    """
+    objects = iter(objects)
+
+    while True:
+        chunk = list(itertools.islice(objects, size))
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def map_chunks(function, chunks, args=(), jobs=None, executor="process"):
+    """
+    Yield ``function(chunk, *args)`` for each chunk of ``chunks``, in order.
+
+    Args:
+        function: The function applied to each chunk. It must be defined at
+            module level to be sent to a process pool.
+        chunks: An iterable of chunks, see `iter_chunks`.
+        args: Extra positional arguments passed after the chunk.
+        jobs: Number of workers. None or 1 runs in the calling thread.
+        executor: "process" or "thread", the kind of pool used when ``jobs``
+            is greater than 1.
+
+    Note:
+        At most ``2 * jobs`` chunks are in flight, so memory does not grow
+        with the size of ``chunks`` when it is read lazily.
+
+    """
+    args = tuple(args)
+
+    if not jobs or jobs <= 1:
+        for chunk in chunks:
+            yield function(chunk, *args)
+        return
+
+    with _get_executor(executor, jobs) as pool:
+        pending = collections.deque()
+
+        for chunk in chunks:
+            pending.append(pool.submit(function, chunk, *args))
+
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def percentile(ordered, fraction):
+    """
+    Return the value at ``fraction`` (0 to 1) of the sorted list ``ordered``,
+    0.0 if it is empty.
+    """
+    if not ordered:
+        return 0.0
+
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def apply(objects, operation, args=(), kwargs=None, jobs=None,
+          executor="process", chunksize=256, raise_errors=True):
+    """
+    Apply a `stixmarker.api` operation to every TLO of ``objects``.
+
+    Args:
+        objects: A list of TLOs or a STIX bundle.
+        operation: Name of the `stixmarker.api` function to call, one of
+            `READ_OPERATIONS` or `WRITE_OPERATIONS`.
+        args: Positional arguments passed after the TLO.
+        kwargs: Keyword arguments passed to the operation.
+        jobs: Number of workers. None or 1 runs in the calling thread.
+        executor: "process" or "thread", the kind of pool used when ``jobs``
+            is greater than 1.
+        chunksize: Number of TLOs sent to a worker at once.
+        raise_errors: If False, an `AssertionError` raised for a TLO is
+            returned in its result slot instead of aborting the run.
+
+    Returns:
+        list: The result of the operation for each TLO, in input order.
+
+    Example:
+        >>> apply(bundle, "add_markings", ("description", "marking-definition--1"), jobs=8)
+        [None, None, ...]
+
+    Note:
+        TLOs are modified in place by write operations, including when they
+        are processed by a process pool. If an error is raised, TLOs of other
+        chunks may already have been modified.
+
+    """
+    if operation not in READ_OPERATIONS + WRITE_OPERATIONS:
+        raise AssertionError("Unknown marking operation"
+                             " '{0}'...".format(operation))
+
+    objects = get_objects(objects)
+    args = tuple(args)
+    kwargs = kwargs or {}
+
+    if not jobs or jobs == 1:
+        return [_run(operation, obj, args, kwargs, raise_errors)
+                for obj in objects]
+
+    chunksize = max(1, chunksize)
+    results = []
+
+    chunks = map_chunks(_run_chunk, iter_chunks(objects, chunksize),
+                        (operation, args, kwargs, raise_errors), jobs,
+                        executor)
+
+    for position, (chunk_results, mutated) in enumerate(chunks):
+        results.extend(chunk_results)
+
+        if mutated is not None and executor == "process":
+            offset = position * chunksize
+            originals = objects[offset:offset + len(mutated)]
+
+            for original, updated in zip(originals, mutated):
+                original.clear()
+                original.update(updated)
+                events.notify(original)
+
+    return results
+
+
+def get_markings(objects, selectors, inherited=False, descendants=False,
+                 **options):
+    """
+    Bulk version of `stixmarker.api.get_markings`. Refer to `apply` for
+    ``options``.
+
+    Returns:
+        list: The markings of each TLO, in input order.
+
+    """
+    return apply(objects, "get_markings", (selectors, inherited, descendants),
+                 **options)
+
+
+def set_markings(objects, selectors, marking, **options):
+    """
+    Bulk version of `stixmarker.api.set_markings`. Refer to `apply` for
+    ``options``.
+
+    """
+    return apply(objects, "set_markings", (selectors, marking), **options)
+
+
+def remove_markings(objects, selectors, marking, **options):
+    """
+    Bulk version of `stixmarker.api.remove_markings`. Refer to `apply` for
+    ``options``.
+
+    """
+    return apply(objects, "remove_markings", (selectors, marking), **options)
+
+
+def add_markings(objects, selectors, marking, **options):
+    """
+    Bulk version of `stixmarker.api.add_markings`. Refer to `apply` for
+    ``options``.
+
+    """
+    return apply(objects, "add_markings", (selectors, marking), **options)
+
+
+def clear_markings(objects, selectors, **options):
+    """
+    Bulk version of `stixmarker.api.clear_markings`. Refer to `apply` for
+    ``options``.
+
+    """
+    return apply(objects, "clear_markings", (selectors,), **options)
+
+
+def is_marked(objects, selectors, marking=None, inherited=False,
+              descendants=False, **options):
+    """
+    Bulk version of `stixmarker.api.is_marked`. Refer to `apply` for
+    ``options``.
+
+    Returns:
+        list: A boolean for each TLO, in input order.
+
+    """
+    return apply(objects, "is_marked",
+                 (selectors, marking, inherited, descendants), **options)
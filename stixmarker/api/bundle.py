@@ -0,0 +1,204 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+from stixmarker import api
+from stixmarker.api import bulk
+
+
+def _tlp(id_, color):
+    return {
+        "type": "marking-definition",
+        "id": id_,
+        "created": "2017-01-20T00:00:00.000Z",
+        "definition_type": "tlp",
+        "definition": {"tlp": color},
+    }
+
+
+# The TLP marking definitions published with STIX 2.0, resolved even when a
+# bundle does not carry them.
+TLP_WHITE = _tlp("marking-definition--613f2e26-407d-48c7-9eca-b8e91df99dc9", "white")
+TLP_GREEN = _tlp("marking-definition--34098fce-860f-48ae-8e50-ebd3cc5e41da", "green")
+TLP_AMBER = _tlp("marking-definition--f88d31f6-486f-44da-b317-01333bde0b82", "amber")
+TLP_RED = _tlp("marking-definition--5e57c739-391a-4eb3-b6be-7d15ca92d5ed", "red")
+
+# TLP levels from the least to the most restrictive.
+TLP_LEVELS = ("white", "green", "amber", "red")
+
+_TLP_RANK = dict((color, rank) for rank, color in enumerate(TLP_LEVELS))
+
+
+class Bundle(object):
+    """
+    A STIX bundle with its objects and marking definitions indexed by id.
+
+    The objects are scanned once, when the bundle is built. Every later
+    lookup, of an object or of the marking definition behind a marking ref,
+    is a dictionary access.
+
+    Args:
+        bundle: A STIX bundle, or a list or iterable of STIX objects.
+
+    Example:
+        >>> bundle = Bundle(json.load(fp))
+        >>> bundle.effective_tlp("indicator--...", "pattern")
+        'amber'
+        >>> bundle.statements("indicator--...", "pattern")
+        ['Copyright 2017, Example Corp']
+
+    Note:
+        Objects and marking definitions added to the underlying list after
+        the bundle is built are not seen, use `add`.
+
+    """
+
+    def __init__(self, bundle):
+        self.objects = bulk.get_objects(bundle)
+        self.marking_definitions = dict(
+            (definition["id"], definition)
+            for definition in (TLP_WHITE, TLP_GREEN, TLP_AMBER, TLP_RED)
+        )
+        self._by_id = {}
+
+        for obj in self.objects:
+            self._index(obj)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __contains__(self, id_):
+        return id_ in self._by_id
+
+    def _index(self, obj):
+        if "id" in obj:
+            self._by_id[obj["id"]] = obj
+
+        if obj.get("type") == "marking-definition":
+            self.marking_definitions[obj["id"]] = obj
+
+    def add(self, obj):
+        """Append ``obj`` to the bundle and index it."""
+        self.objects.append(obj)
+        self._index(obj)
+
+    def get(self, id_):
+        """Return the object with id ``id_``, None if not in the bundle."""
+        return self._by_id.get(id_)
+
+    def _object(self, obj):
+        if isinstance(obj, dict):
+            return obj
+
+        try:
+            return self._by_id[obj]
+        except KeyError:
+            raise AssertionError("Object '{0}' not found in"
+                                 " bundle...".format(obj))
+
+    def resolve(self, refs):
+        """
+        Return the marking definitions of ``refs``.
+
+        Args:
+            refs: identifier or list of marking identifiers.
+
+        Returns:
+            list: Marking definition objects, in the order of ``refs``. Refs
+                without a definition in the bundle are left out, see
+                `unresolved`.
+
+        """
+        refs = [refs] if not isinstance(refs, (list, tuple, set)) else refs
+        definitions = self.marking_definitions
+
+        return [definitions[ref] for ref in refs if ref in definitions]
+
+    def unresolved(self, obj):
+        """Return the marking refs of ``obj`` without a definition."""
+        obj = self._object(obj)
+        refs = set(api.get_markings(obj, None))
+
+        for granular_marking in obj.get("granular_markings") or []:
+            ref = granular_marking.get("marking_ref")
+            refs.update(ref if isinstance(ref, list) else [ref])
+
+        return sorted(ref for ref in refs
+                      if ref and ref not in self.marking_definitions)
+
+    def get_markings(self, obj, selectors=None, inherited=True,
+                     descendants=False):
+        """
+        Return the marking definitions that apply to field(s) of an object.
+
+        Args:
+            obj: An object of the bundle, or its id.
+            selectors: string or list of selectors strings relative to the
+                object. If None, only object level markings are used.
+            inherited: If True, include object level markings and granular
+                markings inherited relative to the field(s).
+            descendants: If True, include granular markings applied to any
+                children relative to the field(s).
+
+        Returns:
+            list: Marking definition objects. Refs without a definition in
+                the bundle are left out.
+
+        Raises:
+            AssertionError: If ``obj`` is not in the bundle or ``selectors``
+                fail data validation.
+
+        """
+        refs = api.get_markings(self._object(obj), selectors, inherited,
+                                descendants)
+
+        return self.resolve(sorted(refs))
+
+    def effective_tlp(self, obj, selectors=None):
+        """
+        Return the most restrictive TLP level applying to field(s) of an
+        object, counting inherited markings.
+
+        Args:
+            obj: An object of the bundle, or its id.
+            selectors: string or list of selectors strings relative to the
+                object. If None, only object level markings are used.
+
+        Returns:
+            str: One of `TLP_LEVELS`, None if no TLP marking applies.
+
+        """
+        levels = [
+            definition["definition"].get("tlp")
+            for definition in self.get_markings(obj, selectors)
+            if definition.get("definition_type") == "tlp"
+        ]
+        levels = [level for level in levels if level in _TLP_RANK]
+
+        if not levels:
+            return None
+
+        return max(levels, key=_TLP_RANK.get)
+
+    def statements(self, obj, selectors=None):
+        """
+        Return the statements applying to field(s) of an object, counting
+        inherited markings.
+
+        Args:
+            obj: An object of the bundle, or its id.
+            selectors: string or list of selectors strings relative to the
+                object. If None, only object level markings are used.
+
+        Returns:
+            list: Statement strings.
+
+        """
+        return [
+            definition["definition"].get("statement")
+            for definition in self.get_markings(obj, selectors)
+            if definition.get("definition_type") == "statement"
+        ]
@@ -0,0 +1,154 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import collections
+import threading
+
+from stixmarker import api
+from stixmarker.api import events
+from stixmarker.api import parsing
+from stixmarker.api import utils
+
+
+class _Entry(object):
+
+    __slots__ = ("obj", "version", "results")
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.version = 0
+        self.results = {}
+
+
+def _key(selectors, marking=None):
+    selectors = utils.convert_to_list(selectors)
+    marking = utils.convert_to_list(marking)
+
+    return (
+        None if selectors is None
+        else tuple(parsing.selector_text(s) for s in selectors),
+        None if marking is None else tuple(marking),
+    )
+
+
+class MarkingCache(object):
+    """
+    Memoizes `stixmarker.api.get_markings` and `stixmarker.api.is_marked`
+    results per TLO and query.
+
+    Each cached TLO has a version counter, bumped whenever its markings are
+    changed through `stixmarker.api` (add, remove, set and clear, batches
+    and bulk runs), which also drops its cached results. A result computed
+    while the TLO changed is not cached.
+
+    Args:
+        maxsize: Number of TLOs kept, least recently used are evicted.
+
+    Example:
+        >>> with MarkingCache() as cache:
+        >>>     cache.is_marked(tlo, "description", inherited=True)
+        True
+
+    Note:
+        Changes made to a TLO without `stixmarker.api` are not seen, call
+        `invalidate` after them. A TLO in the cache is kept alive until it is
+        evicted or the cache is closed. `events` holds the cache through a
+        weak reference, a cache that is no longer used is collected without
+        calling `close`.
+
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # id(obj) -> _Entry
+        self._lock = threading.Lock()
+        events.subscribe(self._on_change, weak=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _on_change(self, obj):
+        with self._lock:
+            entry = self._entries.get(id(obj))
+
+            if entry is not None and entry.obj is obj:
+                entry.version += 1
+                entry.results.clear()
+
+    def _lookup(self, obj, key, compute):
+        with self._lock:
+            entry = self._entries.get(id(obj))
+
+            if entry is None or entry.obj is not obj:
+                entry = self._entries[id(obj)] = _Entry(obj)
+
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            else:
+                # Move to the most recently used position.
+                del self._entries[id(obj)]
+                self._entries[id(obj)] = entry
+
+            cached = entry.results.get(key)
+
+            if cached is not None and cached[0] == entry.version:
+                self.hits += 1
+                return cached[1]
+
+            version = entry.version
+            self.misses += 1
+
+        result = compute()
+
+        with self._lock:
+            if entry.version == version:
+                entry.results[key] = (version, result)
+
+        return result
+
+    def get_markings(self, obj, selectors, inherited=False, descendants=False):
+        """Cached `stixmarker.api.get_markings`."""
+        key = ("get",) + _key(selectors) + (inherited, descendants)
+        result = self._lookup(
+            obj, key,
+            lambda: api.get_markings(obj, selectors, inherited, descendants),
+        )
+
+        return list(result)
+
+    def is_marked(self, obj, selectors, marking=None, inherited=False,
+                  descendants=False):
+        """Cached `stixmarker.api.is_marked`."""
+        key = ("is_marked",) + _key(selectors, marking) + \
+            (inherited, descendants)
+
+        return self._lookup(
+            obj, key,
+            lambda: api.is_marked(obj, selectors, marking, inherited,
+                                  descendants),
+        )
+
+    def invalidate(self, obj=None):
+        """Drop the results of ``obj``, or of every TLO if None."""
+        with self._lock:
+            if obj is None:
+                self._entries.clear()
+            else:
+                entry = self._entries.get(id(obj))
+
+                if entry is not None and entry.obj is obj:
+                    del self._entries[id(obj)]
+
+    def close(self):
+        """Drop every result and stop following marking changes."""
+        events.unsubscribe(self._on_change)
+        self.invalidate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,201 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import array
+
+import six
+
+
+# Unsigned int, at least 4 bytes on every supported platform.
+_TYPECODE = "I" if array.array("I").itemsize >= 4 else "L"
+
+
+class Interner(object):
+    """
+    Assigns a stable integer ID to each distinct string it is given.
+
+    Args:
+        values: Optional strings to intern up front.
+
+    """
+
+    def __init__(self, values=()):
+        self._ids = {}
+        self._values = []
+
+        for value in values:
+            self.intern(value)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, value):
+        return value in self._ids
+
+    def intern(self, value):
+        """Return the ID of ``value``, assigning a new one if needed."""
+        try:
+            return self._ids[value]
+        except KeyError:
+            self._ids[value] = len(self._values)
+            self._values.append(value)
+            return self._ids[value]
+
+    def get(self, value, default=None):
+        """Return the ID of ``value`` without interning it."""
+        return self._ids.get(value, default)
+
+    def lookup(self, id_):
+        """Return the string interned as ``id_``."""
+        return self._values[id_]
+
+
+class CompactGranularMarking(object):
+    """
+    A granular marking with interned selectors and marking_ref.
+
+    Attributes:
+        selectors: array of selector IDs.
+        marking_ref: marking ID, or array of marking IDs when the STIX
+            entry held a list.
+
+    """
+
+    __slots__ = ("selectors", "marking_ref")
+
+    def __init__(self, selectors, marking_ref):
+        self.selectors = selectors
+        self.marking_ref = marking_ref
+
+
+class CompactMarkings(object):
+    """
+    The markings of one TLO with interned marking IDs and selectors.
+
+    Attributes:
+        object_marking_refs: array of marking IDs, None when the TLO has no
+            ``object_marking_refs`` property.
+        granular_markings: tuple of `CompactGranularMarking`, None when the
+            TLO has no ``granular_markings`` property.
+
+    """
+
+    __slots__ = ("object_marking_refs", "granular_markings")
+
+    def __init__(self, object_marking_refs=None, granular_markings=None):
+        self.object_marking_refs = object_marking_refs
+        self.granular_markings = granular_markings
+
+
+def _is_string(value):
+    return isinstance(value, (six.text_type, six.binary_type))
+
+
+class CompactCodec(object):
+    """
+    Converts TLO markings to and from `CompactMarkings`.
+
+    Marking IDs and selectors are interned once per codec, so a corpus held
+    resident stores each distinct string once and every TLO only keeps
+    arrays of integers. Use one codec for the whole corpus.
+
+    Example:
+        >>> codec = CompactCodec()
+        >>> compact = codec.encode(tlo, strip=True)
+        >>> ...
+        >>> codec.restore(tlo, compact)
+
+    """
+
+    def __init__(self):
+        self.refs = Interner()
+        self.selectors = Interner()
+
+    def _encode_refs(self, refs):
+        return array.array(_TYPECODE, [self.refs.intern(r) for r in refs])
+
+    def encode(self, tlo, strip=False):
+        """
+        Return the `CompactMarkings` of ``tlo``.
+
+        Args:
+            tlo: A TLO object.
+            strip: If True, remove the marking properties from ``tlo``.
+
+        """
+        compact = CompactMarkings()
+
+        if "object_marking_refs" in tlo:
+            refs = tlo["object_marking_refs"]
+            compact.object_marking_refs = \
+                self._encode_refs([refs] if _is_string(refs) else refs)
+
+        if "granular_markings" in tlo:
+            granular_markings = []
+
+            for granular_marking in tlo["granular_markings"]:
+                selectors = granular_marking.get("selectors", [])
+                ref = granular_marking.get("marking_ref")
+
+                if _is_string(selectors):
+                    selectors = [selectors]
+
+                if _is_string(ref):
+                    ref = self.refs.intern(ref)
+                else:
+                    ref = self._encode_refs(ref or [])
+
+                granular_markings.append(CompactGranularMarking(
+                    array.array(_TYPECODE,
+                                [self.selectors.intern(s) for s in selectors]),
+                    ref,
+                ))
+
+            compact.granular_markings = tuple(granular_markings)
+
+        if strip:
+            tlo.pop("object_marking_refs", None)
+            tlo.pop("granular_markings", None)
+
+        return compact
+
+    def decode(self, compact):
+        """
+        Return the marking properties held by ``compact``.
+
+        Returns:
+            dict: With ``object_marking_refs`` and/or ``granular_markings``
+                in their STIX JSON shape.
+
+        """
+        lookup_ref = self.refs.lookup
+        lookup_selector = self.selectors.lookup
+        result = {}
+
+        if compact.object_marking_refs is not None:
+            result["object_marking_refs"] = \
+                [lookup_ref(r) for r in compact.object_marking_refs]
+
+        if compact.granular_markings is not None:
+            result["granular_markings"] = [
+                {
+                    "selectors": [lookup_selector(s) for s in m.selectors],
+                    "marking_ref": (
+                        lookup_ref(m.marking_ref)
+                        if isinstance(m.marking_ref, six.integer_types)
+                        else [lookup_ref(r) for r in m.marking_ref]
+                    ),
+                }
+                for m in compact.granular_markings
+            ]
+
+        return result
+
+    def restore(self, tlo, compact):
+        """Write the markings held by ``compact`` back into ``tlo``."""
+        tlo.pop("object_marking_refs", None)
+        tlo.pop("granular_markings", None)
+        tlo.update(self.decode(compact))
+
+        return tlo
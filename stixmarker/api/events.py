@@ -0,0 +1,96 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import contextlib
+import threading
+import weakref
+
+
+_listeners = []
+_local = threading.local()
+
+
+class _WeakMethod(object):
+    """
+    A bound method holding its object through a weak reference. It removes
+    itself from the listeners once the object is collected.
+    """
+
+    def __init__(self, method):
+        self.func = method.__func__
+        self.ref = weakref.ref(method.__self__, self._drop)
+
+    def _drop(self, ref):
+        if self in _listeners:
+            _listeners.remove(self)
+
+    def __call__(self, obj):
+        target = self.ref()
+
+        if target is not None:
+            self.func(target, obj)
+
+    def __eq__(self, other):
+        if isinstance(other, _WeakMethod):
+            return self.ref == other.ref and self.func is other.func
+
+        return getattr(other, "__func__", None) is self.func and \
+            getattr(other, "__self__", None) is self.ref()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+def subscribe(listener, weak=False):
+    """
+    Register ``listener`` to be called with each TLO whose markings are
+    changed through `stixmarker.api`.
+
+    Args:
+        listener: A callable taking the modified TLO.
+        weak: If True, ``listener`` must be a bound method and its object is
+            only weakly referenced: the listener is dropped once the object
+            is collected, without calling `unsubscribe`.
+
+    """
+    if weak:
+        listener = _WeakMethod(listener)
+
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def unsubscribe(listener):
+    """Stop calling ``listener``. Unknown listeners are ignored."""
+    for position, registered in enumerate(_listeners):
+        if registered == listener:
+            del _listeners[position]
+            return
+
+
+@contextlib.contextmanager
+def muted():
+    """
+    Context manager under which `notify` calls no listener, in the current
+    thread only. Meant for changes to TLOs no listener may know about, such
+    as a new copy carrying the id of a tracked TLO.
+    """
+    previous = getattr(_local, "muted", False)
+    _local.muted = True
+
+    try:
+        yield
+    finally:
+        _local.muted = previous
+
+
+def notify(obj):
+    """Tell every listener the markings of ``obj`` changed."""
+    if getattr(_local, "muted", False):
+        return
+
+    for listener in list(_listeners):
+        listener(obj)
@@ -0,0 +1,106 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+"""
+Non-mutating variants of the `stixmarker.api` mutators.
+
+Each function returns a new TLO and leaves its input untouched. The new TLO
+is a shallow copy: every property other than ``object_marking_refs`` and
+``granular_markings`` is shared with the input, and only the marking
+collections are copied before the operation runs. This is much cheaper than
+a ``copy.deepcopy`` of the whole TLO.
+
+Example:
+    >>> marked = functional.add_markings(tlo, "description", "marking-definition--1")
+    >>> marked["x"] is tlo["x"]
+    True
+
+Note:
+    Shared substructure must be treated as read-only, a change made through
+    one TLO is seen by the other.
+
+    The copy is changed with `events` muted: it has the id of its input, and
+    listeners such as a tracking `MarkingIndex` would take it for the input.
+
+"""
+
+import copy
+
+from stixmarker import api
+from stixmarker.api import events
+
+
+def _copy_entry(granular_marking):
+    entry = dict(granular_marking)
+
+    for key in ("selectors", "marking_ref"):
+        if isinstance(entry.get(key), list):
+            entry[key] = list(entry[key])
+
+    return entry
+
+
+def copy_markings(obj):
+    """
+    Return a shallow copy of ``obj`` with its own ``object_marking_refs`` and
+    ``granular_markings`` collections.
+    """
+    result = copy.copy(obj)
+
+    if isinstance(obj.get("object_marking_refs"), list):
+        result["object_marking_refs"] = list(obj["object_marking_refs"])
+
+    if isinstance(obj.get("granular_markings"), list):
+        result["granular_markings"] = \
+            [_copy_entry(entry) for entry in obj["granular_markings"]]
+
+    return result
+
+
+def _apply(obj, operation, *args):
+    result = copy_markings(obj)
+
+    with events.muted():
+        operation(result, *args)
+
+    return result
+
+
+def set_markings(obj, selectors, marking):
+    """
+    Return a copy of ``obj`` with `stixmarker.api.set_markings` applied.
+    Refer to it for details.
+    """
+    return _apply(obj, api.set_markings, selectors, marking)
+
+
+def remove_markings(obj, selectors, marking):
+    """
+    Return a copy of ``obj`` with `stixmarker.api.remove_markings` applied.
+    Refer to it for details.
+    """
+    return _apply(obj, api.remove_markings, selectors, marking)
+
+
+def add_markings(obj, selectors, marking):
+    """
+    Return a copy of ``obj`` with `stixmarker.api.add_markings` applied.
+    Refer to it for details.
+    """
+    return _apply(obj, api.add_markings, selectors, marking)
+
+
+def clear_markings(obj, selectors):
+    """
+    Return a copy of ``obj`` with `stixmarker.api.clear_markings` applied.
+    Refer to it for details.
+    """
+    return _apply(obj, api.clear_markings, selectors)
+
+
+def apply_operations(obj, operations):
+    """
+    Return a copy of ``obj`` with `stixmarker.api.apply_operations` applied.
+    Refer to it for details.
+    """
+    return _apply(obj, api.apply_operations, operations)
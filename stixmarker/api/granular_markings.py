@@ -2,10 +2,72 @@
 # See LICENSE.txt for complete terms.
 
 
+from stixmarker.api import trie
 from stixmarker.api import utils
 
 
-def get_markings(obj, selectors, inherited=False, descendants=False):
+# Below this many selectors a lookup without an index scans the markings once
+# per selector, which is cheaper than building a trie of them.
+TRIE_MIN_SELECTORS = 6
+
+
+def _scan(granular_markings, selector, inherited, descendants):
+    """
+    Return the markings of one ``selector`` by comparing it with every
+    marked selector, without building a trie.
+    """
+    prefix = selector + "."
+    results = set()
+
+    for granular_marking in granular_markings:
+        refs = utils.convert_to_list(granular_marking.get("marking_ref", []))
+        marked = utils.convert_to_list(granular_marking.get("selectors", []))
+
+        for other in marked:
+            # ``other`` is ``selector`` itself or one of its ancestors.
+            if prefix.startswith(other) and prefix[len(other)] == ".":
+                matched = inherited or len(other) == len(selector)
+            else:
+                matched = descendants and other.startswith(prefix)
+
+            if matched:
+                results.update(refs)
+                break
+
+    return results
+
+
+def _lookup(obj, selectors, inherited, descendants, index):
+    """Return the set of granular markings of ``selectors``."""
+    granular_markings = obj.get("granular_markings", [])
+
+    if not granular_markings:
+        return set()
+
+    results = set()
+
+    if index is not None:
+        compiled = index.trie
+    elif len(selectors) >= TRIE_MIN_SELECTORS:
+        compiled = trie.SelectorTrie(granular_markings)
+    else:
+        for user_selector in selectors:
+            results.update(
+                _scan(granular_markings, user_selector, inherited, descendants)
+            )
+
+        return results
+
+    for user_selector in selectors:
+        results.update(
+            compiled.get_markings(user_selector, inherited, descendants)
+        )
+
+    return results
+
+
+def get_markings(obj, selectors, inherited=False, descendants=False,
+                 index=None):
     """
     Get all markings associated to the field(s).
 
@@ -16,34 +78,21 @@ def get_markings(obj, selectors, inherited=False, descendants=False):
         inherited: If True, include markings inherited relative to the field(s).
         descendants: If True, include granular markings applied to any children
             relative to the field(s).
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls. Its trie is built once, each later lookup walks the depth
+            of its selectors.
 
     Returns:
         list: Marking IDs that matched the selectors expression.
 
     """
-    selectors = utils.fix_value(selectors)
-    utils.validate(obj, selectors)
+    selectors = utils.fix_selectors(selectors)
+    utils.validate(obj, selectors, index=index)
 
-    granular_markings = obj.get("granular_markings", [])
+    return list(_lookup(obj, selectors, inherited, descendants, index))
 
-    if not granular_markings:
-        return []
 
-    results = set()
-
-    for marking in granular_markings:
-        for user_selector in selectors:
-            for marking_selector in marking.get("selectors", []):
-                if any([(user_selector == marking_selector),  # Catch explicit selectors.
-                        (user_selector.startswith(marking_selector) and inherited),  # Catch inherited selectors.
-                        (marking_selector.startswith(user_selector) and descendants)]):  # Catch descendants selectors
-                    refs = marking.get("marking_ref", [])
-                    results.update([refs])
-
-    return list(results)
-
-
-def set_markings(obj, selectors, marking):
+def set_markings(obj, selectors, marking, index=None):
     """
     Removes all markings associated with selectors and appends a new granular
     marking. Refer to `clear_markings` and `add_markings` for details.
@@ -54,13 +103,23 @@ def set_markings(obj, selectors, marking):
             which the field(s) appear(s).
         marking: identifier or list of marking identifiers that apply to the
             field(s) selected by `selectors`.
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls.
 
     """
-    clear_markings(obj, selectors)
-    add_markings(obj, selectors, marking)
+    clear_markings(obj, selectors, index)
+    add_markings(obj, selectors, marking, index)
+
+
+def _markings(obj, index):
+    """Return the `utils.TLOGranularMarkings` edits go through."""
+    if index is None:
+        return utils.TLOGranularMarkings(obj)
 
+    return index.markings
 
-def remove_markings(obj, selectors, marking):
+
+def remove_markings(obj, selectors, marking, index=None):
     """
     Removes granular_marking from the granular_markings collection.
 
@@ -70,43 +129,32 @@ def remove_markings(obj, selectors, marking):
             which the field(s) appear(s).
         marking: identifier or list of marking identifiers that apply to the
             field(s) selected by `selectors`.
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls.
 
     Raises:
         AssertionError: If `selectors` or `marking` fail data validation. Also
             if markings to remove are not found on the provided TLO.
 
-    """
-    selectors = utils.fix_value(selectors)
-    utils.validate(obj, selectors, marking)
-
-    utils.expand_markings(obj)
+    Note:
+        Only the entries of the markings removed are changed. Without
+        ``index`` a call still reads their whole ``selectors`` lists, with
+        the same ``index`` for every call it costs the pairs removed.
 
-    granular_markings = obj.get("granular_markings")
+    """
+    selectors = utils.fix_selectors(selectors)
+    utils.validate(obj, selectors, marking, index)
 
-    if not granular_markings:
+    if not obj.get("granular_markings"):
         return
 
-    tlo = utils.build_granular_marking(
-        {"selectors": selectors, "marking_ref": marking}
-    )
-
-    remove = tlo.get("granular_markings", [])
-
-    if not any(marking in granular_markings for marking in remove):
+    if not _markings(obj, index).remove(selectors,
+                                        utils.convert_to_list(marking)):
         raise AssertionError("Unable to remove Granular Marking(s) from"
                              " internal collection. Marking(s) not found...")
 
-    obj["granular_markings"] = [
-        m for m in granular_markings if m not in remove
-    ]
 
-    utils.compress_markings(obj)
-
-    if not obj.get("granular_markings"):
-        obj.pop("granular_markings")
-
-
-def add_markings(obj, selectors, marking):
+def add_markings(obj, selectors, marking, index=None):
     """
     Appends a granular_marking to the granular_markings collection.
 
@@ -116,26 +164,25 @@ def add_markings(obj, selectors, marking):
             which the field(s) appear(s).
         marking: identifier or list of marking identifiers that apply to the
             field(s) selected by `selectors`.
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls.
 
     Raises:
         AssertionError: If `selectors` or `marking` fail data validation.
 
-    """
-    selectors = utils.fix_value(selectors)
-    utils.validate(obj, selectors, marking)
-
-    granular_marking = {"selectors": sorted(selectors), "marking_ref": marking}
-
-    if not obj.get("granular_markings"):
-        obj["granular_markings"] = list()
+    Note:
+        Only the entries of the markings added are changed. Without ``index``
+        a call still reads their whole ``selectors`` lists, with the same
+        ``index`` for every call it costs the pairs added.
 
-    obj["granular_markings"].append(granular_marking)
+    """
+    selectors = utils.fix_selectors(selectors)
+    utils.validate(obj, selectors, marking, index)
 
-    utils.expand_markings(obj)
-    utils.compress_markings(obj)
+    _markings(obj, index).add(selectors, utils.convert_to_list(marking))
 
 
-def clear_markings(obj, selectors):
+def clear_markings(obj, selectors, index=None):
     """
     Removes all granular_marking associated with the selectors.
 
@@ -143,51 +190,32 @@ def clear_markings(obj, selectors):
         obj: A TLO object.
         selectors: string or list of selectors strings relative to the TLO in
             which the field(s) appear(s).
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls.
 
     Raises:
         AssertionError: If `selectors` or `marking` fail data validation. Also
             if markings to remove are not found on the provided TLO.
 
-    """
-    selectors = utils.fix_value(selectors)
-    utils.validate(obj, selectors)
-
-    utils.expand_markings(obj)
+    Note:
+        Without ``index`` a call reads every entry to find the markings of
+        ``selectors``, with the same ``index`` for every call it costs the
+        pairs removed.
 
-    granular_markings = obj.get("granular_markings")
+    """
+    selectors = utils.fix_selectors(selectors)
+    utils.validate(obj, selectors, index=index)
 
-    if not granular_markings:
+    if not obj.get("granular_markings"):
         return
 
-    tlo = utils.build_granular_marking(
-        {"selectors": selectors, "marking_ref": ["N/A"]}
-    )
-
-    clear = tlo.get("granular_markings", [])
-
-    if not any(clear_selector in tlo_selectors.get("selectors", [])
-               for tlo_selectors in granular_markings
-               for clear_marking in clear
-               for clear_selector in clear_marking.get("selectors", [])
-               ):
+    if not _markings(obj, index).clear(selectors):
         raise AssertionError("Unable to clear Granular Marking(s) from"
                              " internal collection. Selector(s) not found...")
 
-    for granular_marking in granular_markings:
-        for s in selectors:
-            if s in granular_marking.get("selectors", []):
-                marking_refs = granular_marking.get("marking_ref")
-
-                if marking_refs:
-                    granular_marking["marking_ref"] = list()
-
-    utils.compress_markings(obj)
-
-    if not obj.get("granular_markings"):
-        obj.pop("granular_markings")
-
 
-def is_marked(obj, selectors, marking=None, inherited=False, descendants=False):
+def is_marked(obj, selectors, marking=None, inherited=False, descendants=False,
+              index=None):
     """
     Checks if field is marked by any marking or by specific marking(s).
 
@@ -200,6 +228,8 @@ def is_marked(obj, selectors, marking=None, inherited=False, descendants=False):
         inherited: If True, return markings inherited from the given selector.
         descendants: If True, return granular markings applied to any children
             of the given selector.
+        index: Optional `utils.SelectorIndex` of ``obj`` to reuse between
+            calls, see `get_markings`.
 
     Returns:
         bool: True if ``selectors`` is found on internal TLO collection.
@@ -210,31 +240,14 @@ def is_marked(obj, selectors, marking=None, inherited=False, descendants=False):
         IDs matches, True is returned.
 
     """
-    selectors = utils.fix_value(selectors)
+    selectors = utils.fix_selectors(selectors)
     marking = utils.fix_value(marking)
-    utils.validate(obj, selectors, marking)
-
-    granular_markings = obj.get("granular_markings", [])
-
-    marked = False
-    markings = set()
-
-    for granular_marking in granular_markings:
-        for user_selector in selectors:
-            for marking_selector in granular_marking.get("selectors", []):
-
-                if any([(user_selector == marking_selector),  # Catch explicit selectors.
-                        (user_selector.startswith(marking_selector) and inherited),  # Catch inherited selectors.
-                        (marking_selector.startswith(user_selector) and descendants)]):  # Catch descendants selectors
-                    marking_ref = granular_marking.get("marking_ref", "")
-
-                    if marking and any(x == marking_ref for x in marking):
-                        markings.update([marking_ref])
+    utils.validate(obj, selectors, marking, index)
 
-                    marked = True
+    markings = _lookup(obj, selectors, inherited, descendants, index)
 
     if marking:
         # All user-provided markings must be found.
         return markings.issuperset(set(marking))
 
-    return marked
+    return bool(markings)
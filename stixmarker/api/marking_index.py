@@ -0,0 +1,141 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+from stixmarker.api import events
+from stixmarker.api import object_markings
+from stixmarker.api import utils
+
+
+class MarkingIndex(object):
+    """
+    Inverted index from marking definition ID to the objects and fields it
+    is applied to, across a corpus of TLOs.
+
+    Each posting is an (object id, selector) pair, where the selector is None
+    for object level markings. While the index is tracking, TLOs changed
+    through `stixmarker.api` are re-indexed as the changes happen.
+
+    Args:
+        objects: TLOs to index. Each must have an ``id``.
+        track: If True, follow changes made through `stixmarker.api`.
+
+    Example:
+        >>> with MarkingIndex(tlos) as index:
+        >>>     api.add_markings(tlos[0], "description", "marking-definition--1")
+        >>>     index.lookup("marking-definition--1")
+        [('campaign--...', 'description')]
+
+    Note:
+        A tracking index is referenced by `events` until `close` is called.
+        Changes made to TLOs without `stixmarker.api` require calling `add`
+        again.
+
+    """
+
+    def __init__(self, objects=(), track=True):
+        self._postings = {}  # ref -> {object id: set of selectors}
+        self._indexed = {}  # object id -> list of (ref, selector)
+        self._tracking = False
+
+        for obj in objects:
+            self.add(obj)
+
+        if track:
+            events.subscribe(self._on_change)
+            self._tracking = True
+
+    def __len__(self):
+        return len(self._indexed)
+
+    def __contains__(self, object_id):
+        return object_id in self._indexed
+
+    def _on_change(self, obj):
+        if obj.get("id") in self._indexed:
+            self.add(obj)
+
+    def add(self, obj):
+        """Index ``obj``, replacing the postings it had before."""
+        object_id = obj.get("id")
+        assert object_id, "Unable to index a TLO without id..."
+
+        self.discard(object_id)
+        postings = []
+
+        for ref in object_markings.get_markings(obj):
+            postings.append((ref, None))
+
+        for granular_marking in obj.get("granular_markings", []):
+            refs = utils.convert_to_list(granular_marking.get("marking_ref", []))
+
+            for selector in utils.convert_to_list(granular_marking.get("selectors", [])):
+                for ref in refs:
+                    postings.append((ref, selector))
+
+        for ref, selector in postings:
+            self._postings.setdefault(ref, {}) \
+                .setdefault(object_id, set()).add(selector)
+
+        self._indexed[object_id] = postings
+
+    def discard(self, obj):
+        """Remove a TLO, given as object or object id, from the index."""
+        object_id = obj.get("id") if isinstance(obj, dict) else obj
+
+        for ref, selector in self._indexed.pop(object_id, ()):
+            by_object = self._postings.get(ref)
+
+            if by_object is None or object_id not in by_object:
+                continue
+
+            by_object.pop(object_id)
+
+            if not by_object:
+                del self._postings[ref]
+
+    def lookup(self, marking):
+        """
+        Return the (object id, selector) postings of ``marking``.
+
+        Args:
+            marking: A marking definition ID.
+
+        Returns:
+            list: Pairs sorted by object id. Object level markings have a
+                None selector and come first for each object.
+
+        """
+        by_object = self._postings.get(marking, {})
+
+        return [
+            (object_id, selector)
+            for object_id in sorted(by_object)
+            for selector in sorted(by_object[object_id],
+                                   key=lambda s: (s is not None, s))
+        ]
+
+    def objects(self, marking):
+        """Return the set of object ids carrying ``marking`` anywhere."""
+        return set(self._postings.get(marking, ()))
+
+    def selectors(self, marking, object_id):
+        """Return the selectors of ``object_id`` marked by ``marking``. None
+        stands for the object level marking."""
+        return set(self._postings.get(marking, {}).get(object_id, ()))
+
+    def markings(self):
+        """Return every marking definition ID in the index."""
+        return set(self._postings)
+
+    def close(self):
+        """Stop following changes made through `stixmarker.api`."""
+        if self._tracking:
+            events.unsubscribe(self._on_change)
+            self._tracking = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,116 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import collections
+import re
+
+try:
+    from functools import lru_cache
+except ImportError:  # Python 2
+    lru_cache = None
+
+
+# Number of distinct selector strings kept parsed.
+CACHE_SIZE = 4096
+
+_INDEX = re.compile(r"^\[(0|[1-9][0-9]*)\]$")
+
+
+class Selector(collections.namedtuple("Selector", ("text", "segments"))):
+    """
+    A selector parsed into its path segments. Selectors are immutable and
+    can be given to any `stixmarker.api` function in place of the selector
+    string.
+
+    Attributes:
+        text: The selector string.
+        segments: tuple of property names (str) and list indices (int).
+
+    Example:
+        >>> parse_selector("cybox.objects.[0].hashes.sha1").segments
+        ('cybox', 'objects', 0, 'hashes', 'sha1')
+
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.text
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Build a Selector from property names and list indices."""
+        segments = tuple(segments)
+        text = ".".join(
+            "[{0}]".format(s) if isinstance(s, int) else s for s in segments
+        )
+
+        return cls(text, segments)
+
+    def is_ancestor_of(self, other):
+        """Return True if ``other`` is a strict descendant of this selector."""
+        other = parse_selector(other)
+        depth = len(self.segments)
+
+        return len(other.segments) > depth and \
+            other.segments[:depth] == self.segments
+
+
+def _segment(token):
+    match = _INDEX.match(token)
+
+    if match:
+        return int(match.group(1))
+
+    return token
+
+
+def _parse(text):
+    return Selector(text, tuple(_segment(token) for token in text.split(".")))
+
+
+if lru_cache is not None:
+    _parse = lru_cache(maxsize=CACHE_SIZE)(_parse)
+else:
+    _parse_uncached = _parse
+    _cache = {}
+
+    def _parse(text):
+        try:
+            return _cache[text]
+        except KeyError:
+            if len(_cache) >= CACHE_SIZE:
+                _cache.clear()
+            result = _cache[text] = _parse_uncached(text)
+            return result
+
+
+def parse_selector(selector):
+    """
+    Return the `Selector` for ``selector``.
+
+    Parsed selectors are kept in a bounded least recently used cache, so a
+    selector string is parsed once no matter how many times it is used.
+
+    Args:
+        selector: A selector string or a `Selector`.
+
+    Note:
+        Only canonical list indices (``[0]``, ``[12]``) are parsed as ints.
+        Anything else, like ``[-2]`` or ``[01]``, is kept as a property name
+        and will not match a list item.
+
+    """
+    if isinstance(selector, Selector):
+        return selector
+
+    return _parse(selector)
+
+
+def selector_text(selector):
+    """Return the selector string of ``selector``, a string or `Selector`."""
+    if isinstance(selector, Selector):
+        return selector.text
+
+    return selector
@@ -0,0 +1,248 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import collections
+import functools
+import threading
+import timeit
+
+from stixmarker import api
+from stixmarker.api import utils
+
+
+class Stats(collections.namedtuple("Stats", ("calls", "time", "size"))):
+    """
+    Counters of one instrumented function.
+
+    Attributes:
+        calls: Number of calls.
+        time: Cumulative time spent in the function, in seconds.
+        size: Cumulative work done: selectors for validation and the api
+            entry points, nodes walked for traversals, granular markings
+            after expand/compress.
+
+    """
+
+    __slots__ = ()
+
+
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {}
+_originals = {}
+
+
+def _count(data):
+    data = utils.convert_to_list(data)
+    return len(data) if data else 0
+
+
+def _selectors(args, kwargs, result):
+    if len(args) > 1:
+        return _count(args[1])
+
+    return _count(kwargs.get("selectors"))
+
+
+def _operations(args, kwargs, result):
+    operations = args[1] if len(args) > 1 else kwargs.get("operations")
+    return len(operations) if hasattr(operations, "__len__") else 0
+
+
+def _granular_markings(args, kwargs, result):
+    tlo = args[0] if args else kwargs["tlo"]
+    return len(tlo.get("granular_markings") or [])
+
+
+def _none(args, kwargs, result):
+    return 0
+
+
+# (module, function name, size function, is a generator)
+_TARGETS = (
+    (utils, "validate", _selectors, False),
+    (utils, "iterpath", None, True),
+    (utils, "iterselectors", None, True),
+    (utils, "expand_markings", _granular_markings, False),
+    (utils, "compress_markings", _granular_markings, False),
+    (api, "get_markings", _selectors, False),
+    (api, "set_markings", _selectors, False),
+    (api, "remove_markings", _selectors, False),
+    (api, "add_markings", _selectors, False),
+    (api, "clear_markings", _selectors, False),
+    (api, "is_marked", _selectors, False),
+    (api, "apply_operations", _operations, False),
+    (api, "redact", _none, False),
+)
+
+
+def _record(name, elapsed, size):
+    with _lock:
+        stats = _stats.get(name)
+
+        if stats is None:
+            _stats[name] = Stats(1, elapsed, size)
+        else:
+            _stats[name] = Stats(stats.calls + 1, stats.time + elapsed,
+                                 stats.size + size)
+
+
+def _nested(name):
+    """Return True if ``name`` is already running in this thread."""
+    active = getattr(_local, "active", None)
+
+    if active is None:
+        active = _local.active = set()
+
+    return name in active
+
+
+def _wrap(name, function, size):
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _nested(name):
+            return function(*args, **kwargs)
+
+        _local.active.add(name)
+        start = timeit.default_timer()
+
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            _local.active.discard(name)
+
+        elapsed = timeit.default_timer() - start
+        _record(name, elapsed, size(args, kwargs, result))
+
+        return result
+
+    return wrapper
+
+
+def _wrap_generator(name, function):
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _nested(name):
+            for item in function(*args, **kwargs):
+                yield item
+            return
+
+        items = iter(function(*args, **kwargs))
+        elapsed = 0.0
+        count = 0
+
+        # Only time spent producing items is counted, not the caller's.
+        try:
+            while True:
+                _local.active.add(name)
+                start = timeit.default_timer()
+
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += timeit.default_timer() - start
+                    _local.active.discard(name)
+
+                count += 1
+                yield item
+        finally:
+            _record(name, elapsed, count)
+
+    return wrapper
+
+
+def is_enabled():
+    """Return True if instrumentation is installed."""
+    return bool(_originals)
+
+
+def enable():
+    """
+    Install the instrumentation around `utils.validate`, `utils.iterpath`,
+    `utils.iterselectors`, `utils.expand_markings`, `utils.compress_markings`
+    and the `stixmarker.api` entry points.
+
+    Note:
+        Instrumentation replaces the module attributes while enabled, so
+        disabled profiling costs nothing. Only this process is measured,
+        calls made by `stixmarker.api.bulk` process pool workers are not.
+
+    """
+    with _lock:
+        if _originals:
+            return
+
+        for module, name, size, generator in _TARGETS:
+            function = getattr(module, name)
+            key = "{0}.{1}".format(module.__name__.rsplit(".", 1)[-1], name)
+            _originals[(module, name)] = function
+
+            if generator:
+                setattr(module, name, _wrap_generator(key, function))
+            else:
+                setattr(module, name, _wrap(key, function, size))
+
+
+def disable():
+    """Remove the instrumentation. Counters are kept until `reset`."""
+    with _lock:
+        for (module, name), function in _originals.items():
+            setattr(module, name, function)
+
+        _originals.clear()
+
+
+def reset():
+    """Zero every counter."""
+    with _lock:
+        _stats.clear()
+
+
+def get_stats():
+    """
+    Return the counters recorded so far.
+
+    Returns:
+        dict: `Stats` keyed on the instrumented function, as
+            ``"utils.validate"`` or ``"api.get_markings"``.
+
+    """
+    with _lock:
+        return dict(_stats)
+
+
+class profile(object):
+    """
+    Context manager recording the counters of the code it wraps.
+
+    Counters are reset on entry and instrumentation is left in the state it
+    was found in on exit.
+
+    Example:
+        >>> with profile() as result:
+        >>>     api.add_markings(tlo, "description", "marking-definition--1")
+        >>> result.stats["utils.validate"].calls
+        1
+
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self._was_enabled = False
+
+    def __enter__(self):
+        self._was_enabled = is_enabled()
+        reset()
+        enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats = get_stats()
+
+        if not self._was_enabled:
+            disable()
@@ -0,0 +1,139 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import copy
+
+import six
+
+from stixmarker.api import object_markings
+from stixmarker.api import parsing
+from stixmarker.api import trie
+from stixmarker.api import utils
+
+
+# Properties holding the markings themselves, never redacted as fields.
+_MARKING_PROPERTIES = ("object_marking_refs", "granular_markings")
+
+_DROP = object()
+
+
+def _policy(allowed, denied):
+    allowed = None if allowed is None else set(utils.convert_to_list(allowed))
+    denied = set(utils.convert_to_list(denied) or [])
+
+    def accept(refs):
+        for ref in refs:
+            if ref in denied or (allowed is not None and ref not in allowed):
+                return False
+
+        return True
+
+    return accept
+
+
+def _redact(value, node, path, in_list, accept, kept):
+    """
+    Return the filtered copy of ``value`` found at ``path``, or _DROP.
+
+    ``node`` is the trie node of ``path``, None when nothing is marked at or
+    below it. Ancestors have already been accepted, so only the markings of
+    ``path`` itself are checked.
+    """
+    if node is not None and node.refs and not accept(node.refs):
+        return _DROP
+
+    if node is None:
+        result = copy.deepcopy(value)
+    elif isinstance(value, dict):
+        result = {}
+
+        for key, child in six.iteritems(value):
+            if not path and key in _MARKING_PROPERTIES:
+                continue
+
+            child = _redact(child, node.children.get(key), path + (key,),
+                            False, accept, kept)
+
+            if child is not _DROP:
+                result[key] = child
+
+        # A container emptied by redaction would leak that it held fields.
+        if value and not result:
+            return _DROP
+    elif isinstance(value, list) and not in_list:
+        result = []
+
+        for position, child in enumerate(value):
+            child = _redact(child, node.children.get(position),
+                            path + (len(result),), True, accept, kept)
+
+            if child is not _DROP:
+                result.append(child)
+
+        if value and not result:
+            return _DROP
+    else:
+        # Leaf, or a list inside a list which selectors cannot address.
+        result = copy.deepcopy(value)
+
+    if node is not None and node.refs and result:
+        kept.append((path, node.refs))
+
+    return result
+
+
+def redact(obj, allowed=None, denied=None):
+    """
+    Return a copy of a TLO without the fields carrying unwanted markings.
+
+    A field is removed when any of its markings, including the ones it
+    inherits from its ancestors, is in ``denied`` or, if ``allowed`` is given,
+    is not in ``allowed``. Unmarked fields are kept. The TLO is walked once
+    and each field is checked only against its own markings, so the cost is
+    linear in the size of the TLO.
+
+    Args:
+        obj: A TLO object.
+        allowed: identifier or list of marking identifiers that may be shared.
+            None allows every marking not in ``denied``.
+        denied: identifier or list of marking identifiers that may not be
+            shared.
+
+    Returns:
+        dict: The redacted copy of ``obj``, with ``granular_markings`` rewritten
+            to the fields that were kept. None if the object level markings
+            themselves are not accepted.
+
+    Note:
+        ``obj`` is not modified. List items that are removed shift the
+        following items down, their selectors are renumbered in the copy.
+        Lists and objects that end up empty after redaction are removed too.
+
+    """
+    accept = _policy(allowed, denied)
+
+    if not accept(object_markings.get_markings(obj)):
+        return None
+
+    kept = []
+    markings = obj.get("granular_markings") or []
+    root = trie.SelectorTrie(markings).root if markings else None
+    result = _redact(obj, root, (), False, accept, kept)
+
+    if result is _DROP:
+        result = {}
+
+    if "object_marking_refs" in obj:
+        result["object_marking_refs"] = copy.deepcopy(obj["object_marking_refs"])
+
+    if kept:
+        granular_markings = utils.GranularMarkings()
+
+        for path, refs in kept:
+            selector = parsing.Selector.from_segments(path).text
+            granular_markings.add([selector], refs)
+
+        result["granular_markings"] = granular_markings.to_list()
+
+    return result
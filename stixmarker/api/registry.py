@@ -0,0 +1,189 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import functools
+
+from stixmarker.api import object_markings
+from stixmarker.api import trie
+from stixmarker.api import utils
+
+
+class MarkingRegistry(object):
+    """
+    Assigns a bit position to each marking definition, so a set of markings
+    is a single integer mask and set algebra is a single integer operation.
+
+    Args:
+        marking_definitions: Marking IDs, or marking definition objects, to
+            register up front. Registering the known definitions first keeps
+            their bits stable across registries.
+
+    Example:
+        >>> registry = MarkingRegistry(["marking-definition--1"])
+        >>> markings = registry.compile(tlo)
+        >>> markings.is_marked("description", "marking-definition--1")
+        True
+
+    """
+
+    def __init__(self, marking_definitions=()):
+        self._bits = {}
+        self._refs = []
+
+        for marking_definition in marking_definitions:
+            if isinstance(marking_definition, dict):
+                marking_definition = marking_definition["id"]
+
+            self.register(marking_definition)
+
+    def __len__(self):
+        return len(self._refs)
+
+    def __contains__(self, ref):
+        return ref in self._bits
+
+    def register(self, ref):
+        """Return the bit of ``ref``, assigning the next one if needed."""
+        try:
+            return self._bits[ref]
+        except KeyError:
+            bit = self._bits[ref] = 1 << len(self._refs)
+            self._refs.append(ref)
+            return bit
+
+    def mask(self, refs, register=False):
+        """
+        Return the mask of ``refs``.
+
+        Args:
+            refs: identifier or list of marking identifiers.
+            register: If True, register unknown refs. Otherwise they are left
+                out of the mask.
+
+        """
+        mask = 0
+
+        for ref in utils.convert_to_list(refs) or []:
+            if register:
+                mask |= self.register(ref)
+            else:
+                mask |= self._bits.get(ref, 0)
+
+        return mask
+
+    def refs(self, mask):
+        """Return the marking IDs set in ``mask``, in registration order."""
+        refs = []
+
+        while mask:
+            low = mask & -mask
+            refs.append(self._refs[low.bit_length() - 1])
+            mask ^= low
+
+        return refs
+
+    def compile(self, obj):
+        """Return the `CompiledMarkings` of ``obj``, registering its refs."""
+        return CompiledMarkings(self, obj)
+
+    def get_markings(self, obj, selectors, inherited=False, descendants=False):
+        """See `stixmarker.api.get_markings`."""
+        return self.compile(obj).get_markings(selectors, inherited, descendants)
+
+    def is_marked(self, obj, selectors, marking=None, inherited=False,
+                  descendants=False):
+        """See `stixmarker.api.is_marked`."""
+        return self.compile(obj).is_marked(selectors, marking, inherited,
+                                           descendants)
+
+
+class CompiledMarkings(object):
+    """
+    The markings of one TLO as masks of a `MarkingRegistry`, the object
+    level ones in one mask and the granular ones in a trie keyed on selector
+    path segments.
+
+    `get_markings` and `is_marked` have the semantics of their counterparts
+    in `stixmarker.api` and validate their arguments the same way. Compile a
+    TLO once to query it many times.
+
+    Args:
+        registry: The `MarkingRegistry` assigning the bits.
+        obj: A TLO object.
+
+    Note:
+        The TLO is read once, compile it again after its markings change.
+
+    """
+
+    def __init__(self, registry, obj):
+        self.registry = registry
+        self.obj = obj
+        self.object_mask = registry.mask(object_markings.get_markings(obj),
+                                         register=True)
+        self._trie = trie.SelectorTrie(
+            obj.get("granular_markings"),
+            payload=functools.partial(registry.mask, register=True))
+
+    def granular_mask(self, selectors, inherited=False, descendants=False):
+        """Return the mask of the granular markings of ``selectors``."""
+        mask = 0
+
+        for selector in selectors:
+            mask |= self._trie.lookup(selector, inherited, descendants)[1]
+
+        return mask
+
+    def get_markings(self, selectors, inherited=False, descendants=False):
+        """See `stixmarker.api.get_markings`."""
+        if selectors is None:
+            return object_markings.get_markings(self.obj)
+
+        selectors = utils.fix_selectors(selectors)
+        utils.validate(self.obj, selectors)
+
+        mask = self.granular_mask(selectors, inherited, descendants)
+
+        if inherited:
+            mask |= self.object_mask
+
+        return self.registry.refs(mask)
+
+    def is_marked(self, selectors, marking=None, inherited=False,
+                  descendants=False):
+        """See `stixmarker.api.is_marked`."""
+        marking = utils.fix_value(marking)
+
+        if selectors is None:
+            if marking:
+                return bool(self.object_mask & self.registry.mask(marking))
+
+            return bool(self.object_mask)
+
+        selectors = utils.fix_selectors(selectors)
+        utils.validate(self.obj, selectors, marking)
+
+        exact = 0
+        mask = 0
+
+        for selector in selectors:
+            selector_exact, selector_mask = \
+                self._trie.lookup(selector, inherited, descendants)
+            exact |= selector_exact
+            mask |= selector_mask
+
+        if marking:
+            wanted = self.registry.mask(marking)
+            # All user-provided markings must be found, unknown ones never are.
+            result = all(ref in self.registry for ref in marking) and \
+                mask & wanted == wanted
+        else:
+            result = bool(mask)
+
+        if inherited:
+            # Same as `stixmarker.api.is_marked`: any marking on the selector
+            # itself or on the object also counts.
+            result = result or bool(exact) or bool(self.object_mask)
+
+        return result
@@ -0,0 +1,198 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import six
+
+from stixmarker.api import parsing
+
+
+class _Node(object):
+
+    __slots__ = ("children", "refs", "below", "stale")
+
+    def __init__(self, empty):
+        self.children = {}
+        self.refs = empty()  # Markings applied to this exact selector.
+        self.below = empty()  # Markings applied to any descendant selector.
+        self.stale = False  # True if ``below`` may hold removed markings.
+
+
+def split_selector(selector):
+    """
+    Split ``selector`` into its path segments, list indices as ints.
+
+    Example:
+        >>> split_selector("cybox.objects.[0].hashes")
+        ('cybox', 'objects', 0, 'hashes')
+
+    """
+    return parsing.parse_selector(selector).segments
+
+
+class SelectorTrie(object):
+    """
+    Granular markings of a TLO compiled into a trie keyed on selector path
+    segments.
+
+    Exact, inherited (ancestor) and descendant lookups walk at most the depth
+    of the queried selector. Every node keeps the markings found below it, so
+    descendant lookups do not visit the subtree.
+
+    Markings are held as sets of marking IDs by default. Any other payload
+    combined with ``|``, ``&`` and ``^`` works the same way, e.g. the integer
+    masks of a `stixmarker.api.registry.MarkingRegistry`.
+
+    Args:
+        granular_markings: The ``granular_markings`` collection of a TLO.
+        payload: Callable turning a list of marking IDs into the payload
+            stored in the nodes. ``payload([])`` is the empty payload.
+
+    Note:
+        Segments are compared whole, ``description_x`` is neither an ancestor
+        nor a descendant of ``description``.
+
+    """
+
+    def __init__(self, granular_markings=None, payload=set):
+        self._payload = payload
+        self._root = _Node(self._empty)
+
+        for granular_marking in granular_markings or []:
+            refs = granular_marking.get("marking_ref", [])
+            selectors = granular_marking.get("selectors", [])
+
+            if isinstance(refs, (six.text_type, six.binary_type)):
+                refs = [refs]
+
+            if isinstance(selectors, (six.text_type, six.binary_type)):
+                selectors = [selectors]
+
+            value = payload(refs)
+
+            for selector in selectors:
+                self._insert(selector, value)
+
+    def _empty(self):
+        return self._payload([])
+
+    @property
+    def root(self):
+        """
+        The node of the empty path. Every node has ``children``, keyed on
+        path segments, ``refs``, the markings applied to its exact selector,
+        and ``below``, the markings applied to any descendant selector.
+
+        Note:
+            Nodes belong to the trie, read them but do not modify them. After
+            `remove`, ``below`` is refreshed by the next descendants lookup,
+            until then it may still hold the removed markings.
+
+        """
+        return self._root
+
+    def insert(self, selector, refs):
+        """Record that the marking IDs ``refs`` apply to ``selector``."""
+        self._insert(selector, self._payload(refs))
+
+    def _insert(self, selector, value):
+        node = self._root
+
+        for segment in split_selector(selector):
+            node.below |= value
+            child = node.children.get(segment)
+
+            if child is None:
+                child = node.children[segment] = _Node(self._empty)
+
+            node = child
+
+        node.refs |= value
+
+    def remove(self, selector, refs):
+        """
+        Record that the marking IDs ``refs`` no longer apply to
+        ``selector``.
+
+        The ``below`` markings of the ancestors are only marked stale and
+        recomputed from their children by the next descendants lookup that
+        needs them, so removing costs the depth of ``selector``.
+        """
+        value = self._payload(refs)
+        segments = split_selector(selector)
+        nodes = [self._root]
+
+        for segment in segments:
+            node = nodes[-1].children.get(segment)
+
+            if node is None:
+                return
+
+            nodes.append(node)
+
+        target = nodes.pop()
+        target.refs ^= target.refs & value
+
+        for node in nodes:
+            node.stale = True
+
+    def _below(self, node):
+        if node.stale:
+            below = self._empty()
+
+            for child in six.itervalues(node.children):
+                below |= child.refs
+                below |= self._below(child)
+
+            node.below = below
+            node.stale = False
+
+        return node.below
+
+    def lookup(self, selector, inherited=False, descendants=False):
+        """
+        Look ``selector`` up, see `get_markings`.
+
+        Returns:
+            tuple: The payload of the markings applied to ``selector`` itself,
+                and the payload of every marking matched. The first one
+                belongs to the trie and must not be modified.
+
+        """
+        node = self._root
+        result = self._empty()
+
+        for segment in split_selector(selector):
+            node = node.children.get(segment)
+
+            if node is None:
+                return self._empty(), result
+
+            if inherited:
+                result |= node.refs
+
+        result |= node.refs
+
+        if descendants:
+            result |= self._below(node)
+
+        return node.refs, result
+
+    def get_markings(self, selector, inherited=False, descendants=False):
+        """
+        Get the markings applied to ``selector``.
+
+        Args:
+            selector: A selector string or `parsing.Selector`.
+            inherited: If True, include markings applied to any ancestor.
+            descendants: If True, include markings applied to any descendant.
+
+        Returns:
+            set: Marking IDs that matched, or the payload combining them.
+
+        """
+        return self.lookup(selector, inherited, descendants)[1]
+
+    def is_marked(self, selector, inherited=False, descendants=False):
+        """Return True if ``selector`` carries any marking."""
+        return bool(self.get_markings(selector, inherited, descendants))
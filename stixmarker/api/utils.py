@@ -2,24 +2,179 @@
 # See LICENSE.txt for complete terms.
 
 
+import bisect
 import collections
 
 import six
 
+from stixmarker.api import parsing
+from stixmarker.api import trie
 
-def evaluate_expression(obj, selector):
 
-    for items, value in iterpath(obj):
-        path = ".".join(items)
+class SelectorIndex(object):
+    """
+    Lookup table mapping every selector of a TLO to the value it points to.
+
+    The table is built lazily with a single walk over ``obj`` and then shared
+    by every lookup, so validating many selectors against the same TLO costs
+    one traversal instead of one per selector.
+
+    The reverse table, from the identity of each value to its selectors, is
+    built from the same walk on the first `get_selector` call, so finding
+    where many values live costs a dictionary lookup each.
+
+    The index also holds the `TLOGranularMarkings` of the TLO, see
+    `markings`, so marking edits made through the same index pay only for the
+    pairs they change, and its `trie.SelectorTrie`, see `trie`, so marking
+    lookups made through it walk the depth of their selectors.
+
+    Args:
+        obj: A TLO object.
+
+    Note:
+        The index does not observe ``obj``. After the TLO is modified call
+        `invalidate` (or build a new index) so the next lookup walks the
+        updated object. Marking edits made by `stixmarker.api` functions
+        given the index are not modifications in that sense.
 
-        if path == selector and value:
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+        self._table = None
+        self._by_id = None
+        self._markings = None
+        self._trie = None
+
+    @property
+    def table(self):
+        """dict: Selector strings mapped to the value they point to."""
+        if self._table is None:
+            self._table = _build_table(self.obj)
+        return self._table
+
+    @property
+    def by_id(self):
+        """dict: id() of every value mapped to (selector, value) pairs."""
+        if self._by_id is None:
+            by_id = {}
+
+            for path, value in six.iteritems(self.table):
+                by_id.setdefault(id(value), []).append((path, value))
+
+            self._by_id = by_id
+        return self._by_id
+
+    @property
+    def markings(self):
+        """TLOGranularMarkings: The granular markings of the TLO, edited in
+        place by the `stixmarker.api` mutators given this index."""
+        if self._markings is None:
+            self._markings = TLOGranularMarkings(self.obj)
+            self._markings.trie = self._trie
+        return self._markings
+
+    @property
+    def trie(self):
+        """trie.SelectorTrie: The granular markings of the TLO, kept in step
+        with the edits made through `markings`."""
+        if self._trie is None:
+            self._trie = trie.SelectorTrie(self.obj.get("granular_markings"))
+
+            if self._markings is not None:
+                self._markings.trie = self._trie
+        return self._trie
+
+    def invalidate(self):
+        """Discard the tables, they will be rebuilt on next lookup."""
+        self._table = None
+        self._by_id = None
+        self._markings = None
+        self._trie = None
+
+    def evaluate(self, selector):
+        """Return a list with the value ``selector`` points to, if any."""
+        value = self.table.get(parsing.selector_text(selector))
+
+        if value:
             return [value]
 
+        return []
+
+    def get_selector(self, prop):
+        """Return the selectors pointing to ``prop``. See `get_selector`."""
+        # The identity check guards against ids reused by dead objects.
+        return [path for path, value in self.by_id.get(id(prop), ())
+                if value is prop]
+
+    def get_selectors(self, props):
+        """Return the selectors of each of ``props``. See `get_selectors`."""
+        return [self.get_selector(prop) for prop in props]
+
+
+def _build_table(obj):
+    return dict(iterselectors(obj))
+
+
+def resolve_selector(obj, selector):
+    """
+    Follow ``selector`` straight into ``obj``, one dictionary or list lookup
+    per segment, and return a list with the value found, if any.
+
+    The paths that resolve are the same ones `iterpath` walks: list indices
+    apply to lists held by a dictionary property, not to lists nested
+    directly in lists.
+
+    Args:
+        obj: A TLO object.
+        selector: A selector string or `parsing.Selector`.
+
+    Returns:
+        list: The value ``selector`` points to, empty if it does not resolve
+            or the value is empty.
+
+    """
+    if not isinstance(selector, (six.text_type, six.binary_type,
+                                 parsing.Selector)):
+        return []
+
+    value = obj
+    in_list = False
+
+    for segment in parsing.parse_selector(selector).segments:
+        if isinstance(value, dict):
+            if isinstance(segment, int):
+                segment = _index_token(segment)
+
+            if segment not in value:
+                return []
+
+            value = value[segment]
+            in_list = False
+
+        elif isinstance(value, list) and isinstance(segment, int) \
+                and not in_list and segment < len(value):
+            value = value[segment]
+            in_list = True
+
+        else:
+            return []
+
+    if value:
+        return [value]
+
     return []
 
 
-def validate_selector(obj, selector):
-    results = list(evaluate_expression(obj, selector))
+def evaluate_expression(obj, selector, index=None):
+    if index is None:
+        return resolve_selector(obj, selector)
+
+    return index.evaluate(selector)
+
+
+def validate_selector(obj, selector, index=None):
+    results = list(evaluate_expression(obj, selector, index))
 
     if len(results) >= 1:
         return True
@@ -44,13 +199,13 @@ def validate_markings(marking):
         return False
 
 
-def validate(obj, selectors=None, marking=None):
+def validate(obj, selectors=None, marking=None, index=None):
 
     if selectors is not None:
         assert selectors
 
         for s in selectors:
-            assert validate_selector(obj, s)
+            assert validate_selector(obj, s, index)
 
     if marking is not None:
         assert validate_markings(marking)
@@ -70,6 +225,16 @@ def fix_value(data):
     return data
 
 
+def fix_selectors(selectors):
+    """Like `fix_value`, also turning `parsing.Selector` into strings."""
+    selectors = convert_to_list(selectors)
+
+    if selectors is not None:
+        selectors = [parsing.selector_text(s) for s in selectors]
+
+    return selectors
+
+
 def _fix_markings(markings):
 
     for granular_marking in markings:
@@ -149,7 +314,337 @@ def build_granular_marking(granular_marking):
     return tlo
 
 
-def iterpath(obj, path=None):
+def _is_compressed(granular_markings):
+    refs = set()
+
+    for granular_marking in granular_markings:
+        ref = granular_marking.get("marking_ref")
+
+        if not isinstance(ref, (six.text_type, six.binary_type)) or \
+                ref in refs or \
+                not isinstance(granular_marking.get("selectors"), list) or \
+                not granular_marking["selectors"]:
+            return False
+
+        refs.add(ref)
+
+    return True
+
+
+def index_markings(tlo):
+    """
+    Map each marking_ref of ``tlo`` to its entry in ``granular_markings``.
+
+    The collection is compressed first if it holds more than one entry per
+    marking_ref, list valued marking_refs or empty entries. Entries can then
+    be edited in place without expanding the whole collection.
+
+    Args:
+        tlo: A TLO object.
+
+    Returns:
+        OrderedDict: marking_ref mapped to its granular marking entry, in
+            collection order.
+
+    """
+    granular_markings = tlo.get("granular_markings") or []
+
+    if not _is_compressed(granular_markings):
+        expand_markings(tlo)
+        compress_markings(tlo)
+        granular_markings = tlo.get("granular_markings") or []
+
+    return collections.OrderedDict(
+        (granular_marking["marking_ref"], granular_marking)
+        for granular_marking in granular_markings
+    )
+
+
+class GranularMarkings(object):
+    """
+    Granular markings held as marking_ref -> set of selectors, with the
+    reverse selector -> set of marking_ref map.
+
+    Adding, removing or clearing markings costs time proportional to the
+    number of (selector, marking_ref) pairs affected, regardless of how many
+    markings are held. Use `to_list` to get the compressed
+    ``granular_markings`` collection back.
+
+    Args:
+        granular_markings: A ``granular_markings`` collection to start from.
+
+    """
+
+    def __init__(self, granular_markings=None):
+        self._by_ref = collections.OrderedDict()
+        self._by_selector = {}
+
+        for granular_marking in granular_markings or []:
+            self.add(convert_to_list(granular_marking.get("selectors", [])),
+                     convert_to_list(granular_marking.get("marking_ref", [])))
+
+    def __len__(self):
+        return sum(len(selectors) for selectors in six.itervalues(self._by_ref))
+
+    def __bool__(self):
+        return bool(self._by_ref)
+
+    __nonzero__ = __bool__
+
+    def __contains__(self, pair):
+        selector, ref = pair
+        return selector in self._by_ref.get(ref, ())
+
+    def has_selector(self, selector):
+        """Return True if any marking applies to ``selector``."""
+        return selector in self._by_selector
+
+    def refs(self, selector):
+        """Return the set of marking_refs applied to ``selector``."""
+        return set(self._by_selector.get(selector, ()))
+
+    def add(self, selectors, refs):
+        """Apply every ref of ``refs`` to every selector of ``selectors``."""
+        for ref in refs:
+            by_ref = self._by_ref.get(ref)
+
+            if by_ref is None:
+                by_ref = self._by_ref[ref] = set()
+
+            by_ref.update(selectors)
+
+            for selector in selectors:
+                self._by_selector.setdefault(selector, set()).add(ref)
+
+    def discard(self, selector, ref):
+        """Remove one (selector, marking_ref) pair, if present."""
+        by_ref = self._by_ref.get(ref)
+
+        if by_ref is None or selector not in by_ref:
+            return False
+
+        by_ref.discard(selector)
+        if not by_ref:
+            del self._by_ref[ref]
+
+        by_selector = self._by_selector[selector]
+        by_selector.discard(ref)
+        if not by_selector:
+            del self._by_selector[selector]
+
+        return True
+
+    def remove(self, selectors, refs):
+        """Remove the given pairs. Returns the number of pairs removed."""
+        return sum(self.discard(selector, ref)
+                   for selector in selectors for ref in refs)
+
+    def clear(self, selectors):
+        """Remove every marking of ``selectors``. Returns pairs removed."""
+        return sum(self.discard(selector, ref)
+                   for selector in selectors
+                   for ref in list(self._by_selector.get(selector, ())))
+
+    def to_list(self):
+        """Return the compressed ``granular_markings`` collection."""
+        return [
+            {"selectors": sorted(selectors), "marking_ref": ref}
+            for ref, selectors in six.iteritems(self._by_ref)
+        ]
+
+
+class TLOGranularMarkings(GranularMarkings):
+    """
+    The ``granular_markings`` collection of a TLO as a `GranularMarkings`,
+    with every edit written through to the TLO.
+
+    The collection is compressed once, see `index_markings`. An edit then
+    only changes the entries of the marking_refs it touches: selectors are
+    inserted into, or deleted from, the sorted ``selectors`` list of the
+    entry by bisection, an entry is appended for a new marking_ref and
+    removed with its last selector. The selector set of a marking_ref is
+    built when the marking_ref is first edited, and the selector ->
+    marking_ref map when `clear` first needs it. An instance kept between
+    edits, like `SelectorIndex.markings`, so costs the pairs each edit
+    changes.
+
+    Args:
+        tlo: A TLO object.
+
+    Attributes:
+        trie: None, or a `trie.SelectorTrie` of ``tlo`` which every edit is
+            applied to as well.
+
+    Note:
+        The instance does not observe ``tlo``, build a new one after its
+        ``granular_markings`` are changed by other means.
+
+    """
+
+    def __init__(self, tlo):
+        super(TLOGranularMarkings, self).__init__()
+        self.tlo = tlo
+        self.trie = None
+        self._entries = index_markings(tlo)
+        self._by_ref = {}
+        self._by_selector = None
+
+    def _selectors(self, ref):
+        """Return the selector set of ``ref``, None if it has no entry."""
+        selectors = self._by_ref.get(ref)
+
+        if selectors is None:
+            entry = self._entries.get(ref)
+
+            if entry is None:
+                return None
+
+            selectors = self._by_ref[ref] = set(entry["selectors"])
+
+            # Entries are kept sorted and without duplicates for bisection.
+            if len(selectors) == len(entry["selectors"]):
+                entry["selectors"].sort()
+            else:
+                entry["selectors"] = sorted(selectors)
+
+        return selectors
+
+    def _selector_map(self):
+        if self._by_selector is None:
+            by_selector = {}
+
+            for ref in self._entries:
+                for selector in self._selectors(ref):
+                    by_selector.setdefault(selector, set()).add(ref)
+
+            self._by_selector = by_selector
+        return self._by_selector
+
+    def __len__(self):
+        return sum(len(self._selectors(ref)) for ref in self._entries)
+
+    def __bool__(self):
+        return bool(self._entries)
+
+    __nonzero__ = __bool__
+
+    def __contains__(self, pair):
+        selector, ref = pair
+        return selector in (self._selectors(ref) or ())
+
+    def has_selector(self, selector):
+        """Return True if any marking applies to ``selector``."""
+        return selector in self._selector_map()
+
+    def refs(self, selector):
+        """Return the set of marking_refs applied to ``selector``."""
+        return set(self._selector_map().get(selector, ()))
+
+    def add(self, selectors, refs):
+        """Apply every ref of ``refs`` to every selector of ``selectors``."""
+        for ref in refs:
+            current = self._selectors(ref)
+
+            if current is None:
+                added = self._by_ref[ref] = set(selectors)
+                entry = self._entries[ref] = \
+                    {"selectors": sorted(added), "marking_ref": ref}
+
+                if not self.tlo.get("granular_markings"):
+                    self.tlo["granular_markings"] = []
+                self.tlo["granular_markings"].append(entry)
+            else:
+                added = set(selectors) - current
+                current.update(added)
+
+                for selector in added:
+                    bisect.insort(self._entries[ref]["selectors"], selector)
+
+            if self._by_selector is not None:
+                for selector in added:
+                    self._by_selector.setdefault(selector, set()).add(ref)
+
+            if self.trie is not None:
+                for selector in added:
+                    self.trie.insert(selector, [ref])
+
+    def discard(self, selector, ref):
+        """Remove one (selector, marking_ref) pair, if present."""
+        current = self._selectors(ref)
+
+        if current is None or selector not in current:
+            return False
+
+        current.discard(selector)
+        entry = self._entries[ref]
+        del entry["selectors"][bisect.bisect_left(entry["selectors"], selector)]
+
+        if not current:
+            self._drop(ref)
+
+        if self._by_selector is not None:
+            by_selector = self._by_selector[selector]
+            by_selector.discard(ref)
+            if not by_selector:
+                del self._by_selector[selector]
+
+        if self.trie is not None:
+            self.trie.remove(selector, [ref])
+
+        return True
+
+    def _drop(self, ref):
+        """Remove the entry of ``ref``, then the collection if empty."""
+        entry = self._entries.pop(ref)
+        del self._by_ref[ref]
+        granular_markings = self.tlo["granular_markings"]
+
+        for position, candidate in enumerate(granular_markings):
+            if candidate is entry:
+                del granular_markings[position]
+                break
+
+        if not granular_markings:
+            self.tlo.pop("granular_markings")
+
+    def clear(self, selectors):
+        """Remove every marking of ``selectors``. Returns pairs removed."""
+        by_selector = self._selector_map()
+
+        return sum(self.discard(selector, ref)
+                   for selector in selectors
+                   for ref in list(by_selector.get(selector, ())))
+
+    def to_list(self):
+        """Return the compressed ``granular_markings`` collection."""
+        return [
+            {"selectors": sorted(self._selectors(ref)), "marking_ref": ref}
+            for ref in self._entries
+        ]
+
+
+def _iteritems(obj, sort_keys):
+    if sort_keys:
+        return iter(sorted(six.iteritems(obj)))
+
+    return six.iteritems(obj)
+
+
+_INDEX_TOKENS = []
+
+
+def _index_token(position):
+    """Return the ``[i]`` selector token for ``position``, cached."""
+    try:
+        return _INDEX_TOKENS[position]
+    except IndexError:
+        for i in range(len(_INDEX_TOKENS), position + 1):
+            _INDEX_TOKENS.append("[{0}]".format(i))
+
+        return _INDEX_TOKENS[position]
+
+
+def iterpath(obj, path=None, sort_keys=False):
     """
     Generator which walks the input ``obj`` model. Each iteration yields a
     tuple containing a list of ancestors and the property value.
@@ -157,6 +652,8 @@ def iterpath(obj, path=None):
     Args:
         obj: A TLO object.
         path: None, used recursively to store ancestors.
+        sort_keys: If True, walk the properties of each dictionary in sorted
+            order. Otherwise dictionary order is used.
 
     Example:
         >>> for item in iterpath(tlo):
@@ -168,29 +665,32 @@ def iterpath(obj, path=None):
     Returns:
         tuple: Containing two items: a list of ancestors and the property value.
 
+    Note:
+        The same ancestors list is yielded on every iteration and modified in
+        place as the walk goes on. Copy it if it has to be kept.
+
     """
     if path is None:
         path = []
 
-    for varname, varobj in iter(sorted(six.iteritems(obj))):
+    for varname, varobj in _iteritems(obj, sort_keys):
         path.append(varname)
         yield (path, varobj)
 
         if isinstance(varobj, dict):
 
-            for item in iterpath(varobj, path):
+            for item in iterpath(varobj, path, sort_keys):
                 yield item
 
         elif isinstance(varobj, list):
 
-            for item in varobj:
-                index = "[{0}]".format(varobj.index(item))
-                path.append(index)
+            for position, item in enumerate(varobj):
+                path.append(_index_token(position))
 
                 yield (path, item)
 
                 if isinstance(item, dict):
-                    for descendant in iterpath(item, path):
+                    for descendant in iterpath(item, path, sort_keys):
                         yield descendant
 
                 path.pop()
@@ -198,13 +698,66 @@ def iterpath(obj, path=None):
         path.pop()
 
 
-def get_selector(obj, prop):
+def _iterlist(varobj):
+    for position, item in enumerate(varobj):
+        yield _index_token(position), item
+
+
+def iterselectors(obj, sort_keys=False):
+    """
+    Generator which walks the input ``obj`` model in the same order as
+    `iterpath`, yielding the selector string of every property instead of
+    its list of ancestors.
+
+    Each selector is built by extending the selector of its parent, so the
+    full path is never joined again for every node.
+
+    Args:
+        obj: A TLO object.
+        sort_keys: If True, walk the properties of each dictionary in sorted
+            order. Otherwise dictionary order is used.
+
+    Example:
+        >>> for item in iterselectors(tlo):
+        >>>     print(item)
+        ('type', 'campaign')
+        ...
+        ('cybox.objects.[0].hashes.sha1', 'cac35ec206d868b7d7cb0b55f31d9425b075082b')
+
+    Returns:
+        tuple: Containing two items: the selector and the property value.
+
+    """
+    stack = [("", _iteritems(obj, sort_keys), False)]
+
+    while stack:
+        prefix, children, in_list = stack[-1]
+
+        for token, value in children:
+            selector = prefix + token
+            yield (selector, value)
+
+            if isinstance(value, dict):
+                stack.append((selector + ".", _iteritems(value, sort_keys), False))
+                break
+
+            # Only lists held by a dictionary property are walked, lists
+            # nested directly in lists are yielded as values.
+            elif isinstance(value, list) and not in_list:
+                stack.append((selector + ".", _iterlist(value), True))
+                break
+        else:
+            stack.pop()
+
+
+def get_selector(obj, prop, index=None):
     """
     Function that creates a selector based on ``prop``.
 
     Args:
         obj: A TLO object.
         prop: A property of the TLO object.
+        index: Optional `SelectorIndex` of ``obj`` to reuse between calls.
 
     Note:
         Must supply the actual value inside the structure. Since some
@@ -221,11 +774,32 @@ def get_selector(obj, prop):
             Empty list if it was unable to find the property.
 
     """
-    selector = []
+    if index is None:
+        # A single lookup does not pay for the tables, walk the TLO once.
+        return [selector for selector, value in iterselectors(obj)
+                if value is prop]
+
+    return index.get_selector(prop)
+
+
+def get_selectors(obj, props, index=None):
+    """
+    Bulk version of `get_selector`, all values are found with one walk.
+
+    Args:
+        obj: A TLO object.
+        props: Properties of the TLO object.
+        index: Optional `SelectorIndex` of ``obj`` to reuse between calls.
 
-    for ancestors, value in iterpath(obj):
-        if value is prop:
-            path = ".".join(ancestors)
-            selector.append(path)
+    Example:
+        >>> get_selectors(tlo, [tlo["title"], tlo["cybox"]["objects"][0]])
+        [["title"], ["cybox.objects.[0]"]]
+
+    Returns:
+        list: The list of selectors of each property, in order.
+
+    """
+    if index is None:
+        index = SelectorIndex(obj)
 
-    return selector
+    return index.get_selectors(props)
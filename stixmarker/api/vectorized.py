@@ -0,0 +1,263 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import six
+
+from stixmarker.api import compact
+from stixmarker.api import object_markings
+from stixmarker.api import parsing
+from stixmarker.api import utils
+
+
+# (object, selector) pairs are keyed as object << _SHIFT | selector.
+_SHIFT = 32
+
+
+def _parent(selector):
+    position = selector.rfind(".")
+    return selector[:position] if position != -1 else None
+
+
+class VectorizedMarkings(object):
+    """
+    The markings of a batch of TLOs encoded into NumPy arrays, answering
+    `get_markings` and `is_marked` for many (object, selector, marking)
+    queries at once with vectorized operations.
+
+    Marking refs and selectors are interned to integers. Every marked
+    (object, selector) pair gets a row in two boolean matrices with one
+    column per marking ref: the refs applied to the selector and the refs
+    applied below it. A query is a sorted search for its pair, plus one
+    search per ancestor level when markings are inherited.
+
+    Args:
+        objects: Sequence of TLO objects. Queries refer to them by position.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+
+    Example:
+        >>> markings = VectorizedMarkings(tlos)
+        >>> markings.is_marked([0, 0, 7], ["title", "description", "title"],
+        >>>                    "marking-definition--1", inherited=True)
+        array([ True, False,  True])
+
+    Note:
+        Selectors are not validated against the TLOs. The batch is encoded
+        once, build a new instance after the TLOs change.
+
+    """
+
+    def __init__(self, objects):
+        if numpy is None:
+            raise ImportError("VectorizedMarkings requires NumPy, install it"
+                              " with 'pip install stixmarker[numpy]'...")
+
+        self.refs = compact.Interner()
+        self.selectors = compact.Interner()
+        self._parents = []
+        self._parents_array = None
+
+        object_pairs = []
+        granular = []
+        count = 0
+
+        for position, obj in enumerate(objects):
+            count += 1
+
+            for ref in object_markings.get_markings(obj):
+                object_pairs.append((position, self.refs.intern(ref)))
+
+            for granular_marking in obj.get("granular_markings") or []:
+                refs = [self.refs.intern(ref) for ref in
+                        utils.convert_to_list(granular_marking.get("marking_ref", []))]
+
+                for selector in utils.convert_to_list(granular_marking.get("selectors", [])):
+                    selector = self._intern(selector)
+                    granular.extend((position, selector, ref) for ref in refs)
+
+        width = len(self.refs)
+        self.object_refs = numpy.zeros((count, width), dtype=bool)
+
+        if object_pairs:
+            rows, columns = numpy.array(object_pairs, dtype=numpy.int64).T
+            self.object_refs[rows, columns] = True
+
+        granular = numpy.array(granular, dtype=numpy.int64).reshape(-1, 3)
+        objects_, selectors, refs = granular.T
+
+        # Each marking also applies "below" every ancestor of its selector.
+        parents = self._parent_ids()
+        below = [[], [], []]
+        current = parents[selectors] if len(selectors) else selectors
+
+        while len(current):
+            keep = current >= 0
+            objects_, refs, current = objects_[keep], refs[keep], current[keep]
+            below[0].append(objects_)
+            below[1].append(current)
+            below[2].append(refs)
+            current = parents[current]
+
+        exact_keys = (granular[:, 0] << _SHIFT) | granular[:, 1]
+        below_keys = (numpy.concatenate(below[0] or [exact_keys[:0]]) << _SHIFT) | \
+            numpy.concatenate(below[1] or [exact_keys[:0]])
+
+        self._keys, inverse = numpy.unique(
+            numpy.concatenate([exact_keys, below_keys]), return_inverse=True)
+        self._exact = numpy.zeros((len(self._keys), width), dtype=bool)
+        self._below = numpy.zeros((len(self._keys), width), dtype=bool)
+
+        inverse = inverse.reshape(-1)
+        self._exact[inverse[:len(exact_keys)], granular[:, 2]] = True
+        self._below[inverse[len(exact_keys):],
+                    numpy.concatenate(below[2] or [exact_keys[:0]])] = True
+
+    def _intern(self, selector):
+        """Intern ``selector`` and its ancestors, return its ID."""
+        selector = parsing.selector_text(selector)
+        id_ = self.selectors.get(selector)
+
+        if id_ is None:
+            parent = _parent(selector)
+            parent = -1 if parent is None else self._intern(parent)
+            id_ = self.selectors.intern(selector)
+            self._parents.append(parent)
+
+        return id_
+
+    def _parent_ids(self):
+        if self._parents_array is None or \
+                len(self._parents_array) != len(self._parents):
+            self._parents_array = numpy.array(self._parents, dtype=numpy.int64)
+
+        return self._parents_array
+
+    def selector_ids(self, selectors):
+        """
+        Return the selector IDs of ``selectors`` as an array.
+
+        Encoding query selectors once and passing the array to `get_markings`
+        or `is_marked` skips the per-query string lookup.
+        """
+        if isinstance(selectors, numpy.ndarray) and selectors.dtype.kind in "iu":
+            return selectors.astype(numpy.int64, copy=False)
+
+        if isinstance(selectors, (six.text_type, six.binary_type, parsing.Selector)):
+            selectors = [selectors]
+
+        return numpy.fromiter((self._intern(s) for s in selectors),
+                              dtype=numpy.int64)
+
+    def ref_ids(self, markings):
+        """Return the marking IDs of ``markings`` as an array, -1 if unknown."""
+        if isinstance(markings, numpy.ndarray) and markings.dtype.kind in "iu":
+            return markings.astype(numpy.int64, copy=False)
+
+        markings = utils.convert_to_list(markings)
+        return numpy.fromiter((self.refs.get(m, -1) for m in markings),
+                              dtype=numpy.int64)
+
+    def _lookup(self, objects, selectors):
+        keys = (objects << _SHIFT) | selectors
+        rows = numpy.searchsorted(self._keys, keys)
+        rows[rows == len(self._keys)] = 0
+        found = self._keys[rows] == keys if len(self._keys) else \
+            numpy.zeros(len(keys), dtype=bool)
+
+        return rows[found], found
+
+    def get_markings(self, objects, selectors, inherited=False, descendants=False):
+        """
+        Get the markings of many fields at once.
+
+        Args:
+            objects: Positions of the queried TLOs in the batch.
+            selectors: Selector (str, `parsing.Selector` or ID from
+                `selector_ids`) of each query, or a single selector for all.
+            inherited: If True, include object level markings and granular
+                markings inherited relative to the field(s).
+            descendants: If True, include granular markings applied to any
+                children relative to the field(s).
+
+        Returns:
+            numpy.ndarray: Boolean matrix with one row per query and one
+                column per marking, the marking IDs are those of ``refs``.
+                Use `markings_of` to turn a row back into marking IDs.
+
+        """
+        objects = numpy.asarray(objects, dtype=numpy.int64).reshape(-1)
+        selectors = numpy.broadcast_to(self.selector_ids(selectors), objects.shape)
+        results = numpy.zeros((len(objects), len(self.refs)), dtype=bool)
+
+        rows, found = self._lookup(objects, selectors)
+        results[found] |= self._exact[rows]
+
+        if descendants:
+            results[found] |= self._below[rows]
+
+        if inherited:
+            parents = self._parent_ids()
+            queries = numpy.arange(len(objects))
+            current = parents[selectors]
+
+            while len(queries):
+                keep = current >= 0
+                queries, current = queries[keep], current[keep]
+                rows, found = self._lookup(objects[queries], current)
+                results[queries[found]] |= self._exact[rows]
+                current = parents[current]
+
+            results |= self.object_refs[objects]
+
+        return results
+
+    def is_marked(self, objects, selectors, marking=None, inherited=False,
+                  descendants=False):
+        """
+        Check if many fields are marked at once.
+
+        Args:
+            objects: Positions of the queried TLOs in the batch.
+            selectors: Selector of each query, or a single selector for all.
+            marking: Marking ID of each query, a single marking ID for all,
+                or None for any marking.
+            inherited: See `get_markings`.
+            descendants: See `get_markings`.
+
+        Returns:
+            numpy.ndarray: One bool per query, True if the field carries
+                ``marking`` (any marking if None) within the markings
+                `get_markings` returns for it. As in
+                `stixmarker.api.is_marked`, with ``inherited`` any marking on
+                the field itself or on its TLO also counts.
+
+        """
+        objects = numpy.asarray(objects, dtype=numpy.int64).reshape(-1)
+        selectors = numpy.broadcast_to(self.selector_ids(selectors), objects.shape)
+        results = self.get_markings(objects, selectors, inherited, descendants)
+
+        if marking is None:
+            marked = results.any(axis=1)
+        else:
+            markings = numpy.broadcast_to(self.ref_ids(marking), (len(results),))
+            known = markings >= 0
+            marked = numpy.zeros(len(results), dtype=bool)
+            marked[known] = results[numpy.flatnonzero(known), markings[known]]
+
+        if inherited:
+            rows, found = self._lookup(objects, selectors)
+            marked[found] |= self._exact[rows].any(axis=1)
+            marked |= self.object_refs[objects].any(axis=1)
+
+        return marked
+
+    def markings_of(self, row):
+        """Return the marking IDs set in a row of `get_markings`."""
+        return [self.refs.lookup(i) for i in numpy.flatnonzero(row)]
@@ -0,0 +1,284 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import argparse
+import collections
+import itertools
+import json
+import sys
+import time
+
+from stixmarker import api
+from stixmarker import stream
+from stixmarker import validator
+from stixmarker.api import bulk
+
+
+COMMANDS = collections.OrderedDict([
+    ("get", "get_markings"),
+    ("add", "add_markings"),
+    ("set", "set_markings"),
+    ("remove", "remove_markings"),
+    ("clear", "clear_markings"),
+    ("is-marked", "is_marked"),
+])
+
+READ_COMMANDS = ("get", "is-marked")
+
+
+def _arguments(command, options):
+    """Return the positional arguments of the api call after the TLO."""
+    selectors = options.selectors or None
+    markings = options.markings or None
+
+    if command == "get":
+        return (selectors, options.inherited, options.descendants)
+    elif command == "is-marked":
+        return (selectors, markings, options.inherited, options.descendants)
+    elif command == "clear":
+        return (selectors,)
+
+    return (selectors, markings)
+
+
+def process_chunk(chunk, function, arguments):
+    """
+    Worker entry point. Applies ``function`` of `stixmarker.api` to each TLO
+    of ``chunk``.
+
+    Returns:
+        list: A tuple (TLO, result, error message, seconds) per TLO.
+
+    """
+    results = []
+    call = getattr(api, function)
+
+    for obj in chunk:
+        start = time.time()
+
+        try:
+            result, error = call(obj, *arguments), None
+        except AssertionError as e:
+            result, error = None, str(e) or "validation failed"
+
+        results.append((obj, result, error, time.time() - start))
+
+    return results
+
+
+def _iter_inputs(paths, input_format, readers):
+    for path in paths:
+        if path == "-":
+            reader = stream.ObjectReader(sys.stdin, input_format)
+            readers.append(reader)
+
+            for obj in reader:
+                yield obj
+        else:
+            with open(path) as fp:
+                reader = stream.ObjectReader(fp, input_format)
+                readers.append(reader)
+
+                for obj in reader:
+                    yield obj
+
+
+def _print_summary(count, errors, elapsed, latencies, fp):
+    latencies.sort()
+    rate = count / elapsed if elapsed else 0.0
+
+    fp.write(
+        "objects: {0}  errors: {1}  elapsed: {2:.3f}s  throughput: {3:.1f} obj/s\n"
+        "latency per object: p50 {4:.3f}ms  p99 {5:.3f}ms  max {6:.3f}ms\n".format(
+            count, errors, elapsed, rate,
+            bulk.percentile(latencies, 0.50) * 1000,
+            bulk.percentile(latencies, 0.99) * 1000,
+            (latencies[-1] if latencies else 0.0) * 1000,
+        )
+    )
+
+
+def _read_definitions(paths):
+    """Return the ids of the marking definitions held by ``paths``."""
+    refs = set()
+
+    for path in paths or []:
+        with open(path) as fp:
+            for obj in stream.ObjectReader(fp):
+                if obj.get("type") == "marking-definition":
+                    refs.add(obj["id"])
+
+    return refs
+
+
+def run_validate(options, stdout, stderr):
+    """Run the validate command. Returns the process exit status."""
+    objects = _iter_inputs(options.inputs or ["-"], options.input_format, [])
+    records = validator.validate_corpus(
+        objects, _read_definitions(options.definitions), options.jobs,
+        options.chunk_size, options.all)
+
+    output = open(options.output, "w") if options.output else stdout
+
+    try:
+        summary = validator.write_report(records, output)
+    finally:
+        if output is not stdout:
+            output.close()
+
+    if options.summary:
+        stderr.write(
+            "objects: {0}  invalid: {1}  errors: {2}  elapsed: {3:.3f}s"
+            "  per object: p50 {4:.3f}ms  p99 {5:.3f}ms\n".format(
+                summary["objects"], summary["invalid_objects"],
+                summary["errors"], summary["elapsed"],
+                summary["check_seconds"]["p50"] * 1000,
+                summary["check_seconds"]["p99"] * 1000,
+            )
+        )
+
+    return 1 if summary["errors"] else 0
+
+
+def run(options, stdout=None, stderr=None):
+    """Run a parsed command line. Returns the process exit status."""
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    command = options.command
+
+    if command == "validate":
+        return run_validate(options, stdout, stderr)
+    readers = []
+
+    objects = _iter_inputs(options.inputs or ["-"], options.input_format, readers)
+    chunks = bulk.map_chunks(process_chunk,
+                             bulk.iter_chunks(objects, options.chunk_size),
+                             (COMMANDS[command], _arguments(command, options)),
+                             options.jobs)
+    results = itertools.chain.from_iterable(chunks)
+
+    output = open(options.output, "w") if options.output else stdout
+    writer = None
+    count = errors = 0
+    latencies = []
+    start = time.time()
+
+    try:
+        for obj, result, error, seconds in results:
+            count += 1
+            latencies.append(seconds)
+
+            if error is not None:
+                errors += 1
+                stderr.write("{0}: {1}\n".format(obj.get("id", count), error))
+
+                if not options.keep_going:
+                    break
+
+            if command in READ_COMMANDS:
+                if error is None:
+                    output.write(json.dumps({"id": obj.get("id"), "result": result}))
+                    output.write("\n")
+                continue
+
+            if writer is None:
+                header = readers[0].header if readers else None
+                output_format = options.output_format or \
+                    (readers[0].format if readers else None) or "ndjson"
+                writer = stream.ObjectWriter(output, output_format, header)
+
+            writer.write(obj)
+    finally:
+        # Stops the workers when the loop ended early.
+        chunks.close()
+
+        if writer is not None:
+            writer.close()
+
+        if output is not stdout:
+            output.close()
+
+    if options.summary:
+        _print_summary(count, errors, time.time() - start, latencies, stderr)
+
+    return 1 if errors else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="stixmarker",
+        description="Get, add, set, remove, clear and check data markings on"
+                    " STIX TLOs read from NDJSON files, JSON arrays or"
+                    " bundles.",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    for command in COMMANDS:
+        sub = subparsers.add_parser(command)
+        sub.add_argument("inputs", nargs="*", metavar="FILE",
+                         help="input files, '-' or none for stdin")
+        sub.add_argument("-s", "--selector", dest="selectors", action="append",
+                         help="selector of a marked field, repeatable. Object"
+                              " level markings are used when omitted")
+        if command not in ("get", "clear"):
+            sub.add_argument("-m", "--marking", dest="markings", action="append",
+                             required=command != "is-marked",
+                             help="marking definition id, repeatable")
+        if command in READ_COMMANDS:
+            sub.add_argument("--inherited", action="store_true")
+            sub.add_argument("--descendants", action="store_true")
+        else:
+            sub.add_argument("--output-format", choices=stream.FORMATS[1:],
+                             help="defaults to the input format")
+
+        sub.add_argument("--input-format", choices=stream.FORMATS,
+                         default="auto")
+        sub.add_argument("-o", "--output", help="output file, stdout if omitted")
+        sub.add_argument("-j", "--jobs", type=int, default=1,
+                         help="number of worker processes")
+        sub.add_argument("--chunk-size", type=int, default=256,
+                         help="TLOs sent to a worker at once")
+        sub.add_argument("-k", "--keep-going", action="store_true",
+                         help="report TLOs failing validation and continue")
+        sub.add_argument("--summary", action="store_true",
+                         help="print throughput and latency to stderr")
+        sub.set_defaults(markings=None, inherited=False, descendants=False,
+                         output_format=None)
+
+    sub = subparsers.add_parser(
+        "validate",
+        help="check that every selector resolves and every marking ref is"
+             " defined, writing an NDJSON report")
+    sub.add_argument("inputs", nargs="*", metavar="FILE",
+                     help="input files, '-' or none for stdin")
+    sub.add_argument("-d", "--definitions", action="append", metavar="FILE",
+                     help="file of marking definitions not in the inputs,"
+                          " repeatable")
+    sub.add_argument("--all", action="store_true",
+                     help="also report objects without errors")
+    sub.add_argument("--input-format", choices=stream.FORMATS, default="auto")
+    sub.add_argument("-o", "--output", help="report file, stdout if omitted")
+    sub.add_argument("-j", "--jobs", type=int, default=1,
+                     help="number of worker processes")
+    sub.add_argument("--chunk-size", type=int, default=256,
+                     help="objects sent to a worker at once")
+    sub.add_argument("--summary", action="store_true",
+                     help="print counts and timings to stderr")
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    options = parser.parse_args(argv)
+
+    if not options.command:
+        parser.print_help()
+        return 2
+
+    return run(options)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+"""
+Marking service exposing the `stixmarker.api` operations over HTTP, on a
+local TCP port or a Unix socket.
+
+Every operation is a ``POST /<operation>`` with a JSON body holding the TLO
+and the arguments of the call::
+
+    POST /add_markings
+    {"object": {...}, "selectors": ["description"], "marking": "marking-definition--1"}
+
+    200 {"object": {...}}
+
+Read operations (get_markings, is_marked) answer ``{"result": ...}``, write
+operations answer the modified TLO as ``{"object": ...}``. A body with
+``"objects": [...]`` instead applies the call to each TLO and answers
+``{"results": [...]}``, one of the above, or ``{"error": ...}``, per TLO.
+Validation errors are answered with status 400 and ``{"error": message}``.
+
+Requests arriving together are grouped into batches and run in a process
+pool, so the event loop only parses and routes requests.
+
+Note:
+    Requires Python 3.7 or later.
+
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import sys
+
+from stixmarker import api
+from stixmarker.api import bulk
+
+
+OPERATIONS = bulk.READ_OPERATIONS + bulk.WRITE_OPERATIONS
+
+# Arguments taken from the request body by each operation, after the TLO.
+_PARAMETERS = {
+    "get_markings": ("selectors", "inherited", "descendants"),
+    "is_marked": ("selectors", "marking", "inherited", "descendants"),
+    "clear_markings": ("selectors",),
+    "add_markings": ("selectors", "marking"),
+    "remove_markings": ("selectors", "marking"),
+    "set_markings": ("selectors", "marking"),
+}
+
+_DEFAULTS = {"selectors": None, "marking": None, "inherited": False,
+             "descendants": False}
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large",
+            500: "Internal Server Error"}
+
+
+def _call(operation, obj, arguments):
+    try:
+        result = getattr(api, operation)(obj, *arguments)
+    except AssertionError as e:
+        return {"error": str(e) or "validation failed"}
+    except Exception as e:
+        # Malformed arguments must not fail the other requests of the batch.
+        return {"error": "{0}: {1}".format(type(e).__name__, e)}
+
+    if operation in bulk.WRITE_OPERATIONS:
+        return {"object": obj}
+
+    return {"result": result}
+
+
+def process_batch(requests):
+    """
+    Worker entry point. Runs a batch of requests.
+
+    Args:
+        requests: list of tuples ``(operation, body)``.
+
+    Returns:
+        list: The response body of each request, in order.
+
+    """
+    responses = []
+
+    for operation, body in requests:
+        arguments = [body.get(name, _DEFAULTS[name])
+                     for name in _PARAMETERS[operation]]
+
+        if "objects" in body:
+            responses.append({"results": [
+                _call(operation, obj, arguments) for obj in body["objects"]
+            ]})
+        else:
+            responses.append(_call(operation, body["object"], arguments))
+
+    return responses
+
+
+class _Batcher(object):
+    """Groups requests submitted close together into one executor call."""
+
+    def __init__(self, loop, executor, max_batch, max_delay):
+        self.loop = loop
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending = []
+        self._timer = None
+
+    def submit(self, operation, body):
+        future = self.loop.create_future()
+        self._pending.append(((operation, body), future))
+
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(self.max_delay, self.flush)
+
+        return future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        requests = [request for request, _ in batch]
+        futures = [future for _, future in batch]
+
+        if self.executor is None:
+            done = self.loop.create_future()
+
+            try:
+                done.set_result(process_batch(requests))
+            except Exception as e:
+                done.set_exception(e)
+        else:
+            done = self.loop.run_in_executor(self.executor, process_batch,
+                                             requests)
+
+        done.add_done_callback(functools.partial(self._resolve, futures))
+
+    @staticmethod
+    def _resolve(futures, done):
+        error = done.exception()
+
+        for position, future in enumerate(futures):
+            if future.done():
+                continue
+            elif error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result()[position])
+
+
+class MarkingService(object):
+    """
+    The asyncio marking service.
+
+    Args:
+        jobs: Number of worker processes. None uses one per CPU, 0 runs the
+            operations in the event loop thread.
+        max_batch: Most requests sent to a worker at once.
+        max_delay: Seconds a request may wait for others to join its batch.
+        max_body: Largest accepted request body, in bytes.
+
+    Example:
+        >>> service = MarkingService(jobs=4)
+        >>> await service.start(port=8080)
+        >>> await service.serve_forever()
+
+    """
+
+    def __init__(self, jobs=None, max_batch=64, max_delay=0.002,
+                 max_body=16 * 1024 * 1024):
+        self.jobs = jobs
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_body = max_body
+        self.address = None
+        self._server = None
+        self._executor = None
+        self._batcher = None
+        self._connections = {}  # handler task -> stream writer
+
+    async def start(self, host="127.0.0.1", port=8080, path=None):
+        """
+        Start listening on ``host``:``port``, or on the Unix socket ``path``
+        when given. Port 0 picks a free port, see ``address``.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.jobs != 0:
+            from concurrent import futures
+            self._executor = futures.ProcessPoolExecutor(max_workers=self.jobs)
+
+        self._batcher = _Batcher(loop, self._executor, self.max_batch,
+                                 self.max_delay)
+
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path)
+            self.address = path
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+
+        return self
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening and shut the worker processes down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        # Idle keep-alive connections end when their transport is closed.
+        for writer in self._connections.values():
+            writer.close()
+
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+
+        if self._batcher is not None:
+            self._batcher.flush()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def dispatch(self, method, target, body):
+        """Return the (status, response body) of one request."""
+        operation = target.strip("/")
+
+        if operation == "health":
+            return 200, {"status": "ok"}
+        elif operation not in OPERATIONS:
+            return 404, {"error": "Unknown marking operation"
+                                  " '{0}'...".format(operation)}
+        elif method != "POST":
+            return 405, {"error": "Use POST..."}
+
+        try:
+            body = json.loads(body.decode("utf-8"))
+        except ValueError as e:
+            return 400, {"error": "Invalid JSON body: {0}".format(e)}
+
+        if not isinstance(body, dict) or not (
+                isinstance(body.get("objects"), list) if "objects" in body
+                else isinstance(body.get("object"), dict)):
+            return 400, {"error": "Expected a JSON object with an 'object'"
+                                  " or 'objects' property..."}
+
+        response = await self._batcher.submit(operation, body)
+        return (400 if "error" in response else 200), response
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+
+        try:
+            while True:
+                request_line = await reader.readline()
+
+                if not request_line:
+                    break
+
+                method, target, version = \
+                    request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+                headers = {}
+
+                while True:
+                    line = await reader.readline()
+
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+
+                if length > self.max_body:
+                    status, response = 413, {"error": "Request body too large..."}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+
+                    try:
+                        status, response = await self.dispatch(method, target, body)
+                    except Exception as e:
+                        status, response = 500, {"error": str(e)}
+
+                    keep_alive = version == "HTTP/1.1" and \
+                        headers.get("connection", "").lower() != "close"
+
+                writer.write(_response(status, response, keep_alive))
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            del self._connections[task]
+            writer.close()
+
+
+def _response(status, body, keep_alive):
+    body = json.dumps(body).encode("utf-8")
+    head = (
+        "HTTP/1.1 {0} {1}\r\n"
+        "Content-Type: application/json\r\n"
+        "Content-Length: {2}\r\n"
+        "Connection: {3}\r\n\r\n"
+    ).format(status, _REASONS[status], len(body),
+             "keep-alive" if keep_alive else "close")
+
+    return head.encode("latin-1") + body
+
+
+class Client(object):
+    """
+    Minimal keep-alive client of the marking service.
+
+    Example:
+        >>> client = await Client.connect(port=8080)
+        >>> await client.call("is_marked", object=tlo, selectors="title")
+        (200, {'result': True})
+
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8080, path=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+
+        return cls(reader, writer)
+
+    async def call(self, operation, **body):
+        """Send one request, return its (status, response body)."""
+        payload = json.dumps(body).encode("utf-8")
+        self._writer.write((
+            "POST /{0} HTTP/1.1\r\n"
+            "Host: stixmarker\r\n"
+            "Content-Type: application/json\r\n"
+            "Content-Length: {1}\r\n\r\n"
+        ).format(operation, len(payload)).encode("latin-1") + payload)
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+
+        while True:
+            line = await self._reader.readline()
+
+            if line in (b"\r\n", b"\n", b""):
+                break
+
+            name, _, value = line.decode("latin-1").partition(":")
+
+            if name.strip().lower() == "content-length":
+                length = int(value)
+
+        return status, json.loads((await self._reader.readexactly(length)).decode("utf-8"))
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="stixmarker-service",
+        description="Serve the stixmarker operations over HTTP.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", metavar="PATH",
+                        help="listen on a Unix socket instead of TCP")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes, one per CPU by default,"
+                             " 0 to run in the event loop")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-delay", type=float, default=0.002,
+                        help="seconds a request may wait to be batched")
+
+    return parser
+
+
+async def _serve(options):
+    service = MarkingService(options.jobs, options.max_batch, options.max_delay)
+    await service.start(options.host, options.port, options.unix)
+    sys.stderr.write("stixmarker service listening on {0}\n".format(service.address))
+
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+
+    try:
+        asyncio.run(_serve(options))
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
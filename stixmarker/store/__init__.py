@@ -0,0 +1,47 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+def ancestors(selector):
+    """
+    Yield the selectors of the strict ancestors of ``selector``, from the
+    outermost one down.
+
+    Example:
+        >>> list(ancestors("x.y.[1]"))
+        ['x', 'x.y']
+
+    """
+    position = selector.find(".")
+
+    while position != -1:
+        yield selector[:position]
+        position = selector.find(".", position + 1)
+
+
+def combine_is_marked(marking, exact, granular, object_refs, inherited):
+    """
+    Return the `stixmarker.api.is_marked` answer from markings a store
+    looked up.
+
+    Args:
+        marking: list of marking IDs asked for, or None.
+        exact: Granular marking IDs of the selectors themselves.
+        granular: Granular marking IDs found for the selectors with the
+            requested ``inherited``/``descendants`` rules.
+        object_refs: Object level marking IDs.
+        inherited: The ``inherited`` flag of the query.
+
+    """
+    if marking:
+        # All user-provided markings must be found.
+        result = set(marking).issubset(granular)
+    else:
+        result = bool(granular)
+
+    if inherited:
+        # Same as `stixmarker.api.is_marked`: any marking on the selector
+        # itself or on the object also counts.
+        result = result or bool(exact) or bool(object_refs)
+
+    return result
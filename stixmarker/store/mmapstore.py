@@ -0,0 +1,470 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+"""
+Read-only marking store in a binary file read through ``mmap``.
+
+The file holds, for every object id, its object level marking refs and its
+granular (selector, marking ref) pairs. Strings are stored once, in sorted
+tables, and every other section is an array of integers. A query reads the
+arrays in place through ``memoryview`` slices, only the strings it returns
+are decoded, so opening a store of any size costs no RAM up front.
+
+Layout, all integers in native byte order, every section 8-byte aligned::
+
+    header      magic, version, section count, (offset, length) per section
+    ids         sorted object ids            (string table)
+    refs        sorted marking refs          (string table)
+    selectors   sorted selectors             (string table)
+    ref_starts  Q[objects + 1]  start of each object in ``object_refs``
+    object_refs I[...]          ref index per object level marking
+    pair_starts Q[objects + 1]  start of each object in ``pair_*``
+    pair_selectors I[...]       selector index, sorted per object
+    pair_refs   I[...]          ref index of the pair
+
+A string table is ``Q[count + 1]`` offsets followed by the UTF-8 blob.
+
+Note:
+    Requires Python 3.3 or later, for ``memoryview.cast`` over the mapping.
+
+"""
+
+import array
+import bisect
+import mmap
+import os
+import struct
+import sys
+
+import six
+
+from stixmarker import store
+from stixmarker import stream
+from stixmarker.api import utils
+
+if sys.version_info < (3, 3):
+    raise ImportError("stixmarker.store.mmapstore requires Python 3.3 or later")
+
+MAGIC = b"STIXMRK1"
+VERSION = 1
+
+_SECTIONS = ("id_offsets", "ids", "ref_offsets", "refs", "selector_offsets",
+             "selectors", "ref_starts", "object_refs", "pair_starts",
+             "pair_selectors", "pair_refs")
+
+_HEADER = struct.Struct("=8sIBI")
+_SECTION = struct.Struct("=QQ")
+
+# Unsigned int of 4 bytes, and of 8 bytes for offsets.
+_INDEX = "I" if array.array("I").itemsize == 4 else "L"
+_OFFSET = "Q"
+
+
+def _string_table(strings):
+    offsets = array.array(_OFFSET, [0])
+    blob = bytearray()
+
+    for string in strings:
+        blob.extend(string)
+        offsets.append(len(blob))
+
+    return offsets, bytes(blob)
+
+
+def _encode(string):
+    if isinstance(string, six.text_type):
+        return string.encode("utf-8")
+
+    return string
+
+
+class _Interner(object):
+    """Temporary ids of strings, remapped to sorted positions on write."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def __call__(self, string):
+        string = _encode(string)
+
+        try:
+            return self.ids[string]
+        except KeyError:
+            id_ = self.ids[string] = len(self.ids)
+            return id_
+
+    def sorted(self):
+        """Return the sorted strings and the position of each temporary id."""
+        strings = sorted(self.ids)
+        positions = array.array(_INDEX, [0]) * len(strings)
+
+        for position, string in enumerate(strings):
+            positions[self.ids[string]] = position
+
+        return strings, positions
+
+
+class _Loader(object):
+    """Collects the markings of objects, with strings interned per kind."""
+
+    def __init__(self):
+        self.refs = _Interner()
+        self.selectors = _Interner()
+        self.objects = {}  # id -> (object ref ids, selector and ref ids)
+
+    def add(self, obj):
+        if "id" not in obj:
+            return
+
+        refs = array.array(_INDEX, [
+            self.refs(ref) for ref in
+            utils.convert_to_list(obj.get("object_marking_refs")) or []
+        ])
+        pairs = array.array(_INDEX)
+
+        for granular_marking in obj.get("granular_markings") or []:
+            marking_refs = [
+                self.refs(ref) for ref in
+                utils.convert_to_list(granular_marking.get("marking_ref")) or []
+            ]
+
+            for selector in utils.convert_to_list(granular_marking.get("selectors")) or []:
+                selector = self.selectors(selector)
+
+                for ref in marking_refs:
+                    pairs.append(selector)
+                    pairs.append(ref)
+
+        self.objects[_encode(obj["id"])] = (refs, pairs)
+
+    def write(self, path):
+        refs, ref_positions = self.refs.sorted()
+        selectors, selector_positions = self.selectors.sorted()
+        ids = sorted(self.objects)
+
+        ref_starts = array.array(_OFFSET, [0])
+        object_refs = array.array(_INDEX)
+        pair_starts = array.array(_OFFSET, [0])
+        pair_selectors = array.array(_INDEX)
+        pair_refs = array.array(_INDEX)
+
+        for id_ in ids:
+            markings, pairs = self.objects[id_]
+            object_refs.extend(sorted(set(ref_positions[r] for r in markings)))
+            ref_starts.append(len(object_refs))
+
+            resolved = sorted(set(
+                (selector_positions[pairs[p]], ref_positions[pairs[p + 1]])
+                for p in range(0, len(pairs), 2)
+            ))
+            pair_selectors.extend(selector for selector, _ in resolved)
+            pair_refs.extend(ref for _, ref in resolved)
+            pair_starts.append(len(pair_selectors))
+
+        sections = []
+
+        for strings in (ids, refs, selectors):
+            offsets, blob = _string_table(strings)
+            sections.extend([offsets.tobytes(), blob])
+
+        sections.extend([ref_starts.tobytes(), object_refs.tobytes(),
+                         pair_starts.tobytes(), pair_selectors.tobytes(),
+                         pair_refs.tobytes()])
+
+        _write(path, sections)
+
+
+def _aligned(size):
+    return (size + 7) & ~7
+
+
+def _write(path, sections):
+    header_size = _aligned(_HEADER.size + _SECTION.size * len(sections))
+    offset = header_size
+    table = []
+
+    for section in sections:
+        table.append((offset, len(section)))
+        offset = _aligned(offset + len(section))
+
+    byteorder = 0 if sys.byteorder == "little" else 1
+    temporary = path + ".tmp"
+
+    with open(temporary, "wb") as fp:
+        fp.write(_HEADER.pack(MAGIC, VERSION, byteorder, len(sections)))
+
+        for entry in table:
+            fp.write(_SECTION.pack(*entry))
+
+        for (start, _), section in zip(table, sections):
+            fp.write(b"\0" * (start - fp.tell()))
+            fp.write(section)
+
+    getattr(os, "replace", os.rename)(temporary, path)
+
+
+def build_store(objects, path):
+    """
+    Write the markings of ``objects`` to a store file at ``path``.
+
+    Args:
+        objects: An iterable of TLOs. Objects without an id are skipped, the
+            last object with a given id wins.
+        path: The store file, replaced once it is fully written.
+
+    Returns:
+        int: The number of objects in the store.
+
+    """
+    loader = _Loader()
+
+    for obj in objects:
+        loader.add(obj)
+
+    loader.write(path)
+    return len(loader.objects)
+
+
+def load_ndjson(infile, path, format="auto"):
+    """
+    Bulk loader. Streams TLOs from ``infile`` into a store file.
+
+    Args:
+        infile: A file object of newline-delimited TLOs, a JSON array of
+            TLOs or a STIX bundle.
+        path: The store file.
+        format: One of `stixmarker.stream.FORMATS`.
+
+    Returns:
+        int: The number of objects in the store.
+
+    """
+    return build_store(stream.ObjectReader(infile, format), path)
+
+
+class _StringTable(object):
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, position):
+        return self.blob[self.offsets[position]:self.offsets[position + 1]].tobytes()
+
+    def __getitem__(self, position):
+        return self.raw(position).decode("utf-8")
+
+    def bisect(self, key):
+        """Return the position of the first string not less than ``key``."""
+        low, high = 0, len(self)
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self.raw(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def find(self, string):
+        """Return the position of ``string``, -1 if absent."""
+        key = _encode(string)
+        position = self.bisect(key)
+
+        if position < len(self) and self.raw(position) == key:
+            return position
+
+        return -1
+
+    def prefix_range(self, prefix):
+        """Return the range of positions of strings starting with ``prefix``."""
+        key = _encode(prefix)
+        upper = key[:-1] + six.int2byte(six.indexbytes(key, -1) + 1)
+
+        return self.bisect(key), self.bisect(upper)
+
+
+class MarkingStore(object):
+    """
+    A store file opened for queries.
+
+    `get_markings` and `is_marked` take an object id and have the semantics
+    of their counterparts in `stixmarker.api`.
+
+    Args:
+        path: A file written by `build_store` or `load_ndjson`.
+
+    Example:
+        >>> with MarkingStore("markings.store") as store:
+        >>>     store.is_marked("indicator--...", "pattern", "marking-definition--1")
+
+    Note:
+        The store holds markings only, so selectors cannot be validated
+        against the objects: a selector that does not exist is unmarked.
+
+    """
+
+    def __init__(self, path):
+        self._fp = open(path, "rb")
+        self._mmap = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, byteorder, count = _HEADER.unpack_from(self._mmap, 0)
+
+        if magic != MAGIC or version != VERSION or count != len(_SECTIONS):
+            self.close()
+            raise AssertionError("'{0}' is not a marking store...".format(path))
+
+        if byteorder != (0 if sys.byteorder == "little" else 1):
+            self.close()
+            raise AssertionError("Marking store '{0}' was written with a"
+                                 " different byte order...".format(path))
+
+        sections = {}
+        for position, name in enumerate(_SECTIONS):
+            start, length = _SECTION.unpack_from(
+                self._mmap, _HEADER.size + position * _SECTION.size)
+            sections[name] = self._view[start:start + length]
+
+        def numbers(name, typecode):
+            return sections[name].cast(typecode)
+
+        self.ids = _StringTable(numbers("id_offsets", _OFFSET), sections["ids"])
+        self.refs = _StringTable(numbers("ref_offsets", _OFFSET), sections["refs"])
+        self.selectors = _StringTable(numbers("selector_offsets", _OFFSET),
+                                      sections["selectors"])
+        self._ref_starts = numbers("ref_starts", _OFFSET)
+        self._object_refs = numbers("object_refs", _INDEX)
+        self._pair_starts = numbers("pair_starts", _OFFSET)
+        self._pair_selectors = numbers("pair_selectors", _INDEX)
+        self._pair_refs = numbers("pair_refs", _INDEX)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return self.ids.find(id_) != -1
+
+    def __iter__(self):
+        for position in range(len(self.ids)):
+            yield self.ids[position]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Release the mapping and the file."""
+        for name in ("_ref_starts", "_object_refs", "_pair_starts",
+                     "_pair_selectors", "_pair_refs"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+
+        for table in ("ids", "refs", "selectors"):
+            table = self.__dict__.pop(table, None)
+            if table is not None:
+                table.offsets.release()
+                table.blob.release()
+
+        if self._view is not None:
+            self._view.release()
+            self._mmap.close()
+            self._fp.close()
+            self._view = None
+
+    def _position(self, id_):
+        position = self.ids.find(id_)
+
+        if position == -1:
+            raise AssertionError("Object '{0}' not found in marking"
+                                 " store...".format(id_))
+
+        return position
+
+    def _object_markings(self, position):
+        start, end = self._ref_starts[position], self._ref_starts[position + 1]
+        return set(self._object_refs[start:end])
+
+    def _pairs(self, start, end, low, high, results):
+        """Add the refs of pairs with a selector in [low, high)."""
+        first = bisect.bisect_left(self._pair_selectors, low, start, end)
+        last = bisect.bisect_left(self._pair_selectors, high, first, end)
+        results.update(self._pair_refs[first:last])
+
+    def _granular(self, position, selectors, inherited, descendants):
+        """Return the (exact, all) granular ref indices of ``selectors``."""
+        start = self._pair_starts[position]
+        end = self._pair_starts[position + 1]
+        exact = set()
+        results = set()
+
+        if start == end:
+            return exact, results
+
+        for selector in selectors:
+            found = self.selectors.find(selector)
+
+            if found != -1:
+                self._pairs(start, end, found, found + 1, exact)
+
+            if inherited:
+                for ancestor in store.ancestors(selector):
+                    found = self.selectors.find(ancestor)
+
+                    if found != -1:
+                        self._pairs(start, end, found, found + 1, results)
+
+            if descendants:
+                low, high = self.selectors.prefix_range(selector + ".")
+                self._pairs(start, end, low, high, results)
+
+        results.update(exact)
+        return exact, results
+
+    def _names(self, refs):
+        return [self.refs[ref] for ref in sorted(refs)]
+
+    def get_markings(self, id_, selectors, inherited=False, descendants=False):
+        """See `stixmarker.api.get_markings`, with an object id."""
+        position = self._position(id_)
+
+        if selectors is None:
+            return self._names(self._object_markings(position))
+
+        selectors = utils.fix_selectors(selectors)
+        _, results = self._granular(position, selectors, inherited, descendants)
+
+        if inherited:
+            results.update(self._object_markings(position))
+
+        return self._names(results)
+
+    def is_marked(self, id_, selectors, marking=None, inherited=False,
+                  descendants=False):
+        """See `stixmarker.api.is_marked`, with an object id."""
+        position = self._position(id_)
+        marking = utils.fix_value(marking)
+
+        if selectors is None:
+            object_refs = self._names(self._object_markings(position))
+
+            if marking:
+                return any(ref in object_refs for ref in marking)
+
+            return bool(object_refs)
+
+        selectors = utils.fix_selectors(selectors)
+        exact, results = self._granular(position, selectors, inherited,
+                                        descendants)
+
+        return store.combine_is_marked(
+            marking, exact, self._names(results),
+            self._object_markings(position), inherited)
@@ -0,0 +1,339 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+"""
+Marking store in a SQLite database.
+
+Unlike `stixmarker.store.mmapstore`, the database is updated in place: new
+objects can be loaded at any time, and loading an object again replaces its
+markings. Marking refs are stored once, in their own table, and the
+markings of an object are rows keyed by the object::
+
+    objects            id, stix_id (unique)
+    refs               id, ref (unique)
+    object_markings    (object, ref)               primary key
+    granular_markings  (object, selector, ref)     primary key
+
+The primary key of ``granular_markings`` is the only index a query needs:
+a selector and its ancestors are equality lookups in it, and the
+descendants of ``x.y`` are the range ``["x.y.", "x.y/")`` of selectors,
+``"/"`` being the character after ``"."``.
+
+"""
+
+import collections
+import sqlite3
+
+from stixmarker import store
+from stixmarker import stream
+from stixmarker.api import bulk
+from stixmarker.api import utils
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    id INTEGER PRIMARY KEY,
+    stix_id TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS refs (
+    id INTEGER PRIMARY KEY,
+    ref TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS object_markings (
+    object INTEGER NOT NULL REFERENCES objects (id),
+    ref INTEGER NOT NULL REFERENCES refs (id),
+    PRIMARY KEY (object, ref)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS granular_markings (
+    object INTEGER NOT NULL REFERENCES objects (id),
+    selector TEXT NOT NULL,
+    ref INTEGER NOT NULL REFERENCES refs (id),
+    PRIMARY KEY (object, selector, ref)
+) WITHOUT ROWID;
+"""
+
+# Stays under the 999 host parameters of older SQLite builds.
+_MAX_PARAMETERS = 500
+
+
+def _placeholders(count):
+    return ", ".join("?" * count)
+
+
+class SQLiteMarkingStore(object):
+    """
+    A SQLite database of object markings.
+
+    `get_markings` and `is_marked` take an object id and have the semantics
+    of their counterparts in `stixmarker.api`.
+
+    Args:
+        path: The database file, created if needed. The default keeps the
+            database in memory.
+
+    Example:
+        >>> with SQLiteMarkingStore("markings.db") as store:
+        >>>     store.load_ndjson(open("objects.ndjson"))
+        >>>     store.is_marked("indicator--...", "pattern", "marking-definition--1")
+
+    Note:
+        The store holds markings only, so selectors cannot be validated
+        against the objects: a selector that does not exist is unmarked.
+
+    """
+
+    def __init__(self, path=":memory:"):
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+        self._ref_ids = {}
+
+    def __len__(self):
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM objects").fetchone()[0]
+
+    def __contains__(self, id_):
+        return self._connection.execute(
+            "SELECT 1 FROM objects WHERE stix_id = ?", (id_,)
+        ).fetchone() is not None
+
+    def __iter__(self):
+        cursor = self._connection.execute(
+            "SELECT stix_id FROM objects ORDER BY stix_id")
+
+        for row in cursor:
+            yield row[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the database."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _select_ids(self, table, column, values):
+        """Return ``{value: id}`` for the rows of ``values``."""
+        ids = {}
+
+        for chunk in bulk.iter_chunks(values, _MAX_PARAMETERS):
+            ids.update(
+                (value, id_) for id_, value in self._connection.execute(
+                    "SELECT id, {1} FROM {0} WHERE {1} IN ({2})".format(
+                        table, column, _placeholders(len(chunk))),
+                    chunk)
+            )
+
+        return ids
+
+    def _intern_refs(self, refs):
+        """
+        Return ``{ref: id}`` for the refs missing from the cache, inserting
+        them if needed. The caller adds them to the cache once the
+        transaction commits, ids of a rolled back insert must not be kept.
+        """
+        missing = set(ref for ref in refs if ref not in self._ref_ids)
+
+        if not missing:
+            return {}
+
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO refs (ref) VALUES (?)",
+            ((ref,) for ref in missing))
+        return self._select_ids("refs", "ref", missing)
+
+    def _load_batch(self, batch):
+        """Replace the markings of the objects of ``batch`` in one transaction."""
+        refs = set()
+
+        for object_refs, pairs in batch.values():
+            refs.update(object_refs)
+            refs.update(ref for _, ref in pairs)
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO objects (stix_id) VALUES (?)",
+                ((id_,) for id_ in batch))
+            object_ids = self._select_ids("objects", "stix_id", batch)
+            new_refs = self._intern_refs(refs)
+            cached = self._ref_ids
+
+            def ref_id(ref):
+                return new_refs[ref] if ref in new_refs else cached[ref]
+
+            rows = [(object_ids[id_],) for id_ in batch]
+            self._connection.executemany(
+                "DELETE FROM object_markings WHERE object = ?", rows)
+            self._connection.executemany(
+                "DELETE FROM granular_markings WHERE object = ?", rows)
+
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO object_markings (object, ref)"
+                " VALUES (?, ?)",
+                ((object_ids[id_], ref_id(ref))
+                 for id_, (object_refs, _) in batch.items()
+                 for ref in object_refs))
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO granular_markings (object, selector, ref)"
+                " VALUES (?, ?, ?)",
+                ((object_ids[id_], selector, ref_id(ref))
+                 for id_, (_, pairs) in batch.items()
+                 for selector, ref in pairs))
+
+        # Only now is the transaction committed.
+        self._ref_ids.update(new_refs)
+
+    def load(self, objects, batch_size=10000):
+        """
+        Bulk loader. Stores the markings of ``objects``.
+
+        Objects are inserted in batches, each batch in a single transaction
+        with one ``executemany`` per table.
+
+        Args:
+            objects: An iterable of TLOs. Objects without an id are skipped.
+                An object already in the store, or seen earlier in
+                ``objects``, has its markings replaced.
+            batch_size: Objects inserted per transaction.
+
+        Returns:
+            int: The number of objects loaded.
+
+        """
+        count = 0
+        batch = collections.OrderedDict()
+
+        for obj in objects:
+            if "id" not in obj:
+                continue
+
+            object_refs = utils.convert_to_list(obj.get("object_marking_refs")) or []
+            pairs = []
+
+            for granular_marking in obj.get("granular_markings") or []:
+                marking_refs = utils.convert_to_list(granular_marking.get("marking_ref")) or []
+
+                for selector in utils.convert_to_list(granular_marking.get("selectors")) or []:
+                    pairs.extend((selector, ref) for ref in marking_refs)
+
+            batch.pop(obj["id"], None)
+            batch[obj["id"]] = (object_refs, pairs)
+            count += 1
+
+            if len(batch) >= batch_size:
+                self._load_batch(batch)
+                batch.clear()
+
+        if batch:
+            self._load_batch(batch)
+
+        return count
+
+    def load_ndjson(self, infile, format="auto", batch_size=10000):
+        """
+        Bulk loader. Streams TLOs from ``infile`` into the store.
+
+        Args:
+            infile: A file object of newline-delimited TLOs, a JSON array of
+                TLOs or a STIX bundle.
+            format: One of `stixmarker.stream.FORMATS`.
+            batch_size: Objects inserted per transaction.
+
+        Returns:
+            int: The number of objects loaded.
+
+        """
+        return self.load(stream.ObjectReader(infile, format), batch_size)
+
+    def _object(self, id_):
+        row = self._connection.execute(
+            "SELECT id FROM objects WHERE stix_id = ?", (id_,)).fetchone()
+
+        if row is None:
+            raise AssertionError("Object '{0}' not found in marking"
+                                 " store...".format(id_))
+
+        return row[0]
+
+    def _object_markings(self, object_id):
+        return set(row[0] for row in self._connection.execute(
+            "SELECT refs.ref FROM object_markings"
+            " JOIN refs ON refs.id = object_markings.ref"
+            " WHERE object_markings.object = ?", (object_id,)))
+
+    def _refs(self, object_id, condition, parameters):
+        return set(row[0] for row in self._connection.execute(
+            "SELECT DISTINCT refs.ref FROM granular_markings"
+            " JOIN refs ON refs.id = granular_markings.ref"
+            " WHERE granular_markings.object = ? AND " + condition,
+            [object_id] + list(parameters)))
+
+    def _selectors(self, object_id, selectors):
+        results = set()
+
+        for chunk in bulk.iter_chunks(selectors, _MAX_PARAMETERS):
+            results.update(self._refs(
+                object_id, "granular_markings.selector IN ({0})".format(
+                    _placeholders(len(chunk))), chunk))
+
+        return results
+
+    def _granular(self, object_id, selectors, inherited, descendants):
+        """Return the (exact, all) granular marking refs of ``selectors``."""
+        exact = self._selectors(object_id, set(selectors))
+        results = set(exact)
+
+        if inherited:
+            results.update(self._selectors(object_id, set(
+                ancestor for selector in selectors
+                for ancestor in store.ancestors(selector))))
+
+        if descendants:
+            for selector in selectors:
+                results.update(self._refs(
+                    object_id,
+                    "granular_markings.selector >= ?"
+                    " AND granular_markings.selector < ?",
+                    (selector + ".", selector + "/")))
+
+        return exact, results
+
+    def get_markings(self, id_, selectors, inherited=False, descendants=False):
+        """See `stixmarker.api.get_markings`, with an object id."""
+        object_id = self._object(id_)
+
+        if selectors is None:
+            return sorted(self._object_markings(object_id))
+
+        selectors = utils.fix_selectors(selectors)
+        _, results = self._granular(object_id, selectors, inherited, descendants)
+
+        if inherited:
+            results.update(self._object_markings(object_id))
+
+        return sorted(results)
+
+    def is_marked(self, id_, selectors, marking=None, inherited=False,
+                  descendants=False):
+        """See `stixmarker.api.is_marked`, with an object id."""
+        object_id = self._object(id_)
+        marking = utils.fix_value(marking)
+
+        if selectors is None:
+            object_refs = self._object_markings(object_id)
+
+            if marking:
+                return any(ref in object_refs for ref in marking)
+
+            return bool(object_refs)
+
+        selectors = utils.fix_selectors(selectors)
+        exact, results = self._granular(object_id, selectors, inherited,
+                                        descendants)
+
+        return store.combine_is_marked(
+            marking, exact, results, self._object_markings(object_id),
+            inherited)
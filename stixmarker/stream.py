@@ -0,0 +1,360 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import json
+import uuid
+
+from stixmarker import api
+
+
+FORMATS = ("auto", "ndjson", "array", "bundle")
+
+# Written in bundles whose header has no "spec_version".
+SPEC_VERSION = "2.0"
+
+_WHITESPACE = " \t\n\r"
+
+
+class ObjectReader(object):
+    """
+    Reads TLOs one at a time from a file containing newline-delimited TLOs,
+    a JSON array of TLOs or a STIX bundle.
+
+    Only the TLO being decoded and one read chunk are held in memory, so the
+    size of the file does not matter.
+
+    Args:
+        fp: A file object opened in text mode.
+        format: One of `FORMATS`. "auto" detects the format from the data.
+        chunk_size: Number of characters read from ``fp`` at once.
+
+    Attributes:
+        format: The detected format, known once the first TLO is read.
+        header: For bundles, the properties of the bundle read so far
+            (every property but "objects"). Properties found after "objects"
+            are added once all the TLOs are read.
+
+    Example:
+        >>> with open("feed.json") as f:
+        >>>     for tlo in ObjectReader(f):
+        >>>         print(tlo["id"])
+
+    Note:
+        In "auto" mode a top level object is taken as a bundle if its "type"
+        is "bundle", or if it has an "objects" list before any "type".
+        Otherwise it is a TLO and the data is read as newline-delimited TLOs.
+
+    """
+
+    def __init__(self, fp, format="auto", chunk_size=65536):
+        assert format in FORMATS, "Unknown format '{0}'...".format(format)
+
+        self.fp = fp
+        self.format = None if format == "auto" else format
+        self.header = {}
+        self._requested = format
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """Read more data, at least as much as currently buffered."""
+        if self._eof:
+            return False
+
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        data = self.fp.read(max(self._chunk_size, len(self._buffer)))
+
+        if not data:
+            self._eof = True
+            return False
+
+        self._buffer += data
+        return True
+
+    def _peek(self):
+        """Return the next non whitespace character, None at end of file."""
+        while True:
+            while self._pos < len(self._buffer):
+                if self._buffer[self._pos] not in _WHITESPACE:
+                    return self._buffer[self._pos]
+                self._pos += 1
+
+            if not self._fill():
+                return None
+
+    def _expect(self, char):
+        found = self._peek()
+
+        if found != char:
+            raise ValueError("Expecting '{0}' at offset {1}, found"
+                             " {2!r}".format(char, self._pos, found))
+        self._pos += 1
+
+    def _decode(self):
+        """Decode the next JSON value of the buffer."""
+        self._peek()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if self._fill():
+                    continue
+                raise
+
+            # A number or literal may be cut at the end of the buffer.
+            if end == len(self._buffer) and \
+                    self._buffer[end - 1] not in '}]"' and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+    def _iter_array(self):
+        self._expect("[")
+
+        if self._peek() == "]":
+            self._pos += 1
+            return
+
+        while True:
+            yield self._decode()
+
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+
+            self._expect("]")
+            return
+
+    def _iter_bundle(self):
+        """Read a top level object. Yields its TLOs if it is a bundle,
+        otherwise yields the object itself."""
+        self._expect("{")
+        obj = {}
+        first = True
+        streamed = False
+
+        while True:
+            if self._peek() == "}":
+                self._pos += 1
+                break
+
+            if not first:
+                self._expect(",")
+
+            first = False
+            key = self._decode()
+            self._expect(":")
+
+            is_bundle = obj.get("type", "bundle") == "bundle"
+
+            if key == "objects" and is_bundle and self._peek() == "[" \
+                    and self._requested != "ndjson":
+                self.format = "bundle"
+                self.header = obj
+                streamed = True
+
+                for tlo in self._iter_array():
+                    yield tlo
+            else:
+                obj[key] = self._decode()
+
+        if streamed:
+            return
+
+        if self._requested == "bundle":
+            if obj.get("type") != "bundle":
+                raise ValueError("Expecting a STIX bundle...")
+            self.header = obj
+            self.format = "bundle"
+            return
+
+        self.format = "ndjson"
+        yield obj
+
+    def __iter__(self):
+        start = self._peek()
+
+        if start is None:
+            return
+
+        if self._requested == "array" or \
+                (self._requested == "auto" and start == "["):
+            self.format = "array"
+
+            for tlo in self._iter_array():
+                yield tlo
+
+        else:
+            for tlo in self._iter_bundle():
+                yield tlo
+
+            if self.format == "ndjson":
+                while self._peek() is not None:
+                    yield self._decode()
+
+        if self._peek() is not None:
+            raise ValueError("Extra data at offset {0}".format(self._pos))
+
+
+def iter_objects(fp, format="auto", chunk_size=65536):
+    """
+    Iterate over the TLOs of ``fp``. Refer to `ObjectReader` for details.
+
+    """
+    return iter(ObjectReader(fp, format, chunk_size))
+
+
+class ObjectWriter(object):
+    """
+    Writes TLOs one at a time as newline-delimited TLOs, a JSON array of
+    TLOs or a STIX bundle.
+
+    Args:
+        fp: A file object opened in text mode.
+        format: "ndjson", "array" or "bundle".
+        header: For bundles, the properties of the bundle. Properties added
+            to it while TLOs are written, such as those of an `ObjectReader`
+            header found after "objects", are written by `close` after the
+            TLOs. A new bundle id is generated if none is given, and
+            ``spec_version`` defaults to `SPEC_VERSION`.
+
+    Example:
+        >>> with ObjectWriter(sys.stdout, "bundle") as writer:
+        >>>     writer.write(tlo)
+
+    """
+
+    def __init__(self, fp, format="ndjson", header=None):
+        assert format in FORMATS[1:], "Unknown format '{0}'...".format(format)
+
+        self.fp = fp
+        self.format = format
+        self.header = header
+        self.count = 0
+        self._started = False
+        self._closed = False
+        self._written = set()
+
+    def _start(self):
+        if self.format == "array":
+            self.fp.write("[\n")
+
+        elif self.format == "bundle":
+            header = dict(self.header or {})
+            header.pop("objects", None)
+            header.setdefault("type", "bundle")
+            self._written = set(header)
+
+            # Header serialized without its closing brace.
+            self.fp.write(json.dumps(header, sort_keys=True)[:-1])
+            self.fp.write(', "objects": [\n')
+
+        self._started = True
+
+    def write(self, obj):
+        """Write one TLO."""
+        if not self._started:
+            self._start()
+
+        if self.format == "ndjson":
+            self.fp.write(json.dumps(obj, sort_keys=True))
+            self.fp.write("\n")
+        else:
+            if self.count:
+                self.fp.write(",\n")
+            self.fp.write(json.dumps(obj, sort_keys=True))
+
+        self.count += 1
+
+    def close(self):
+        """Terminate the array or bundle. Does not close ``fp``."""
+        if self._closed:
+            return
+
+        if not self._started:
+            self._start()
+
+        if self.format == "array":
+            self.fp.write("\n]\n")
+        elif self.format == "bundle":
+            self.fp.write("\n]")
+            trailer = dict(
+                (key, value) for key, value in (self.header or {}).items()
+                if key not in self._written and key != "objects"
+            )
+
+            if "id" not in self._written:
+                trailer.setdefault("id", "bundle--{0}".format(uuid.uuid4()))
+
+            if "spec_version" not in self._written:
+                trailer.setdefault("spec_version", SPEC_VERSION)
+
+            for key in sorted(trailer):
+                self.fp.write(", {0}: {1}".format(
+                    json.dumps(key), json.dumps(trailer[key], sort_keys=True)))
+
+            self.fp.write("}\n")
+
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def mark_stream(infile, outfile, operations, input_format="auto",
+                output_format=None, raise_errors=True, chunk_size=65536):
+    """
+    Reads TLOs from ``infile``, applies marking operations to each one and
+    writes it to ``outfile`` before the next TLO is read.
+
+    Args:
+        infile: A file object opened in text mode.
+        outfile: A file object opened in text mode.
+        operations: Marking operations applied to every TLO. Refer to
+            `stixmarker.api.apply_operations` for their format.
+        input_format: One of `FORMATS`.
+        output_format: "ndjson", "array" or "bundle". Defaults to the format
+            of the input.
+        raise_errors: If False, TLOs failing an operation are written
+            unchanged instead of aborting.
+        chunk_size: Number of characters read from ``infile`` at once.
+
+    Returns:
+        dict: "objects" and "errors" counts.
+
+    """
+    reader = ObjectReader(infile, input_format, chunk_size)
+    writer = None
+    errors = 0
+
+    for obj in reader:
+        try:
+            api.apply_operations(obj, operations)
+        except AssertionError:
+            if raise_errors:
+                raise
+            errors += 1
+
+        if writer is None:
+            writer = ObjectWriter(outfile, output_format or reader.format,
+                                  reader.header)
+        writer.write(obj)
+
+    if writer is None:
+        writer = ObjectWriter(outfile, output_format or reader.format or
+                              "ndjson", reader.header)
+    writer.close()
+
+    return {"objects": writer.count, "errors": errors}
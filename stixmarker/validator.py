@@ -0,0 +1,236 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+"""
+Marking consistency checks for large corpora of STIX objects.
+
+Every object is checked for:
+
+* malformed ``object_marking_refs`` and ``granular_markings`` entries,
+* granular marking selectors that do not resolve in the object,
+* marking refs without a known marking definition.
+
+The selectors of an object are all validated against one `SelectorIndex`,
+so each object is walked once however many selectors it has. Objects are
+checked in chunks, optionally across a process pool.
+
+"""
+
+import collections
+import itertools
+import json
+import time
+
+from stixmarker.api import bulk
+from stixmarker.api import bundle
+from stixmarker.api import utils
+
+
+INVALID_SELECTOR = "invalid-selector"
+UNKNOWN_MARKING_REF = "unknown-marking-ref"
+MALFORMED_OBJECT_MARKINGS = "malformed-object-markings"
+MALFORMED_GRANULAR_MARKING = "malformed-granular-marking"
+
+_BUILTIN_REFS = frozenset(
+    definition["id"] for definition in
+    (bundle.TLP_WHITE, bundle.TLP_GREEN, bundle.TLP_AMBER, bundle.TLP_RED)
+)
+
+
+def _error(code, **details):
+    details["code"] = code
+    return details
+
+
+def check_object(obj, known_refs=()):
+    """
+    Check the markings of one object.
+
+    Args:
+        obj: A STIX object.
+        known_refs: Marking IDs with a known definition. The STIX 2.0 TLP
+            definitions are always known.
+
+    Returns:
+        tuple: The list of errors, each a dict with a ``code`` and the
+            ``selector``, ``marking_ref`` or ``position`` involved, and the
+            list of ``(marking_ref, selector)`` pairs whose ref is not in
+            ``known_refs``. ``selector`` is None for object level markings.
+
+    """
+    errors = []
+    unknown = []
+
+    def check_ref(ref, selector):
+        if ref not in known_refs and ref not in _BUILTIN_REFS:
+            unknown.append((ref, selector))
+
+    if "object_marking_refs" in obj:
+        refs = obj["object_marking_refs"]
+
+        if not isinstance(refs, list) or \
+                (refs and not utils.validate_markings(refs)):
+            errors.append(_error(MALFORMED_OBJECT_MARKINGS))
+        else:
+            for ref in refs:
+                check_ref(ref, None)
+
+    granular_markings = obj.get("granular_markings", [])
+
+    if not isinstance(granular_markings, list):
+        errors.append(_error(MALFORMED_GRANULAR_MARKING))
+        granular_markings = []
+
+    index = utils.SelectorIndex(obj)
+
+    for position, granular_marking in enumerate(granular_markings):
+        if not isinstance(granular_marking, dict):
+            errors.append(_error(MALFORMED_GRANULAR_MARKING, position=position))
+            continue
+
+        selectors = granular_marking.get("selectors")
+        refs = granular_marking.get("marking_ref")
+
+        if not isinstance(selectors, list) or not selectors or \
+                not utils.validate_markings(selectors) or \
+                not utils.validate_markings(refs):
+            errors.append(_error(MALFORMED_GRANULAR_MARKING, position=position))
+            continue
+
+        refs = utils.convert_to_list(refs)
+
+        for selector in selectors:
+            if not utils.validate_selector(obj, selector, index):
+                errors.extend(_error(INVALID_SELECTOR, selector=selector,
+                                     marking_ref=ref) for ref in refs)
+
+        for ref in refs:
+            for selector in selectors:
+                check_ref(ref, selector)
+
+    return errors, unknown
+
+
+def check_chunk(chunk, known_refs=()):
+    """
+    Worker entry point. Checks each ``(index, object)`` of ``chunk``.
+
+    Returns:
+        list: A tuple (index, id, definition id, errors, unknown refs,
+            seconds) per object. The definition id is the id of the object
+            if it is a marking definition, None otherwise.
+
+    """
+    known_refs = frozenset(known_refs)
+    results = []
+
+    for index, obj in chunk:
+        start = time.time()
+        errors, unknown = check_object(obj, known_refs)
+        definition = obj.get("id") \
+            if obj.get("type") == "marking-definition" else None
+
+        results.append((index, obj.get("id"), definition, errors, unknown,
+                        time.time() - start))
+
+    return results
+
+
+def validate_corpus(objects, known_refs=(), jobs=1, chunk_size=256,
+                    report_all=False):
+    """
+    Check the markings of every object of a corpus, yielding a report.
+
+    Marking definitions found in the corpus count as known, wherever they
+    appear in it.
+
+    Args:
+        objects: An iterable of STIX objects, read as it is consumed.
+        known_refs: Marking IDs defined outside the corpus.
+        jobs: Number of worker processes, 1 checks in this process.
+        chunk_size: Objects sent to a worker at once.
+        report_all: If True, also report objects without errors.
+
+    Yields:
+        dict: A record ``{"index", "id", "errors", "seconds"}`` per object
+            with errors, as soon as it is checked. Unknown marking refs are
+            only reported once the whole corpus is read, in one extra record
+            per object. The last record is ``{"summary": {...}}`` with the
+            counts and the aggregate timings.
+
+    """
+    start = time.time()
+    known_refs = frozenset(known_refs)
+    defined = set()
+    pending = collections.OrderedDict()  # (index, id) -> unknown refs
+    invalid = set()
+    timings = []
+    count = errors = 0
+
+    chunks = bulk.iter_chunks(enumerate(objects), max(1, chunk_size))
+    results = itertools.chain.from_iterable(
+        bulk.map_chunks(check_chunk, chunks, (known_refs,), jobs))
+
+    for index, id_, definition, object_errors, unknown, seconds in results:
+        count += 1
+        timings.append(seconds)
+
+        if definition is not None:
+            defined.add(definition)
+
+        unknown = [pair for pair in unknown if pair[0] not in defined]
+
+        if unknown:
+            pending[(index, id_)] = unknown
+
+        if object_errors:
+            errors += len(object_errors)
+            invalid.add(index)
+
+        if object_errors or report_all:
+            yield {"index": index, "id": id_, "errors": object_errors,
+                   "seconds": seconds}
+
+    for (index, id_), unknown in pending.items():
+        ref_errors = [
+            _error(UNKNOWN_MARKING_REF, marking_ref=ref, selector=selector)
+            for ref, selector in unknown if ref not in defined
+        ]
+
+        if ref_errors:
+            errors += len(ref_errors)
+            invalid.add(index)
+            yield {"index": index, "id": id_, "errors": ref_errors}
+
+    timings.sort()
+
+    yield {"summary": {
+        "objects": count,
+        "invalid_objects": len(invalid),
+        "errors": errors,
+        "elapsed": time.time() - start,
+        "check_seconds": {
+            "total": sum(timings),
+            "p50": bulk.percentile(timings, 0.50),
+            "p99": bulk.percentile(timings, 0.99),
+            "max": timings[-1] if timings else 0.0,
+        },
+    }}
+
+
+def write_report(records, fp):
+    """
+    Write report records as NDJSON to ``fp``.
+
+    Returns:
+        dict: The summary record.
+
+    """
+    summary = None
+
+    for record in records:
+        fp.write(json.dumps(record, sort_keys=True))
+        fp.write("\n")
+        summary = record.get("summary", summary)
+
+    return summary
@@ -0,0 +1,80 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import copy
+import unittest
+
+
+from stixmarker import api
+
+
+class BatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.test_tlo = \
+            {
+                "title": "test title",
+                "description": "test description",
+                "revision": 2,
+                "type": "test",
+                "object_marking_refs": ["marking-definition--9"],
+                "granular_markings": [
+                    {
+                        "selectors": ["description"],
+                        "marking_ref": "marking-definition--1"
+                    },
+                    {
+                        "selectors": ["revision", "description"],
+                        "marking_ref": "marking-definition--2"
+                    },
+                ]
+            }
+
+    def test_apply_operations_matches_api(self):
+        operations = [
+            ("add", ["title", "type"], ["marking-definition--3", "marking-definition--4"]),
+            ("remove", "description", "marking-definition--2"),
+            ("clear", ["revision"]),
+            ("set", "title", "marking-definition--5"),
+            ("add", None, "marking-definition--8"),
+            ("remove", None, "marking-definition--9"),
+        ]
+        expected = copy.deepcopy(self.test_tlo)
+
+        for operation in operations:
+            name, args = operation[0], operation[1:]
+            getattr(api, name + "_markings")(expected, *args)
+
+        api.apply_operations(self.test_tlo, operations)
+
+        self.assertEqual(self.test_tlo, expected)
+
+    def test_batch_clears_all_markings(self):
+        with api.MarkingBatch(self.test_tlo) as batch:
+            batch.clear_markings(["description", "revision"])
+            batch.clear_markings(None)
+
+        self.assertFalse("granular_markings" in self.test_tlo)
+        self.assertFalse("object_marking_refs" in self.test_tlo)
+
+    def test_batch_discarded_on_error(self):
+        expected = copy.deepcopy(self.test_tlo)
+
+        operations = [
+            ("add", "title", "marking-definition--3"),
+            ("remove", "title", "marking-definition--4"),
+        ]
+
+        self.assertRaises(AssertionError, api.apply_operations, self.test_tlo, operations)
+        self.assertEqual(self.test_tlo, expected)
+
+    def test_batch_bad_input(self):
+        self.assertRaises(AssertionError, api.apply_operations, self.test_tlo, [("add", "foo", "marking-definition--1")])
+        self.assertRaises(AssertionError, api.apply_operations, self.test_tlo, [("add", "title", "")])
+        self.assertRaises(AssertionError, api.apply_operations, self.test_tlo, [("clear", "title")])
+        self.assertRaises(AssertionError, api.apply_operations, self.test_tlo, [("mark", "title", "marking-definition--1")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import unittest
+
+
+from stixmarker.api import bulk
+
+
+def build_objects(count):
+    return [
+        {
+            "type": "malware",
+            "id": "malware--{0}".format(i),
+            "title": "malware {0}".format(i),
+            "description": "description {0}".format(i),
+        }
+        for i in range(count)
+    ]
+
+
+class BulkTests(unittest.TestCase):
+
+    def test_bulk_add_get_serial(self):
+        objects = build_objects(5)
+
+        bulk.add_markings(objects, "title", "marking-definition--1")
+
+        self.assertEqual(bulk.get_markings(objects, "title"), [["marking-definition--1"]] * 5)
+        self.assertEqual(bulk.is_marked(objects, "description"), [False] * 5)
+
+    def test_bulk_bundle_process_pool(self):
+        bundle = {"type": "bundle", "id": "bundle--1", "objects": build_objects(20)}
+
+        bulk.add_markings(bundle, ["title", "description"], "marking-definition--1", jobs=2, chunksize=3)
+        bulk.add_markings(bundle, None, "marking-definition--2", jobs=2, chunksize=3)
+
+        for obj in bundle["objects"]:
+            self.assertEqual(obj["object_marking_refs"], ["marking-definition--2"])
+            self.assertEqual(obj["granular_markings"][0]["selectors"], ["description", "title"])
+
+        results = bulk.is_marked(bundle, "title", "marking-definition--2", inherited=True, jobs=2, chunksize=3)
+        self.assertEqual(results, [True] * 20)
+
+    def test_bulk_thread_pool_keeps_order(self):
+        objects = build_objects(10)
+        objects[3]["granular_markings"] = [{"selectors": ["title"], "marking_ref": "marking-definition--3"}]
+
+        results = bulk.is_marked(objects, "title", jobs=3, executor="thread", chunksize=2)
+        self.assertEqual(results, [i == 3 for i in range(10)])
+
+        bulk.clear_markings(objects, "title", jobs=3, executor="thread", chunksize=2)
+        self.assertFalse("granular_markings" in objects[3])
+
+    def test_bulk_errors(self):
+        objects = build_objects(2)
+        del objects[1]["title"]
+
+        self.assertRaises(AssertionError, bulk.add_markings, objects, "title", "marking-definition--1")
+
+        results = bulk.add_markings(objects, "title", "marking-definition--1", raise_errors=False)
+        self.assertEqual(results[0], None)
+        self.assertTrue(isinstance(results[1], AssertionError))
+
+        self.assertRaises(AssertionError, bulk.apply, objects, "mark")
+        self.assertRaises(AssertionError, bulk.apply, {"type": "report"}, "is_marked", (None,))
+
+    def test_map_chunks(self):
+        chunks = list(bulk.iter_chunks(iter(range(7)), 3))
+        self.assertEqual(chunks, [[0, 1, 2], [3, 4, 5], [6]])
+
+        for jobs in (1, 2):
+            results = bulk.map_chunks(sorted, iter(chunks), (), jobs, "thread")
+            self.assertEqual(list(results), chunks)
+
+        self.assertEqual(bulk.percentile([], 0.5), 0.0)
+        self.assertEqual(bulk.percentile([1, 2, 3, 4], 0.5), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import unittest
+
+
+from stixmarker.api import bundle
+
+
+STATEMENT = {
+    "type": "marking-definition",
+    "id": "marking-definition--1",
+    "definition_type": "statement",
+    "definition": {"statement": "Copyright 2017, Example Corp"},
+}
+
+
+class BundleTests(unittest.TestCase):
+
+    def setUp(self):
+        self.indicator = \
+            {
+                "type": "indicator",
+                "id": "indicator--1",
+                "name": "test name",
+                "pattern": "[file:name = 'x']",
+                "x": {"y": ["hello", 88]},
+                "object_marking_refs": [bundle.TLP_GREEN["id"]],
+                "granular_markings": [
+                    {"selectors": ["pattern"], "marking_ref": bundle.TLP_AMBER["id"]},
+                    {"selectors": ["x"], "marking_ref": "marking-definition--1"},
+                    {"selectors": ["x.y.[0]"], "marking_ref": "marking-definition--unknown"},
+                ]
+            }
+        self.bundle = bundle.Bundle({
+            "type": "bundle",
+            "id": "bundle--1",
+            "objects": [STATEMENT, self.indicator],
+        })
+
+    def test_index(self):
+        self.assertEqual(len(self.bundle), 2)
+        self.assertIs(self.bundle.get("indicator--1"), self.indicator)
+        self.assertIsNone(self.bundle.get("indicator--2"))
+        self.assertEqual(self.bundle.resolve(["marking-definition--1", "marking-definition--unknown"]), [STATEMENT])
+        self.assertEqual(self.bundle.unresolved("indicator--1"), ["marking-definition--unknown"])
+
+        self.bundle.add({"type": "marking-definition", "id": "marking-definition--unknown", "definition_type": "statement",
+                         "definition": {"statement": "late"}})
+        self.assertEqual(self.bundle.unresolved(self.indicator), [])
+        self.assertRaises(AssertionError, self.bundle.get_markings, "indicator--2")
+
+    def test_effective_tlp(self):
+        self.assertEqual(self.bundle.effective_tlp("indicator--1"), "green")
+        self.assertEqual(self.bundle.effective_tlp("indicator--1", "name"), "green")
+        self.assertEqual(self.bundle.effective_tlp("indicator--1", "pattern"), "amber")
+        self.assertEqual(self.bundle.effective_tlp("indicator--1", ["name", "pattern"]), "amber")
+        self.assertIsNone(self.bundle.effective_tlp(STATEMENT))
+
+    def test_statements(self):
+        self.assertEqual(self.bundle.statements("indicator--1", "x.y.[1]"), [STATEMENT["definition"]["statement"]])
+        self.assertEqual(self.bundle.statements("indicator--1", "pattern"), [])
+
+    def test_bundle_from_list(self):
+        objects = bundle.Bundle([self.indicator])
+        self.assertEqual(objects.get_markings("indicator--1", "x.y.[0]"), [bundle.TLP_GREEN])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import gc
+import threading
+import unittest
+import weakref
+
+
+from stixmarker import api
+from stixmarker.api import cache
+from stixmarker.api import events
+
+
+class MarkingCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.test_tlo = \
+            {
+                "title": "test title",
+                "description": "test description",
+                "x": {"y": ["hello", 88]},
+                "object_marking_refs": ["marking-definition--9"],
+                "granular_markings": [
+                    {"selectors": ["x"], "marking_ref": "marking-definition--1"},
+                ]
+            }
+        self.cache = cache.MarkingCache(maxsize=2)
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_cache_hits(self):
+        first = self.cache.get_markings(self.test_tlo, "x.y.[1]", inherited=True)
+        second = self.cache.get_markings(self.test_tlo, api.parse_selector("x.y.[1]"), inherited=True)
+
+        self.assertEqual(set(first), set(["marking-definition--1", "marking-definition--9"]))
+        self.assertEqual(first, second)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        self.assertTrue(self.cache.is_marked(self.test_tlo, "x.y", "marking-definition--9", inherited=True))
+        self.assertTrue(self.cache.is_marked(self.test_tlo, "x.y", ["marking-definition--9"], inherited=True))
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 2))
+
+    def test_cache_invalidated_by_mutators(self):
+        self.assertFalse(self.cache.is_marked(self.test_tlo, "title"))
+
+        api.add_markings(self.test_tlo, "title", "marking-definition--2")
+        self.assertTrue(self.cache.is_marked(self.test_tlo, "title"))
+
+        api.apply_operations(self.test_tlo, [("clear", "title")])
+        self.assertFalse(self.cache.is_marked(self.test_tlo, "title"))
+        self.assertEqual(self.cache.hits, 0)
+
+        self.test_tlo["granular_markings"].append({"selectors": ["title"], "marking_ref": "marking-definition--3"})
+        self.assertFalse(self.cache.is_marked(self.test_tlo, "title"))
+        self.cache.invalidate(self.test_tlo)
+        self.assertTrue(self.cache.is_marked(self.test_tlo, "title"))
+
+    def test_cache_drops_stale_results(self):
+        self.cache.is_marked(self.test_tlo, "title")
+        self.cache.get_markings(self.test_tlo, "x")
+        entry = self.cache._entries[id(self.test_tlo)]
+        self.assertEqual(len(entry.results), 2)
+
+        api.add_markings(self.test_tlo, "title", "marking-definition--2")
+        self.assertEqual(entry.results, {})
+
+        self.assertTrue(self.cache.is_marked(self.test_tlo, "title"))
+        self.assertEqual(len(entry.results), 1)
+
+    def test_cache_counters_threads(self):
+        def run():
+            for _ in range(200):
+                self.cache.is_marked(self.test_tlo, "x.y", inherited=True)
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.cache.hits + self.cache.misses, 800)
+
+    def test_cache_released_without_close(self):
+        listeners = len(events._listeners)
+        dropped = cache.MarkingCache()
+        dropped.is_marked(self.test_tlo, "x")
+        self.assertEqual(len(events._listeners), listeners + 1)
+
+        ref = weakref.ref(dropped)
+        del dropped
+        gc.collect()
+
+        self.assertIsNone(ref())
+        self.assertEqual(len(events._listeners), listeners)
+        api.add_markings(self.test_tlo, "title", "marking-definition--2")
+
+    def test_cache_context_manager(self):
+        listeners = len(events._listeners)
+
+        with cache.MarkingCache() as scoped:
+            self.assertTrue(scoped.is_marked(self.test_tlo, "x"))
+            api.clear_markings(self.test_tlo, "x")
+            self.assertFalse(scoped.is_marked(self.test_tlo, "x"))
+
+        self.assertEqual(len(scoped), 0)
+        self.assertEqual(len(events._listeners), listeners)
+
+    def test_cache_bounded(self):
+        objects = [dict(self.test_tlo) for _ in range(3)]
+
+        for obj in objects:
+            self.cache.is_marked(obj, "x")
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertRaises(AssertionError, self.cache.get_markings, self.test_tlo, "foo")
+
+
+if __name__ == "__main__":
+    unittest.main()
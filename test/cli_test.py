@@ -0,0 +1,116 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import six
+
+from stixmarker import cli
+
+
+class CommandLineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input = os.path.join(self.directory, "input.json")
+        self.output = os.path.join(self.directory, "output.json")
+
+        objects = [
+            {"type": "malware", "id": "malware--{0}".format(i), "title": "malware {0}".format(i)}
+            for i in range(6)
+        ]
+
+        with open(self.input, "w") as f:
+            json.dump({"type": "bundle", "id": "bundle--1", "objects": objects}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_cli(self, *argv):
+        stderr = six.StringIO()
+        options = cli.build_parser().parse_args(list(argv))
+        status = cli.run(options, stderr=stderr)
+
+        return status, stderr.getvalue()
+
+    def read_output(self):
+        with open(self.output) as f:
+            return f.read()
+
+    def test_cli_add_bundle(self):
+        status, stderr = self.run_cli("add", self.input, "-s", "title", "-m", "marking-definition--1",
+                                      "-o", self.output, "--jobs", "2", "--chunk-size", "4", "--summary")
+        bundle = json.loads(self.read_output())
+
+        self.assertEqual(status, 0)
+        self.assertEqual(bundle["id"], "bundle--1")
+        self.assertEqual([o["id"] for o in bundle["objects"]], ["malware--{0}".format(i) for i in range(6)])
+        self.assertTrue(all(o["granular_markings"][0]["selectors"] == ["title"] for o in bundle["objects"]))
+        self.assertTrue("throughput" in stderr)
+
+    def test_cli_is_marked(self):
+        self.run_cli("add", self.input, "-m", "marking-definition--1", "-o", self.input + ".marked")
+        status, stderr = self.run_cli("is-marked", self.input + ".marked", "-s", "title", "--inherited",
+                                      "-o", self.output)
+        results = [json.loads(line) for line in self.read_output().splitlines()]
+
+        self.assertEqual(status, 0)
+        self.assertEqual(results[0], {"id": "malware--0", "result": True})
+        self.assertEqual(len(results), 6)
+
+    def test_cli_errors(self):
+        status, stderr = self.run_cli("clear", self.input, "-s", "description", "-o", self.output)
+        self.assertEqual(status, 1)
+        self.assertTrue(stderr.startswith("malware--0"))
+
+        status, stderr = self.run_cli("set", self.input, "-s", "description", "-m", "marking-definition--1",
+                                      "-o", self.output, "--keep-going", "--output-format", "ndjson")
+        self.assertEqual(status, 1)
+        self.assertEqual(len(stderr.splitlines()), 6)
+        self.assertEqual(len(self.read_output().splitlines()), 6)
+
+    def test_cli_stops_at_first_error(self):
+        with open(self.input) as f:
+            bundle = json.load(f)
+
+        for obj in bundle["objects"][:3]:
+            obj["description"] = "described"
+
+        with open(self.input, "w") as f:
+            json.dump(bundle, f)
+
+        status, stderr = self.run_cli("clear", self.input, "-s", "description", "-o", self.output, "--summary")
+        bundle = json.loads(self.read_output())
+
+        self.assertEqual(status, 1)
+        self.assertTrue(stderr.startswith("malware--3"))
+        self.assertTrue("throughput" in stderr)
+        self.assertEqual(bundle["id"], "bundle--1")
+        self.assertEqual([o["id"] for o in bundle["objects"]], ["malware--0", "malware--1", "malware--2"])
+
+    def test_cli_validate(self):
+        definitions = os.path.join(self.directory, "definitions.json")
+
+        with open(definitions, "w") as f:
+            json.dump([{"type": "marking-definition", "id": "marking-definition--1"}], f)
+
+        self.run_cli("add", self.input, "-s", "title", "-m", "marking-definition--1", "-o", self.input + ".marked")
+
+        status, stderr = self.run_cli("validate", self.input + ".marked", "-o", self.output, "--jobs", "2")
+        records = [json.loads(line) for line in self.read_output().splitlines()]
+        self.assertEqual(status, 1)
+        self.assertEqual(records[-1]["summary"]["invalid_objects"], 6)
+
+        status, stderr = self.run_cli("validate", self.input + ".marked", "-d", definitions, "-o", self.output, "--summary")
+        self.assertEqual(status, 0)
+        self.assertEqual(len(self.read_output().splitlines()), 1)
+        self.assertTrue(stderr.startswith("objects: 6  invalid: 0"))
+
+
+if __name__ == "__main__":
+    unittest.main()
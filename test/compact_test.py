@@ -0,0 +1,63 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import copy
+import unittest
+
+
+from stixmarker.api import compact
+
+
+class CompactTests(unittest.TestCase):
+
+    def setUp(self):
+        self.test_tlo = \
+            {
+                "type": "campaign",
+                "title": "test title",
+                "description": "test description",
+                "object_marking_refs": ["marking-definition--9"],
+                "granular_markings": [
+                    {
+                        "selectors": ["title", "description"],
+                        "marking_ref": "marking-definition--1"
+                    },
+                    {
+                        "selectors": ["description"],
+                        "marking_ref": ["marking-definition--2", "marking-definition--9"]
+                    },
+                ]
+            }
+
+    def test_roundtrip_lossless(self):
+        codec = compact.CompactCodec()
+        expected = copy.deepcopy(self.test_tlo)
+
+        markings = codec.encode(self.test_tlo, strip=True)
+        self.assertFalse("granular_markings" in self.test_tlo)
+        self.assertFalse("object_marking_refs" in self.test_tlo)
+
+        codec.restore(self.test_tlo, markings)
+        self.assertEqual(self.test_tlo, expected)
+
+    def test_interned_ids_shared(self):
+        codec = compact.CompactCodec()
+        first = codec.encode(self.test_tlo)
+        second = codec.encode(copy.deepcopy(self.test_tlo))
+
+        self.assertEqual(len(codec.refs), 3)
+        self.assertEqual(len(codec.selectors), 2)
+        self.assertEqual(list(first.object_marking_refs), list(second.object_marking_refs))
+        self.assertEqual(first.granular_markings[1].marking_ref[1], first.object_marking_refs[0])
+        self.assertRaises(AttributeError, setattr, first, "extra", 1)
+
+    def test_unmarked_tlo(self):
+        codec = compact.CompactCodec()
+        markings = codec.encode({"type": "campaign"})
+
+        self.assertEqual(codec.decode(markings), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
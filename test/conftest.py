@@ -0,0 +1,10 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import sys
+
+collect_ignore = []
+
+if sys.version_info < (3, 7):
+    # stixmarker.service is asyncio code that older interpreters cannot parse.
+    collect_ignore.append("service_test.py")
@@ -0,0 +1,88 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import copy
+import unittest
+
+
+from stixmarker import api
+from stixmarker.api import functional
+
+
+class FunctionalTests(unittest.TestCase):
+
+    def setUp(self):
+        self.test_tlo = \
+            {
+                "title": "test title",
+                "description": "test description",
+                "x": {"y": ["hello", 88], "z": {"foo1": "bar"}},
+                "object_marking_refs": ["marking-definition--0"],
+                "granular_markings": [
+                    {"selectors": ["title", "x.y"], "marking_ref": "marking-definition--1"},
+                    {"selectors": ["description"], "marking_ref": "marking-definition--2"},
+                ]
+            }
+        self.original = copy.deepcopy(self.test_tlo)
+
+    def assertUnchanged(self):
+        self.assertEqual(self.test_tlo, self.original)
+
+    def test_add_markings(self):
+        result = functional.add_markings(self.test_tlo, ["description", "x.z"], "marking-definition--1")
+
+        self.assertUnchanged()
+        self.assertIs(result["x"], self.test_tlo["x"])
+        self.assertTrue(api.is_marked(result, ["x.z", "description"], "marking-definition--1"))
+        self.assertFalse(api.is_marked(self.test_tlo, "x.z"))
+
+        result = functional.add_markings(self.test_tlo, None, "marking-definition--3")
+        self.assertUnchanged()
+        self.assertEqual(sorted(result["object_marking_refs"]), ["marking-definition--0", "marking-definition--3"])
+
+    def test_remove_and_clear_markings(self):
+        result = functional.remove_markings(self.test_tlo, "x.y", "marking-definition--1")
+        self.assertUnchanged()
+        self.assertFalse(api.is_marked(result, "x.y"))
+        self.assertTrue(api.is_marked(result, "title"))
+
+        result = functional.clear_markings(self.test_tlo, ["title", "x.y", "description"])
+        self.assertUnchanged()
+        self.assertNotIn("granular_markings", result)
+
+        result = functional.clear_markings(self.test_tlo, None)
+        self.assertUnchanged()
+        self.assertNotIn("object_marking_refs", result)
+
+    def test_set_markings_and_operations(self):
+        result = functional.set_markings(self.test_tlo, "title", "marking-definition--4")
+        self.assertUnchanged()
+        self.assertEqual(api.get_markings(result, "title"), ["marking-definition--4"])
+
+        result = functional.apply_operations(self.test_tlo, [("clear", "title"), ("add", "x.z", "marking-definition--5")])
+        self.assertUnchanged()
+        self.assertFalse(api.is_marked(result, "title"))
+        self.assertTrue(api.is_marked(result, "x.z", "marking-definition--5"))
+
+    def test_failed_operation(self):
+        self.assertRaises(AssertionError, functional.add_markings, self.test_tlo, "foo", "marking-definition--1")
+        self.assertUnchanged()
+
+    def test_copies_not_tracked(self):
+        self.test_tlo["id"] = "malware--1"
+
+        with api.MarkingIndex([self.test_tlo]) as index:
+            functional.add_markings(self.test_tlo, "x.z", "marking-definition--7")
+            functional.clear_markings(self.test_tlo, "title")
+
+            self.assertEqual(index.lookup("marking-definition--7"), [])
+            self.assertEqual(index.lookup("marking-definition--1"),
+                             [("malware--1", "title"), ("malware--1", "x.y")])
+
+            api.add_markings(self.test_tlo, "x.z", "marking-definition--7")
+            self.assertEqual(index.lookup("marking-definition--7"), [("malware--1", "x.z")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -950,5 +950,68 @@ class ClearMarkingTests(unittest.TestCase):
         self.assertRaises(AssertionError, api.clear_markings, self.test_tlo, [""])
 
 
+class IndexedEditTests(unittest.TestCase):
+
+    def test_edits_through_index_match_plain_calls(self):
+        def build():
+            return {
+                "title": "test title",
+                "description": "test description",
+                "x": {"y": ["hello", 88], "z": {"foo1": "bar"}},
+                "granular_markings": [
+                    {"selectors": ["title", "x.y.[1]"], "marking_ref": "marking-definition--1"},
+                    {"selectors": ["x"], "marking_ref": ["marking-definition--2", "marking-definition--1"]},
+                ]
+            }
+
+        operations = [
+            (api.add_markings, ("description", ["marking-definition--3", "marking-definition--1"])),
+            (api.remove_markings, ("x", "marking-definition--1")),
+            (api.clear_markings, (["title", "x.y.[1]"],)),
+            (api.set_markings, ("description", "marking-definition--4")),
+            (api.remove_markings, ("title", "marking-definition--4")),
+            (api.clear_markings, ("x.z",)),
+            (api.remove_markings, (["x", "description"], ["marking-definition--2", "marking-definition--3"])),
+        ]
+
+        plain = build()
+        indexed = build()
+        index = api.utils.SelectorIndex(indexed)
+
+        for function, args in operations:
+            try:
+                function(plain, *args)
+            except AssertionError:
+                self.assertRaises(AssertionError, function, indexed, *args, index=index)
+            else:
+                function(indexed, *args, index=index)
+
+            self.assertEqual(indexed, plain)
+
+        self.assertEqual(plain["granular_markings"], [
+            {"selectors": ["description"], "marking_ref": "marking-definition--4"},
+        ])
+
+    def test_lookups_through_index(self):
+        tlo = {
+            "title": "test title",
+            "x": {"y": ["hello", 88], "z": "bar"},
+            "granular_markings": [
+                {"selectors": ["x.y.[1]"], "marking_ref": "marking-definition--1"},
+            ]
+        }
+        index = api.utils.SelectorIndex(tlo)
+
+        self.assertEqual(api.get_markings(tlo, "x", descendants=True, index=index), ["marking-definition--1"])
+        self.assertTrue(index.trie is index.trie)
+
+        api.add_markings(tlo, "x", "marking-definition--2", index=index)
+        api.remove_markings(tlo, "x.y.[1]", "marking-definition--1", index=index)
+
+        self.assertEqual(api.get_markings(tlo, "x", descendants=True, index=index), ["marking-definition--2"])
+        self.assertTrue(api.is_marked(tlo, "x.z", "marking-definition--2", inherited=True, index=index))
+        self.assertFalse(api.is_marked(tlo, ["title", "x.y.[1]"], index=index))
+
+
 if __name__ == "__main__":
     unittest.main()
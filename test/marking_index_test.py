@@ -0,0 +1,76 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import unittest
+
+
+from stixmarker import api
+from stixmarker.api import bulk
+
+
+def build_objects():
+    return [
+        {
+            "type": "campaign",
+            "id": "campaign--1",
+            "title": "first",
+            "description": "first campaign",
+            "object_marking_refs": ["marking-definition--red"],
+            "granular_markings": [
+                {"selectors": ["description", "title"], "marking_ref": "marking-definition--amber"},
+            ]
+        },
+        {
+            "type": "campaign",
+            "id": "campaign--2",
+            "title": "second",
+            "description": "second campaign",
+        },
+    ]
+
+
+class MarkingIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.objects = build_objects()
+        self.index = api.MarkingIndex(self.objects)
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_lookup(self):
+        self.assertEqual(self.index.lookup("marking-definition--red"), [("campaign--1", None)])
+        self.assertEqual(self.index.lookup("marking-definition--amber"),
+                         [("campaign--1", "description"), ("campaign--1", "title")])
+        self.assertEqual(self.index.lookup("marking-definition--green"), [])
+        self.assertEqual(self.index.markings(), set(["marking-definition--red", "marking-definition--amber"]))
+
+    def test_tracks_api_mutators(self):
+        api.add_markings(self.objects[1], "title", "marking-definition--red")
+        api.clear_markings(self.objects[0], None)
+        api.remove_markings(self.objects[0], "title", "marking-definition--amber")
+
+        self.assertEqual(self.index.lookup("marking-definition--red"), [("campaign--2", "title")])
+        self.assertEqual(self.index.selectors("marking-definition--amber", "campaign--1"), set(["description"]))
+
+        api.apply_operations(self.objects[1], [("add", None, "marking-definition--green")])
+        self.assertEqual(self.index.objects("marking-definition--green"), set(["campaign--2"]))
+
+    def test_tracks_bulk_process_pool(self):
+        bulk.add_markings(self.objects, "description", "marking-definition--green", jobs=2, chunksize=1)
+
+        self.assertEqual(self.index.objects("marking-definition--green"), set(["campaign--1", "campaign--2"]))
+
+    def test_close_and_discard(self):
+        self.index.close()
+        api.add_markings(self.objects[1], "title", "marking-definition--red")
+        self.assertEqual(self.index.objects("marking-definition--red"), set(["campaign--1"]))
+
+        self.index.discard("campaign--1")
+        self.assertEqual(self.index.markings(), set())
+        self.assertFalse("campaign--1" in self.index)
+
+
+if __name__ == "__main__":
+    unittest.main()
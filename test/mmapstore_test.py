@@ -0,0 +1,85 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import six
+
+from stixmarker import api
+
+if sys.version_info >= (3, 3):
+    from stixmarker.store import mmapstore
+
+
+@unittest.skipIf(sys.version_info < (3, 3), "The mmap store requires Python 3.3")
+class MarkingStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "markings.store")
+        self.test_tlos = [
+            {
+                "id": "indicator--1",
+                "title": "test title",
+                "x": {"y": ["hello", 88], "z": {"foo1": "bar"}},
+                "object_marking_refs": ["marking-definition--0"],
+                "granular_markings": [
+                    {"selectors": ["title", "x.y.[1]"], "marking_ref": "marking-definition--1"},
+                    {"selectors": ["x"], "marking_ref": "marking-definition--2"},
+                    {"selectors": ["x.z.foo1"], "marking_ref": ["marking-definition--3", "marking-definition--1"]},
+                ]
+            },
+            {
+                "id": "indicator--0",
+                "title": "unmarked",
+            },
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load_ndjson(self):
+        infile = six.StringIO("\n".join(json.dumps(tlo) for tlo in self.test_tlos))
+        self.assertEqual(mmapstore.load_ndjson(infile, self.path), 2)
+
+        with mmapstore.MarkingStore(self.path) as store:
+            self.assertEqual(len(store), 2)
+            self.assertEqual(list(store), ["indicator--0", "indicator--1"])
+            self.assertIn("indicator--1", store)
+            self.assertNotIn("indicator--2", store)
+            self.assertEqual(store.get_markings("indicator--0", "title", inherited=True), [])
+            self.assertRaises(AssertionError, store.get_markings, "indicator--2", None)
+
+    def test_queries_match_api(self):
+        mmapstore.build_store(self.test_tlos, self.path)
+        tlo = self.test_tlos[0]
+
+        with mmapstore.MarkingStore(self.path) as store:
+            for selector in ("title", "x", "x.y", "x.y.[1]", "x.z", ["x.z.foo1", "title"]):
+                for inherited in (False, True):
+                    for descendants in (False, True):
+                        self.assertEqual(store.get_markings("indicator--1", selector, inherited, descendants),
+                                         sorted(api.get_markings(tlo, selector, inherited, descendants)))
+
+                        for marking in (None, "marking-definition--1", ["marking-definition--1", "marking-definition--3"]):
+                            self.assertEqual(store.is_marked("indicator--1", selector, marking, inherited, descendants),
+                                             api.is_marked(tlo, selector, marking, inherited, descendants))
+
+            self.assertEqual(store.get_markings("indicator--1", None), ["marking-definition--0"])
+            self.assertTrue(store.is_marked("indicator--1", None, ["marking-definition--9", "marking-definition--0"]))
+
+    def test_bad_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a marking store, at all")
+
+        self.assertRaises(AssertionError, mmapstore.MarkingStore, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import unittest
+
+
+from stixmarker import api
+from stixmarker.api import parsing
+
+
+class SelectorTests(unittest.TestCase):
+
+    def test_parse_selector(self):
+        selector = api.parse_selector("cybox.objects.[0].hashes.sha1")
+
+        self.assertEqual(selector.segments, ("cybox", "objects", 0, "hashes", "sha1"))
+        self.assertEqual(str(selector), "cybox.objects.[0].hashes.sha1")
+        self.assertEqual(api.parse_selector("x.[-2].[01]").segments, ("x", "[-2]", "[01]"))
+        self.assertEqual(api.Selector.from_segments(["c", 2, "g"]), api.parse_selector("c.[2].g"))
+
+    def test_parse_selector_cached(self):
+        first = api.parse_selector("description")
+
+        self.assertTrue(api.parse_selector("description") is first)
+        self.assertTrue(api.parse_selector(first) is first)
+        self.assertRaises(AttributeError, setattr, first, "text", "title")
+
+    def test_is_ancestor_of(self):
+        selector = api.parse_selector("x.y")
+
+        self.assertTrue(selector.is_ancestor_of("x.y.[1]"))
+        self.assertFalse(selector.is_ancestor_of("x.y"))
+        self.assertFalse(selector.is_ancestor_of("x.yz"))
+
+    def test_api_accepts_selectors(self):
+        tlo = {"title": "foo", "x": {"y": ["hello", 88]}}
+        title = parsing.parse_selector("title")
+        item = parsing.parse_selector("x.y.[1]")
+
+        api.add_markings(tlo, [title, item], "marking-definition--1")
+        self.assertEqual(tlo["granular_markings"], [{"selectors": ["title", "x.y.[1]"], "marking_ref": "marking-definition--1"}])
+
+        self.assertTrue(api.is_marked(tlo, item, "marking-definition--1"))
+        self.assertEqual(api.get_markings(tlo, parsing.parse_selector("x"), descendants=True), ["marking-definition--1"])
+
+        api.remove_markings(tlo, title, "marking-definition--1")
+        api.clear_markings(tlo, item)
+        self.assertFalse("granular_markings" in tlo)
+
+        self.assertRaises(AssertionError, api.add_markings, tlo, parsing.parse_selector("x.z"), "marking-definition--1")
+
+
+if __name__ == "__main__":
+    unittest.main()
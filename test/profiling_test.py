@@ -0,0 +1,68 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import unittest
+
+
+from stixmarker import api
+from stixmarker.api import profiling
+from stixmarker.api import utils
+
+
+class ProfilingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.test_tlo = \
+            {
+                "title": "test title",
+                "description": "test description",
+                "x": {"y": ["hello", 88], "z": {"foo1": "bar"}},
+                "granular_markings": [
+                    {"selectors": ["title"], "marking_ref": "marking-definition--1"},
+                ]
+            }
+
+    def tearDown(self):
+        profiling.disable()
+        profiling.reset()
+
+    def test_disabled_by_default(self):
+        original = utils.validate
+
+        self.assertFalse(profiling.is_enabled())
+        api.add_markings(self.test_tlo, "description", "marking-definition--1")
+        self.assertEqual(profiling.get_stats(), {})
+
+        profiling.enable()
+        self.assertIsNot(utils.validate, original)
+        profiling.disable()
+        self.assertIs(utils.validate, original)
+
+    def test_profile_counters(self):
+        with profiling.profile() as result:
+            api.add_markings(self.test_tlo, ["description", "x.y.[1]"], "marking-definition--1")
+            api.is_marked(self.test_tlo, "x.y")
+            nodes = list(utils.iterpath(self.test_tlo))
+
+        self.assertFalse(profiling.is_enabled())
+        self.assertEqual(result.stats["api.add_markings"].calls, 1)
+        self.assertEqual(result.stats["api.add_markings"].size, 2)
+        self.assertEqual(result.stats["api.is_marked"].calls, 1)
+        self.assertEqual(result.stats["utils.validate"].calls, 2)
+        self.assertEqual(result.stats["utils.validate"].size, 3)
+        self.assertEqual(result.stats["utils.iterpath"], profiling.Stats(1, result.stats["utils.iterpath"].time, len(nodes)))
+        self.assertGreaterEqual(result.stats["api.add_markings"].time, 0)
+
+    def test_profile_keeps_enabled_state(self):
+        profiling.enable()
+
+        with profiling.profile():
+            api.apply_operations(self.test_tlo, [("clear", "title"), ("add", "title", "marking-definition--2")])
+
+        self.assertTrue(profiling.is_enabled())
+        self.assertEqual(profiling.get_stats()["api.apply_operations"].size, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import copy
+import unittest
+
+
+from stixmarker import api
+
+
+class RedactionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.test_tlo = \
+            {
+                "title": "test title",
+                "description": "test description",
+                "labels": ["a", "b", "c"],
+                "x": {"y": {"z": "secret"}, "w": "public"},
+                "object_marking_refs": ["marking-definition--0"],
+                "granular_markings": [
+                    {"selectors": ["description", "labels.[0]"], "marking_ref": "marking-definition--red"},
+                    {"selectors": ["labels.[2]", "x.w"], "marking_ref": "marking-definition--green"},
+                    {"selectors": ["x.y"], "marking_ref": "marking-definition--red"},
+                ]
+            }
+
+    def test_redact_denied(self):
+        original = copy.deepcopy(self.test_tlo)
+        result = api.redact(self.test_tlo, denied="marking-definition--red")
+
+        self.assertEqual(self.test_tlo, original)
+        self.assertEqual(result["title"], "test title")
+        self.assertNotIn("description", result)
+        self.assertEqual(result["labels"], ["b", "c"])
+        self.assertEqual(result["x"], {"w": "public"})
+        self.assertEqual(result["object_marking_refs"], ["marking-definition--0"])
+        self.assertEqual(result["granular_markings"], [
+            {"selectors": ["labels.[1]", "x.w"], "marking_ref": "marking-definition--green"},
+        ])
+        self.assertTrue(api.is_marked(result, "labels.[1]", "marking-definition--green"))
+
+    def test_redact_allowed(self):
+        result = api.redact(self.test_tlo, allowed=["marking-definition--0", "marking-definition--green"])
+
+        self.assertEqual(set(result), set(["title", "labels", "x", "object_marking_refs", "granular_markings"]))
+        self.assertEqual(result["x"], {"w": "public"})
+
+        self.assertIsNone(api.redact(self.test_tlo, allowed="marking-definition--green"))
+
+    def test_redact_inherited(self):
+        self.test_tlo["granular_markings"].append({"selectors": ["x.y.z"], "marking_ref": "marking-definition--green"})
+
+        result = api.redact(self.test_tlo, denied="marking-definition--red")
+        self.assertNotIn("y", result["x"])
+
+        result = api.redact(self.test_tlo, denied="marking-definition--green")
+        self.assertNotIn("x", result)
+        self.assertEqual(result["labels"], ["a", "b"])
+
+    def test_redact_unmarked(self):
+        del self.test_tlo["granular_markings"]
+
+        result = api.redact(self.test_tlo, denied="marking-definition--red")
+        self.assertEqual(result, self.test_tlo)
+        self.assertIsNot(result["x"], self.test_tlo["x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
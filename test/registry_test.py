@@ -0,0 +1,62 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import unittest
+
+
+from stixmarker import api
+
+
+class MarkingRegistryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.test_tlo = \
+            {
+                "title": "test title",
+                "description": "test description",
+                "x": {"y": ["hello", 88], "z": {"foo1": "bar"}},
+                "object_marking_refs": ["marking-definition--0"],
+                "granular_markings": [
+                    {"selectors": ["title", "x.y.[1]"], "marking_ref": "marking-definition--1"},
+                    {"selectors": ["x"], "marking_ref": "marking-definition--2"},
+                    {"selectors": ["x.y.[1]"], "marking_ref": "marking-definition--3"},
+                ]
+            }
+        self.registry = api.MarkingRegistry([{"id": "marking-definition--3"}])
+
+    def test_registry_bits(self):
+        self.assertEqual(self.registry.register("marking-definition--3"), 1)
+        self.assertEqual(self.registry.register("marking-definition--1"), 2)
+        self.assertEqual(self.registry.mask(["marking-definition--1", "marking-definition--9"]), 2)
+        self.assertNotIn("marking-definition--9", self.registry)
+        self.assertEqual(self.registry.refs(3), ["marking-definition--3", "marking-definition--1"])
+
+    def test_get_markings(self):
+        compiled = self.registry.compile(self.test_tlo)
+
+        for selector in ("title", "x", "x.y", "x.y.[1]", "x.z.foo1"):
+            for inherited in (False, True):
+                for descendants in (False, True):
+                    self.assertEqual(
+                        set(compiled.get_markings(selector, inherited, descendants)),
+                        set(api.get_markings(self.test_tlo, selector, inherited, descendants)))
+
+        self.assertEqual(compiled.get_markings(None), ["marking-definition--0"])
+        self.assertRaises(AssertionError, compiled.get_markings, "foo")
+
+    def test_is_marked(self):
+        compiled = self.registry.compile(self.test_tlo)
+
+        self.assertTrue(compiled.is_marked("x.y.[1]", ["marking-definition--1", "marking-definition--3"]))
+        self.assertFalse(compiled.is_marked("x.y.[1]", ["marking-definition--1", "marking-definition--9"]))
+        self.assertFalse(compiled.is_marked("x.y.[1]", "marking-definition--2"))
+        self.assertTrue(compiled.is_marked("x.y.[1]", "marking-definition--2", inherited=True))
+        self.assertTrue(compiled.is_marked("x", "marking-definition--3", descendants=True))
+        self.assertFalse(compiled.is_marked("description"))
+        self.assertTrue(compiled.is_marked(None, ["marking-definition--9", "marking-definition--0"]))
+        self.assertTrue(self.registry.is_marked(self.test_tlo, "title", "marking-definition--1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
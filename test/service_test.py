@@ -0,0 +1,107 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from stixmarker import service
+
+
+def _tlo():
+    return {
+        "id": "campaign--1",
+        "title": "test title",
+        "description": "test description",
+        "object_marking_refs": ["marking-definition--0"],
+        "granular_markings": [
+            {"selectors": ["title"], "marking_ref": "marking-definition--1"},
+        ]
+    }
+
+
+class MarkingServiceTests(unittest.TestCase):
+
+    def run_service(self, scenario, jobs=0, path=None):
+        async def main():
+            marking_service = service.MarkingService(jobs=jobs, max_batch=4)
+            await marking_service.start(port=0, path=path)
+
+            if path is None:
+                host, port = marking_service.address
+                client = await service.Client.connect(host, port)
+            else:
+                client = await service.Client.connect(path=path)
+
+            try:
+                return await scenario(client)
+            finally:
+                await client.close()
+                await marking_service.close()
+
+        return asyncio.run(main())
+
+    def test_operations(self):
+        async def scenario(client):
+            status, response = await client.call(
+                "add_markings", object=_tlo(), selectors=["description"], marking="marking-definition--2")
+            self.assertEqual(status, 200)
+            tlo = response["object"]
+
+            self.assertEqual(
+                await client.call("is_marked", object=tlo, selectors="description", marking="marking-definition--2"),
+                (200, {"result": True}))
+            status, response = await client.call("get_markings", object=tlo, selectors="title", inherited=True)
+            self.assertEqual(sorted(response["result"]), ["marking-definition--0", "marking-definition--1"])
+
+            status, response = await client.call("clear_markings", objects=[tlo, _tlo()], selectors="title")
+            self.assertEqual(status, 200)
+            self.assertEqual(len(response["results"]), 2)
+            self.assertNotIn("granular_markings", response["results"][1]["object"])
+
+        self.run_service(scenario)
+
+    def test_errors(self):
+        async def scenario(client):
+            status, response = await client.call("add_markings", object=_tlo(), selectors="foo", marking="marking-definition--2")
+            self.assertEqual(status, 400)
+            self.assertIn("error", response)
+
+            status, response = await client.call("frobnicate", object=_tlo())
+            self.assertEqual(status, 404)
+
+            status, response = await client.call("is_marked", selectors="title")
+            self.assertEqual(status, 400)
+
+            # The connection is still usable after errors.
+            self.assertEqual(await client.call("is_marked", object=_tlo(), selectors="title"), (200, {"result": True}))
+
+        self.run_service(scenario)
+
+    def test_concurrent_requests_in_process_pool(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        async def scenario(client):
+            path = os.path.join(directory, "service.sock")
+            clients = [await service.Client.connect(path=path) for _ in range(6)]
+
+            try:
+                responses = await asyncio.gather(*[
+                    c.call("is_marked", object=_tlo(), selectors="title", marking="marking-definition--1")
+                    for c in clients
+                ])
+            finally:
+                for c in clients:
+                    await c.close()
+
+            self.assertEqual(responses, [(200, {"result": True})] * 6)
+
+        self.run_service(scenario, jobs=2, path=os.path.join(directory, "service.sock"))
+
+
+if __name__ == "__main__":
+    unittest.main()
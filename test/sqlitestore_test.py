@@ -0,0 +1,125 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import six
+
+from stixmarker import api
+from stixmarker.store import sqlitestore
+
+
+class SQLiteMarkingStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "markings.db")
+        self.test_tlos = [
+            {
+                "id": "indicator--1",
+                "title": "test title",
+                "x": {"y": ["hello", 88], "z": {"foo1": "bar"}},
+                "object_marking_refs": ["marking-definition--0"],
+                "granular_markings": [
+                    {"selectors": ["title", "x.y.[1]"], "marking_ref": "marking-definition--1"},
+                    {"selectors": ["x"], "marking_ref": "marking-definition--2"},
+                    {"selectors": ["x.z.foo1"], "marking_ref": ["marking-definition--3", "marking-definition--1"]},
+                ]
+            },
+            {
+                "id": "indicator--0",
+                "title": "unmarked",
+            },
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load_ndjson(self):
+        infile = six.StringIO("\n".join(json.dumps(tlo) for tlo in self.test_tlos))
+
+        with sqlitestore.SQLiteMarkingStore(self.path) as store:
+            self.assertEqual(store.load_ndjson(infile, batch_size=1), 2)
+
+        with sqlitestore.SQLiteMarkingStore(self.path) as store:
+            self.assertEqual(len(store), 2)
+            self.assertEqual(list(store), ["indicator--0", "indicator--1"])
+            self.assertIn("indicator--1", store)
+            self.assertNotIn("indicator--2", store)
+            self.assertEqual(store.get_markings("indicator--0", "title", inherited=True), [])
+            self.assertRaises(AssertionError, store.get_markings, "indicator--2", None)
+
+    def test_reload_replaces_markings(self):
+        with sqlitestore.SQLiteMarkingStore() as store:
+            store.load(self.test_tlos)
+            store.load([{"id": "indicator--1", "granular_markings": [
+                {"selectors": ["title"], "marking_ref": "marking-definition--4"},
+            ]}])
+
+            self.assertEqual(len(store), 2)
+            self.assertEqual(store.get_markings("indicator--1", None), [])
+            self.assertEqual(store.get_markings("indicator--1", "title"), ["marking-definition--4"])
+            self.assertEqual(store.get_markings("indicator--1", "x", descendants=True), [])
+
+    def test_failed_batch_rolls_back(self):
+        bad_tlo = {"id": "indicator--2", "granular_markings": [
+            {"selectors": [{"not": "a selector"}], "marking_ref": "marking-definition--0"},
+        ]}
+
+        with sqlitestore.SQLiteMarkingStore() as store:
+            self.assertRaises(sqlite3.Error, store.load, [bad_tlo])
+            self.assertEqual(len(store), 0)
+
+            store.load(self.test_tlos)
+
+            self.assertEqual(store.get_markings("indicator--1", None), ["marking-definition--0"])
+            self.assertTrue(store.is_marked("indicator--1", None))
+            self.assertEqual(store.get_markings("indicator--1", "title", inherited=True),
+                             ["marking-definition--0", "marking-definition--1"])
+
+    def test_queries_match_api(self):
+        tlo = self.test_tlos[0]
+
+        with sqlitestore.SQLiteMarkingStore() as store:
+            store.load(self.test_tlos)
+
+            for selector in ("title", "x", "x.y", "x.y.[1]", "x.z", ["x.z.foo1", "title"]):
+                for inherited in (False, True):
+                    for descendants in (False, True):
+                        self.assertEqual(store.get_markings("indicator--1", selector, inherited, descendants),
+                                         sorted(api.get_markings(tlo, selector, inherited, descendants)))
+
+                        for marking in (None, "marking-definition--1", ["marking-definition--1", "marking-definition--3"]):
+                            self.assertEqual(store.is_marked("indicator--1", selector, marking, inherited, descendants),
+                                             api.is_marked(tlo, selector, marking, inherited, descendants))
+
+            self.assertEqual(store.get_markings("indicator--1", None), ["marking-definition--0"])
+            self.assertTrue(store.is_marked("indicator--1", None, ["marking-definition--9", "marking-definition--0"]))
+
+    def test_many_selectors(self):
+        count = 2000
+        tlo = {"id": "indicator--2", "granular_markings": [
+            {"selectors": ["f{0}".format(i) for i in range(0, count, 100)], "marking_ref": "marking-definition--5"},
+        ]}
+        selectors = ["f{0}.a".format(i) for i in range(count)]
+
+        with sqlitestore.SQLiteMarkingStore() as store:
+            if hasattr(store._connection, "setlimit"):
+                # The host parameter limit of older SQLite builds.
+                store._connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+
+            store.load([tlo])
+
+            self.assertEqual(store.get_markings("indicator--2", selectors), [])
+            self.assertEqual(store.get_markings("indicator--2", selectors, inherited=True), ["marking-definition--5"])
+            self.assertTrue(store.is_marked("indicator--2", selectors, "marking-definition--5", inherited=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import json
+import unittest
+
+import six
+
+from stixmarker import stream
+
+
+def build_objects(count):
+    return [
+        {
+            "type": "malware",
+            "id": "malware--{0}".format(i),
+            "title": "malware {0}".format(i),
+            "revision": i * 1000,
+            "labels": ["ransomware"] * (i % 3),
+        }
+        for i in range(count)
+    ]
+
+
+class ReaderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.objects = build_objects(25)
+
+    def read(self, data, format="auto"):
+        reader = stream.ObjectReader(six.StringIO(data), format, chunk_size=7)
+        return reader, list(reader)
+
+    def test_read_ndjson(self):
+        data = "\n".join(json.dumps(o) for o in self.objects) + "\n"
+        reader, objects = self.read(data)
+
+        self.assertEqual(objects, self.objects)
+        self.assertEqual(reader.format, "ndjson")
+
+    def test_read_array(self):
+        reader, objects = self.read(json.dumps(self.objects, indent=4))
+
+        self.assertEqual(objects, self.objects)
+        self.assertEqual(reader.format, "array")
+        self.assertEqual(self.read("[ ]")[1], [])
+
+    def test_read_bundle(self):
+        bundle = {"type": "bundle", "id": "bundle--1", "spec_version": "2.0", "objects": self.objects}
+        reader, objects = self.read(json.dumps(bundle, indent=2))
+
+        self.assertEqual(objects, self.objects)
+        self.assertEqual(reader.format, "bundle")
+        self.assertEqual(reader.header, {"type": "bundle", "id": "bundle--1", "spec_version": "2.0"})
+
+    def test_read_bundle_trailing_properties(self):
+        bundle = {"type": "bundle", "id": "bundle--1", "spec_version": "2.0", "objects": self.objects}
+        reader, objects = self.read(json.dumps(bundle, sort_keys=True))
+
+        self.assertEqual(objects, self.objects)
+        self.assertEqual(reader.format, "bundle")
+        self.assertEqual(reader.header, {"type": "bundle", "id": "bundle--1", "spec_version": "2.0"})
+
+    def test_read_bad_input(self):
+        self.assertRaises(ValueError, self.read, '[{"type": "malware"} {"type": "malware"}]')
+        self.assertRaises(ValueError, self.read, '{"type": "malware"}', "bundle")
+        self.assertRaises(ValueError, self.read, '[{"type": "malware"}] 3')
+
+
+class MarkStreamTests(unittest.TestCase):
+
+    def test_mark_stream_bundle(self):
+        bundle = {"type": "bundle", "id": "bundle--1", "objects": build_objects(10)}
+        output = six.StringIO()
+
+        stats = stream.mark_stream(
+            six.StringIO(json.dumps(bundle)),
+            output,
+            [("add", "title", "marking-definition--1"), ("add", None, "marking-definition--2")],
+            chunk_size=16,
+        )
+
+        result = json.loads(output.getvalue())
+        self.assertEqual(stats, {"objects": 10, "errors": 0})
+        self.assertEqual(result["id"], "bundle--1")
+        self.assertEqual(len(result["objects"]), 10)
+
+        for obj in result["objects"]:
+            self.assertEqual(obj["granular_markings"], [{"selectors": ["title"], "marking_ref": "marking-definition--1"}])
+            self.assertEqual(obj["object_marking_refs"], ["marking-definition--2"])
+
+    def test_mark_stream_bundle_trailing_properties(self):
+        bundle = {"type": "bundle", "id": "bundle--1", "spec_version": "2.0", "objects": build_objects(3)}
+        data = json.dumps(bundle, sort_keys=True)
+        # Properties sorting after "objects", including the id.
+        data = data.replace('"id": "bundle--1", ', "")[:-1] + ', "id": "bundle--1"}'
+        output = six.StringIO()
+
+        stream.mark_stream(six.StringIO(data), output, [("add", None, "marking-definition--2")])
+
+        result = json.loads(output.getvalue())
+        self.assertEqual(result["id"], "bundle--1")
+        self.assertEqual(result["spec_version"], "2.0")
+        self.assertEqual(result["type"], "bundle")
+        self.assertEqual(len(result["objects"]), 3)
+
+    def test_mark_stream_ndjson_to_bundle(self):
+        data = "\n".join(json.dumps(o) for o in build_objects(2))
+        output = six.StringIO()
+
+        stream.mark_stream(six.StringIO(data), output, [("add", None, "marking-definition--2")],
+                           output_format="bundle")
+
+        result = json.loads(output.getvalue())
+        self.assertEqual(result["type"], "bundle")
+        self.assertEqual(result["spec_version"], "2.0")
+        self.assertTrue(result["id"].startswith("bundle--"))
+        self.assertEqual(len(result["objects"]), 2)
+
+        output = six.StringIO()
+
+        with stream.ObjectWriter(output, "bundle", {"spec_version": "2.1"}) as writer:
+            writer.write(build_objects(1)[0])
+
+        self.assertEqual(json.loads(output.getvalue())["spec_version"], "2.1")
+
+    def test_mark_stream_ndjson_errors(self):
+        objects = build_objects(4)
+        del objects[2]["title"]
+        data = "\n".join(json.dumps(o) for o in objects)
+        output = six.StringIO()
+
+        self.assertRaises(AssertionError, stream.mark_stream, six.StringIO(data), six.StringIO(),
+                          [("add", "title", "marking-definition--1")])
+
+        stats = stream.mark_stream(six.StringIO(data), output, [("add", "title", "marking-definition--1")],
+                                   output_format="array", raise_errors=False)
+
+        result = json.loads(output.getvalue())
+        self.assertEqual(stats, {"objects": 4, "errors": 1})
+        self.assertFalse("granular_markings" in result[2])
+        self.assertTrue("granular_markings" in result[3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import unittest
+
+
+from stixmarker import api
+from stixmarker.api import trie
+
+
+class SelectorTrieTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.compiled = trie.SelectorTrie([
+            {"selectors": ["x"], "marking_ref": "1"},
+            {"selectors": ["x.y", "x.z.foo"], "marking_ref": ["2", "3"]},
+            {"selectors": "x.y.[1]", "marking_ref": "4"},
+        ])
+
+    def test_trie_exact(self):
+        self.assertEqual(self.compiled.get_markings("x"), set(["1"]))
+        self.assertEqual(self.compiled.get_markings("x.y"), set(["2", "3"]))
+        self.assertEqual(self.compiled.get_markings("x.z"), set())
+        self.assertEqual(self.compiled.get_markings("w"), set())
+
+    def test_trie_inherited(self):
+        self.assertEqual(self.compiled.get_markings("x.y.[1]", inherited=True), set(["1", "2", "3", "4"]))
+        self.assertEqual(self.compiled.get_markings("x.y.[0]", inherited=True), set(["1", "2", "3"]))
+        self.assertEqual(self.compiled.get_markings("x.z.bar", inherited=True), set(["1"]))
+
+    def test_trie_descendants(self):
+        self.assertEqual(self.compiled.get_markings("x", descendants=True), set(["1", "2", "3", "4"]))
+        self.assertEqual(self.compiled.get_markings("x.z", descendants=True), set(["2", "3"]))
+        self.assertEqual(self.compiled.get_markings("x.y.[1]", descendants=True), set(["4"]))
+        self.assertFalse(self.compiled.is_marked("x.y.[0]", descendants=True))
+
+    def test_trie_root(self):
+        root = self.compiled.root
+
+        self.assertEqual(list(root.children), ["x"])
+        self.assertEqual(root.children["x"].refs, set(["1"]))
+        self.assertEqual(sorted(root.children["x"].children["y"].children), [1])
+
+    def test_trie_payload(self):
+        masks = trie.SelectorTrie([
+            {"selectors": ["x"], "marking_ref": "1"},
+            {"selectors": ["x.y"], "marking_ref": ["2", "3"]},
+        ], payload=lambda refs: sum(1 << int(ref) for ref in refs))
+
+        self.assertEqual(masks.lookup("x.y", inherited=True), (12, 14))
+        self.assertEqual(masks.get_markings("x", descendants=True), 14)
+        self.assertEqual(masks.lookup("x.w", inherited=True), (0, 2))
+
+    def test_trie_remove(self):
+        compiled = trie.SelectorTrie([
+            {"selectors": ["x.y", "x.z"], "marking_ref": ["1", "2"]},
+        ])
+
+        compiled.remove("x.y", ["1"])
+        compiled.remove("x.w", ["2"])
+        self.assertEqual(compiled.get_markings("x", descendants=True), set(["1", "2"]))
+
+        compiled.remove("x.z", ["1"])
+        self.assertEqual(compiled.get_markings("x", descendants=True), set(["2"]))
+        self.assertEqual(compiled.get_markings("x.y.[0]", inherited=True), set(["2"]))
+
+        compiled.insert("x.y.[0]", ["3"])
+        self.assertEqual(compiled.get_markings("x", descendants=True), set(["2", "3"]))
+
+    def test_segments_matched_whole(self):
+        tlo = {
+            "description": "test description",
+            "description_x": "other description",
+            "granular_markings": [
+                {"selectors": ["description_x"], "marking_ref": "marking-definition--1"},
+            ]
+        }
+
+        self.assertEqual(api.get_markings(tlo, "description", descendants=True), [])
+        self.assertFalse(api.is_marked(tlo, "description", descendants=True))
+
+        api.set_markings(tlo, "description_x", "marking-definition--2")
+        api.add_markings(tlo, "description", "marking-definition--3")
+        self.assertEqual(api.get_markings(tlo, "description_x", inherited=True), ["marking-definition--2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import unittest
+
+
+from stixmarker.api import utils
+
+
+class SelectorIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.test_tlo = \
+            {
+                "a": 333,
+                "b": "",
+                "c": [
+                    17,
+                    "list value",
+                    {
+                        "g": "nested",
+                        "h": 45
+                    }
+                ],
+                "x": {
+                    "y": [
+                        "hello",
+                        88
+                    ]
+                }
+            }
+
+    def test_index_evaluate(self):
+        index = utils.SelectorIndex(self.test_tlo)
+
+        self.assertEqual(index.evaluate("a"), [333])
+        self.assertEqual(index.evaluate("c.[2].g"), ["nested"])
+        self.assertEqual(index.evaluate("x.y.[1]"), [88])
+        self.assertEqual(index.evaluate("b"), [])
+        self.assertEqual(index.evaluate("c.[3]"), [])
+
+    def test_index_shared_by_validate(self):
+        index = utils.SelectorIndex(self.test_tlo)
+
+        utils.validate(self.test_tlo, ["a", "c.[0]", "x.y"], index=index)
+        self.assertRaises(AssertionError, utils.validate, self.test_tlo, ["a", "d"], None, index)
+
+    def test_index_invalidate(self):
+        index = utils.SelectorIndex(self.test_tlo)
+        self.assertFalse(utils.validate_selector(self.test_tlo, "d", index))
+
+        self.test_tlo["d"] = "new value"
+        index.invalidate()
+        self.assertTrue(utils.validate_selector(self.test_tlo, "d", index))
+
+    def test_index_get_selector(self):
+        index = utils.SelectorIndex(self.test_tlo)
+        nested = self.test_tlo["c"][2]
+
+        self.assertEqual(utils.get_selector(self.test_tlo, nested, index), ["c.[2]"])
+        self.assertEqual(utils.get_selector(self.test_tlo, self.test_tlo["x"]["y"], index), ["x.y"])
+        self.assertEqual(utils.get_selector(self.test_tlo, "not in tlo", index), [])
+
+    def test_get_selectors(self):
+        index = utils.SelectorIndex(self.test_tlo)
+        props = [self.test_tlo["c"][2]["g"], self.test_tlo["x"], ["hello", 88]]
+
+        self.assertEqual(utils.get_selectors(self.test_tlo, props, index), [["c.[2].g"], ["x"], []])
+
+        self.test_tlo["d"] = {"e": "new value"}
+        self.assertEqual(index.get_selectors([self.test_tlo["d"]]), [[]])
+        index.invalidate()
+        self.assertEqual(index.get_selectors([self.test_tlo["d"]]), [["d"]])
+
+
+class ResolveSelectorTests(unittest.TestCase):
+
+    def test_resolve_selector(self):
+        tlo = \
+            {
+                "a": [{"b": [1, [2, 3]]}, {"c": {"d": 4}}],
+                "e": {"[0]": "key", "f": 0},
+            }
+
+        self.assertEqual(utils.resolve_selector(tlo, "a.[0].b.[1]"), [[2, 3]])
+        self.assertEqual(utils.resolve_selector(tlo, "a.[1].c.d"), [4])
+        self.assertEqual(utils.resolve_selector(tlo, "e.[0]"), ["key"])
+        self.assertEqual(utils.resolve_selector(tlo, "a.[0].b.[1].[0]"), [])
+        self.assertEqual(utils.resolve_selector(tlo, "a.[2]"), [])
+        self.assertEqual(utils.resolve_selector(tlo, "a.[01]"), [])
+        self.assertEqual(utils.resolve_selector(tlo, "e.f"), [])
+        self.assertEqual(utils.resolve_selector(tlo, "e.f.g"), [])
+        self.assertEqual(utils.resolve_selector(tlo, 456), [])
+
+    def test_resolve_selector_matches_index(self):
+        tlo = \
+            {
+                "a": [{"b": [1, [2, 3]]}, {"c": {"d": 4}}],
+                "e": {"f": [], "g": [5, {"h": 6}]},
+            }
+        index = utils.SelectorIndex(tlo)
+
+        for selector in index.table:
+            for candidate in (selector, selector + ".[0]", selector + ".h"):
+                self.assertEqual(utils.resolve_selector(tlo, candidate), index.evaluate(candidate))
+
+
+class IterpathTests(unittest.TestCase):
+
+    def test_iterpath_equal_list_items(self):
+        tlo = {"labels": ["a", "a", "b", "a"]}
+        paths = [".".join(p) for p, v in utils.iterpath(tlo)]
+
+        self.assertEqual(paths, ["labels", "labels.[0]", "labels.[1]", "labels.[2]", "labels.[3]"])
+
+    def test_iterpath_sort_keys(self):
+        tlo = {"b": 1, "a": {"d": 2, "c": 3}}
+        paths = [".".join(p) for p, v in utils.iterpath(tlo, sort_keys=True)]
+
+        self.assertEqual(paths, ["a", "a.c", "a.d", "b"])
+
+    def test_iterselectors_matches_iterpath(self):
+        tlo = \
+            {
+                "a": [{"b": [1, [2, 3]]}, {"c": {"d": 4}}],
+                "e": {"f": [], "g": [5, {"h": 6}]},
+            }
+        expected = [(".".join(p), v) for p, v in utils.iterpath(tlo, sort_keys=True)]
+
+        self.assertEqual(list(utils.iterselectors(tlo, sort_keys=True)), expected)
+        self.assertIn(("a.[0].b.[1]", [2, 3]), expected)
+        self.assertNotIn("a.[0].b.[1].[0]", [p for p, v in expected])
+
+    def test_get_selector_equal_list_items(self):
+        tlo = {"kill_chain_phases": [{"phase_name": "x"}, {"phase_name": "x"}]}
+        second = tlo["kill_chain_phases"][1]
+
+        self.assertEqual(utils.get_selector(tlo, second), ["kill_chain_phases.[1]"])
+
+
+class GranularMarkingsTests(unittest.TestCase):
+
+    def test_granular_markings_incremental(self):
+        markings = utils.GranularMarkings([
+            {"selectors": ["title", "description"], "marking_ref": "marking-definition--1"},
+            {"selectors": "title", "marking_ref": ["marking-definition--2"]},
+        ])
+
+        self.assertEqual(len(markings), 3)
+        self.assertEqual(markings.refs("title"), set(["marking-definition--1", "marking-definition--2"]))
+
+        markings.add(["revision"], ["marking-definition--3"])
+        self.assertEqual(markings.remove(["title"], ["marking-definition--1", "marking-definition--3"]), 1)
+        self.assertEqual(markings.clear(["title", "type"]), 1)
+        self.assertFalse(markings.has_selector("title"))
+        self.assertTrue(("revision", "marking-definition--3") in markings)
+
+        self.assertEqual(markings.to_list(), [
+            {"selectors": ["description"], "marking_ref": "marking-definition--1"},
+            {"selectors": ["revision"], "marking_ref": "marking-definition--3"},
+        ])
+
+    def test_tlo_granular_markings_edit_in_place(self):
+        untouched = {"selectors": ["type", "id"], "marking_ref": "marking-definition--2"}
+        tlo = {
+            "granular_markings": [
+                {"selectors": ["title", "description"], "marking_ref": "marking-definition--1"},
+                untouched,
+            ]
+        }
+        markings = utils.TLOGranularMarkings(tlo)
+
+        markings.add(["revision", "title"], ["marking-definition--1", "marking-definition--3"])
+        self.assertEqual(tlo["granular_markings"], [
+            {"selectors": ["description", "revision", "title"], "marking_ref": "marking-definition--1"},
+            {"selectors": ["type", "id"], "marking_ref": "marking-definition--2"},
+            {"selectors": ["revision", "title"], "marking_ref": "marking-definition--3"},
+        ])
+        self.assertTrue(tlo["granular_markings"][1] is untouched)
+
+        self.assertEqual(markings.clear(["title", "revision"]), 4)
+        self.assertEqual(markings.refs("description"), set(["marking-definition--1"]))
+        self.assertEqual(markings.remove(["description"], ["marking-definition--1"]), 1)
+        self.assertEqual(tlo["granular_markings"], [untouched])
+
+        self.assertEqual(markings.clear(["id", "type"]), 2)
+        self.assertFalse(markings)
+        self.assertFalse("granular_markings" in tlo)
+
+        markings.add(["title"], ["marking-definition--4"])
+        self.assertEqual(tlo["granular_markings"], [{"selectors": ["title"], "marking_ref": "marking-definition--4"}])
+        self.assertEqual(markings.to_list(), tlo["granular_markings"])
+
+    def test_index_markings_compresses_once(self):
+        tlo = {
+            "granular_markings": [
+                {"selectors": ["title"], "marking_ref": "marking-definition--1"},
+                {"selectors": ["description"], "marking_ref": ["marking-definition--1", "marking-definition--2"]},
+            ]
+        }
+
+        entries = utils.index_markings(tlo)
+
+        self.assertEqual(list(entries), ["marking-definition--1", "marking-definition--2"])
+        self.assertEqual(entries["marking-definition--1"]["selectors"], ["description", "title"])
+        self.assertTrue(entries["marking-definition--2"] is tlo["granular_markings"][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
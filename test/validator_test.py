@@ -0,0 +1,82 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import unittest
+
+import six
+
+from stixmarker import validator
+from stixmarker.api import bundle
+
+
+DEFINITION = {"type": "marking-definition", "id": "marking-definition--1",
+              "definition_type": "statement", "definition": {"statement": "x"}}
+
+
+def _object(i, **extra):
+    obj = {
+        "type": "indicator",
+        "id": "indicator--{0}".format(i),
+        "name": "name {0}".format(i),
+        "x": {"y": ["hello", 88]},
+        "granular_markings": [
+            {"selectors": ["name", "x.y.[1]"], "marking_ref": "marking-definition--1"},
+        ]
+    }
+    obj.update(extra)
+    return obj
+
+
+class ValidatorTests(unittest.TestCase):
+
+    def test_check_object(self):
+        obj = _object(0, object_marking_refs=[bundle.TLP_RED["id"], "marking-definition--2"])
+        obj["granular_markings"].extend([
+            {"selectors": ["x.z", "name"], "marking_ref": ["marking-definition--1", "marking-definition--3"]},
+            {"selectors": "name", "marking_ref": "marking-definition--1"},
+        ])
+
+        errors, unknown = validator.check_object(obj, ["marking-definition--1"])
+
+        self.assertEqual(errors, [
+            {"code": validator.INVALID_SELECTOR, "selector": "x.z", "marking_ref": "marking-definition--1"},
+            {"code": validator.INVALID_SELECTOR, "selector": "x.z", "marking_ref": "marking-definition--3"},
+            {"code": validator.MALFORMED_GRANULAR_MARKING, "position": 2},
+        ])
+        self.assertEqual(unknown, [
+            ("marking-definition--2", None),
+            ("marking-definition--3", "x.z"),
+            ("marking-definition--3", "name"),
+        ])
+        self.assertEqual(validator.check_object(_object(1), ["marking-definition--1"]), ([], []))
+
+    def test_validate_corpus(self):
+        objects = [_object(i) for i in range(10)]
+        objects[3]["granular_markings"][0]["selectors"].append("x.y.[2]")
+        objects[7]["granular_markings"][0]["marking_ref"] = "marking-definition--9"
+        objects.append(DEFINITION)
+
+        for jobs in (1, 2):
+            records = list(validator.validate_corpus(iter(objects), jobs=jobs, chunk_size=3))
+
+            self.assertEqual([(r["index"], r["id"]) for r in records[:-1]], [(3, "indicator--3"), (7, "indicator--7")])
+            self.assertEqual(records[0]["errors"][0]["selector"], "x.y.[2]")
+            self.assertEqual(records[1]["errors"], [
+                {"code": validator.UNKNOWN_MARKING_REF, "marking_ref": "marking-definition--9", "selector": "name"},
+                {"code": validator.UNKNOWN_MARKING_REF, "marking_ref": "marking-definition--9", "selector": "x.y.[1]"},
+            ])
+
+            summary = records[-1]["summary"]
+            self.assertEqual((summary["objects"], summary["invalid_objects"], summary["errors"]), (11, 2, 3))
+
+    def test_write_report(self):
+        fp = six.StringIO()
+        summary = validator.write_report(validator.validate_corpus([_object(0)], report_all=True), fp)
+
+        self.assertEqual(len(fp.getvalue().splitlines()), 3)
+        self.assertEqual(summary["errors"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# Copyright (c) 2016, OASIS Open. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+
+import unittest
+
+
+from stixmarker import api
+from stixmarker.api import vectorized
+
+
+@unittest.skipIf(vectorized.numpy is None, "NumPy is not installed")
+class VectorizedMarkingsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.test_tlos = [
+            {
+                "title": "test title",
+                "description": "test description",
+                "x": {"y": ["hello", 88], "z": {"foo1": "bar"}},
+                "object_marking_refs": ["marking-definition--0"],
+                "granular_markings": [
+                    {"selectors": ["title", "x.y.[1]"], "marking_ref": "marking-definition--1"},
+                    {"selectors": ["x"], "marking_ref": "marking-definition--2"},
+                ]
+            },
+            {
+                "title": "other title",
+                "x": {"y": ["hello", 88], "z": {"foo1": "bar"}},
+                "granular_markings": [
+                    {"selectors": ["x.z.foo1"], "marking_ref": "marking-definition--1"},
+                ]
+            },
+            {
+                "title": "unmarked",
+            },
+        ]
+        self.markings = vectorized.VectorizedMarkings(self.test_tlos)
+
+    def test_get_markings_matches_api(self):
+        queries = [(o, s) for o in range(2) for s in ("title", "x", "x.y", "x.y.[1]", "x.z", "x.z.foo1")]
+        objects, selectors = zip(*queries)
+
+        for inherited in (False, True):
+            for descendants in (False, True):
+                results = self.markings.get_markings(objects, selectors, inherited, descendants)
+
+                for (o, s), row in zip(queries, results):
+                    expected = api.get_markings(self.test_tlos[o], s, inherited, descendants)
+                    self.assertEqual(sorted(self.markings.markings_of(row)), sorted(expected), (o, s, inherited, descendants))
+
+    def test_is_marked_matches_api(self):
+        queries = [(o, s) for o in range(3) for s in ("title", "x", "x.y", "x.y.[1]", "x.z", "x.z.foo1")
+                   if o < 2 or s == "title"]
+        objects, selectors = zip(*queries)
+
+        for marking in (None, "marking-definition--0", "marking-definition--1", "marking-definition--2"):
+            for inherited in (False, True):
+                for descendants in (False, True):
+                    results = self.markings.is_marked(objects, selectors, marking, inherited, descendants)
+
+                    for (o, s), result in zip(queries, results):
+                        expected = api.is_marked(self.test_tlos[o], s, marking, inherited, descendants)
+                        self.assertEqual(bool(result), expected, (o, s, marking, inherited, descendants))
+
+    def test_is_marked(self):
+        result = self.markings.is_marked(
+            [0, 0, 1, 1, 2],
+            ["title", "x.y.[1]", "x.z.foo1", "x.z.foo1", "title"],
+            ["marking-definition--1", "marking-definition--2", "marking-definition--1", "marking-definition--9", "marking-definition--0"],
+            inherited=True)
+        self.assertEqual(result.tolist(), [True, True, True, True, False])
+
+        result = self.markings.is_marked([0, 1, 2], "x.z", descendants=True)
+        self.assertEqual(result.tolist(), [False, True, False])
+
+        ids = self.markings.selector_ids(["title"] * 3)
+        result = self.markings.is_marked([0, 1, 2], ids, "marking-definition--1")
+        self.assertEqual(result.tolist(), [True, False, False])
+
+
+if __name__ == "__main__":
+    unittest.main()